@@ -1,17 +1,44 @@
 from base_manager import BaseManager
-from response_handler import ResponseHandler, SarcasticResponder
+from response_handler import ResponseHandler, SarcasticResponder, NormalizedComment
+from intent_matcher import get_intent_matcher
+from fuzzy_index import FuzzyIndex, normalize
+from viewer_profiles import get_viewer_profiles, profile_key
+from response_templates import get_template_catalog
 import random
-from difflib import SequenceMatcher
 
 class AcertijoManager(BaseManager):
     """Manager de acertijos refactorizado usando BaseManager"""
     
-    def __init__(self, acertijos_file="acertijos.json"):
-        super().__init__(acertijos_file)
-        self.acertijo_actual = None
+    JOURNAL_MODE = True  # Cada intento suma estadísticas
+    USER_TABLES = {"ganadores": "counter"}
+    TOP_K_TABLES = {"ganadores": 500}  # Solo sin storage: con SQLite manda USER_TABLES
+    WEIGHTED_KEYS = {"acertijos": "dificultad"}
+    WEIGHT_MAPS = {"dificultad": {"fácil": 3, "medio": 2, "difícil": 1}}
+    PALABRAS_IGNORAR = frozenset(["el", "la", "los", "las", "un", "una", "es", "soy"])
+    
+    def __init__(self, acertijos_file="acertijos.json", storage=None):
+        super().__init__(acertijos_file, storage=storage)
+        self._acertijo_actual = None
+        self._indice_respuestas = FuzzyIndex(max_ratio=0.2)
+        self._veredictos = {}  # respuesta limpia -> correcta o no (por acertijo)
         self.intentos_fallidos = {}
         print(f"🧩 Acertijo Manager inicializado con {len(self.data.get('acertijos', []))} acertijos")
     
+    @property
+    def acertijo_actual(self):
+        return self._acertijo_actual
+    
+    @acertijo_actual.setter
+    def acertijo_actual(self, acertijo):
+        """Al plantear un acertijo se precalculan sus respuestas normalizadas"""
+        indice = FuzzyIndex(max_ratio=0.2)
+        if acertijo:
+            for i, respuesta in enumerate(acertijo.get("respuestas", [])):
+                indice.add(i, self._limpiar_respuesta(respuesta))
+        self._indice_respuestas = indice
+        self._veredictos = {}
+        self._acertijo_actual = acertijo
+    
     def _create_default_data(self):
         """Crear acertijos por defecto"""
         self.data = {
@@ -89,6 +116,11 @@ class AcertijoManager(BaseManager):
         # Incrementar estadística
         self.increment_counter("estadisticas", "acertijos_planteados")
         
+        return self._format_acertijo(acertijo)
+    
+    @staticmethod
+    def _format_acertijo(acertijo):
+        """Texto con el que se plantea un acertijo aleatorio"""
         # Emoji de dificultad
         difficulty_emoji = {
             "fácil": "🟢",
@@ -100,65 +132,83 @@ class AcertijoManager(BaseManager):
         
         return f"🧩 ACERTIJO {emoji}:\n\n{acertijo['pregunta']}\n\n¡A ver si no eres tan tonto como pareces!"
     
+    def prerender_texts(self):
+        """Textos que get_acertijo_aleatorio puede decir, ya limpios para el TTS"""
+        return [ResponseHandler.clean_text(self._format_acertijo(a)) for a in self.data.get("acertijos", [])]
+    
     def verificar_respuesta(self, username, respuesta):
         """Verificar respuesta usando funciones comunes"""
         if not self.acertijo_actual:
             return "¡No hay acertijo activo, genio!"
         
-        # Limpiar respuesta
-        respuesta_limpia = self._limpiar_respuesta(ResponseHandler.clean_text(respuesta))
-        respuestas_correctas = [self._limpiar_respuesta(r) for r in self.acertijo_actual["respuestas"]]
-        
         # Incrementar intentos totales
         self.increment_counter("estadisticas", "intentos_totales")
         
-        # Verificar respuesta exacta
-        if respuesta_limpia in respuestas_correctas:
+        if self._es_correcta(respuesta):
             return self._respuesta_correcta(username)
         
-        # Verificar respuesta similar
-        for respuesta_correcta in respuestas_correctas:
-            similarity = ResponseHandler.get_similarity(respuesta_limpia, respuesta_correcta)
-            if similarity > 0.8:
-                return self._respuesta_correcta(username)
-        
         return self._respuesta_incorrecta(username)
     
+    def verificar_lote(self, comentarios):
+        """Verificar un lote de (username, respuesta, perfil) en orden de llegada
+        
+        Devuelve la felicitación del primero que acertó, o None si nadie
+        acertó. Las respuestas repetidas del lote se evalúan una sola vez.
+        El perfil es el que ModeController resolvió al encolar (o None).
+        """
+        if not self.acertijo_actual or not comentarios:
+            return None
+        
+        intentos = 0
+        for username, respuesta, profile in comentarios:
+            intentos += 1
+            if self._es_correcta(respuesta):
+                self.increment_counter("estadisticas", "intentos_totales", intentos)
+                return self._respuesta_correcta(username, profile)
+            key = profile_key(username)
+            self.intentos_fallidos[key] = self.intentos_fallidos.get(key, 0) + 1
+        
+        self.increment_counter("estadisticas", "intentos_totales", intentos)
+        return None
+    
+    def _es_correcta(self, respuesta):
+        """Comparar contra el índice de respuestas del acertijo actual"""
+        respuesta_limpia = self._limpiar_respuesta(respuesta)
+        veredicto = self._veredictos.get(respuesta_limpia)
+        if veredicto is None:
+            # Exacta o con errores de tipeo (hasta 1 por cada 5 letras)
+            veredicto = self._indice_respuestas.best(respuesta_limpia, normalized=True) is not None
+            self._veredictos[respuesta_limpia] = veredicto
+        return veredicto
+    
     def _limpiar_respuesta(self, respuesta):
         """Limpiar respuesta para comparación"""
-        respuesta_limpia = respuesta.lower().strip()
+        respuesta_limpia = normalize(respuesta)
         
         # Remover artículos y palabras comunes
-        palabras_ignorar = ["el", "la", "los", "las", "un", "una", "es", "soy"]
         palabras = respuesta_limpia.split()
-        palabras_filtradas = [p for p in palabras if p not in palabras_ignorar]
+        palabras_filtradas = [p for p in palabras if p not in self.PALABRAS_IGNORAR]
         
         return " ".join(palabras_filtradas) if palabras_filtradas else respuesta_limpia
     
-    def _respuesta_correcta(self, username):
+    def _respuesta_correcta(self, username, profile=None):
         """Manejar respuesta correcta"""
+        profile = profile or get_viewer_profiles().get(username)
         # Actualizar puntuación usando método heredado
         self.increment_counter("ganadores", username)
         self.increment_counter("estadisticas", "acertijos_resueltos")
+        profile.incr("acertijos")
         
         # Limpiar intentos fallidos
-        if username in self.intentos_fallidos:
-            del self.intentos_fallidos[username]
+        self.intentos_fallidos.pop(profile_key(username), None)
         
         # Respuestas sarcásticas de felicitación
-        felicitaciones = [
-            f"¡Correcto, {username}! ¡Hasta un reloj descompuesto da la hora correcta dos veces al día!",
-            f"¡Bien {username}! ¡Por fin usaste esa cosa que tienes entre las orejas!",
-            f"¡Exacto, {username}! ¡Veo que no eres tan inútil como pensé!",
-            f"¡Correcto, {username}! ¡Felicidades por tener más de dos neuronas funcionando!",
-        ]
-        
-        respuesta = random.choice(felicitaciones)
-        aciertos = self.get_counter("ganadores", username)
+        respuesta = get_template_catalog().render("acertijo_correcto", username=username)
+        aciertos = self.get_guaranteed_counter("ganadores", username)
         respuesta += f"\n\n🏆 Llevas {aciertos} acertijos correctos."
         
         # Personalizar usando ResponseHandler
-        respuesta = ResponseHandler.personalize_by_name(username, respuesta)
+        respuesta = ResponseHandler.personalize_by_name(username, respuesta, profile)
         
         # Limpiar acertijo actual
         self.acertijo_actual = None
@@ -168,39 +218,13 @@ class AcertijoManager(BaseManager):
     def _respuesta_incorrecta(self, username):
         """Manejar respuesta incorrecta"""
         # Incrementar intentos fallidos
-        if username not in self.intentos_fallidos:
-            self.intentos_fallidos[username] = 0
-        self.intentos_fallidos[username] += 1
-        
-        intentos = self.intentos_fallidos[username]
-        
-        # Respuestas escaladas usando SarcasticResponder
-        if intentos == 1:
-            burlas = [
-                f"¡Incorrecto, {username}! ¡Pero no te preocupes, todos empezamos siendo tontos!",
-                f"¡Fallaste, {username}! ¡Inténtalo de nuevo, a ver si la suerte te acompaña!",
-                f"¡Nope, {username}! ¡Tu cerebro necesita más ejercicio!",
-            ]
-        elif intentos == 2:
-            burlas = [
-                f"¡Otra vez mal, {username}! ¡Tu récord de fracasos va creciendo!",
-                f"¡Dos errores, {username}! ¡Impresionante consistencia en ser malo!",
-                f"¡Fallaste de nuevo, {username}! ¡Al menos eres constante!",
-            ]
-        elif intentos == 3:
-            burlas = [
-                f"¡Tres errores, {username}! ¡Eres todo un profesional... del fracaso!",
-                f"¡Triple falla, {username}! ¡Tu talento para errar es impresionante!",
-                f"¡Tercera vez mal, {username}! ¡Deberías dedicarte a otra cosa!",
-            ]
-        else:
-            burlas = [
-                f"¡{intentos} errores, {username}! ¡Ya perdí la cuenta de tus fracasos!",
-                f"¡Sigues fallando, {username}! ¡Al menos eres entretenido!",
-                f"¡{intentos} intentos y nada, {username}! ¡Eres una obra de arte... del desastre!",
-            ]
-        
-        respuesta = random.choice(burlas)
+        key = profile_key(username)
+        intentos = self.intentos_fallidos.get(key, 0) + 1
+        self.intentos_fallidos[key] = intentos
+        
+        # Burlas escaladas según la cantidad de intentos
+        grupo = f"acertijo_incorrecto_{intentos}" if intentos <= 3 else "acertijo_incorrecto_muchos"
+        respuesta = get_template_catalog().render(grupo, username=username, intentos=intentos)
         
         # Dar pista después de varios intentos
         if intentos >= 2 and self.acertijo_actual:
@@ -238,7 +262,7 @@ class AcertijoManager(BaseManager):
         if not acertijos_categoria:
             return f"No tengo acertijos de '{categoria}', ¡pero tengo muchos de lo inútil que eres!"
         
-        self.acertijo_actual = random.choice(acertijos_categoria)
+        self.acertijo_actual = self.choice_from(f"acertijos:{categoria.lower()}", acertijos_categoria)
         self.intentos_fallidos = {}
         self.increment_counter("estadisticas", "acertijos_planteados")
         
@@ -249,14 +273,12 @@ class AcertijoManager(BaseManager):
     
     def get_ranking(self):
         """Obtener ranking de ganadores"""
-        ganadores = self.data.get("ganadores", {})
-        if not ganadores:
+        ranking = self.top_counters("ganadores", 10)
+        if not ranking:
             return "¡No hay ganadores aún! ¡Todos son igual de inútiles!"
         
-        ranking = sorted(ganadores.items(), key=lambda x: x[1], reverse=True)
-        
         resultado = "🏆 RANKING DE ACERTIJOS:\n\n"
-        for i, (username, aciertos) in enumerate(ranking[:10], 1):
+        for i, (username, aciertos) in enumerate(ranking, 1):
             medal = ["🥇", "🥈", "🥉"][i-1] if i <= 3 else f"{i}."
             resultado += f"{medal} {username}: {aciertos} acertijos\n"
         
@@ -264,16 +286,17 @@ class AcertijoManager(BaseManager):
     
     def responder_comentario_modo_acertijo(self, username, comentario):
         """Responder comentarios en modo acertijo usando ResponseHandler"""
-        comentario_lower = ResponseHandler.clean_text(comentario).lower()
+        comentario = NormalizedComment.of(comentario)
+        intents = get_intent_matcher().classify(comentario)
         
         # Comandos especiales
-        if ResponseHandler.detect_keywords(comentario_lower, ["pista", "ayuda", "hint"]):
+        if "pista" in intents:
             return self.dar_pista()
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["ranking", "puntuacion", "puntaje"]):
+        if "ranking" in intents:
             return self.get_ranking()
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["nuevo", "otro", "siguiente"]):
+        if "nuevo" in intents:
             return self.get_acertijo_aleatorio()
         
         # Si hay acertijo activo, verificar respuesta
@@ -311,7 +334,7 @@ class AcertijoManager(BaseManager):
             tasa_exito = (resueltos / planteados) * 100
             stats += f"Tasa de éxito: {tasa_exito:.1f}%\n"
         
-        stats += f"Jugadores: {len(self.data.get('ganadores', {}))}\n"
+        stats += f"Jugadores: {self.count_entries('ganadores')}\n"
         
         stats += f"\nCategorías:\n"
         for cat, count in sorted(categorias.items()):
@@ -385,4 +408,13 @@ if __name__ == "__main__":
     print(acertijo)
     
     print(f"\n📈 ESTADÍSTICAS:")
-    print(manager.get_acertijo_stats())
\ No newline at end of file
+    print(manager.get_acertijo_stats())
+    
+    # Lote de respuestas como el de un live con cientos de espectadores
+    import time
+    respuesta = manager.acertijo_actual["respuestas"][0]
+    lote = [(f"user{i}", f"creo que es {i % 40}", None) for i in range(800)] + [("ganador", respuesta.upper() + "!!", None)]
+    inicio = time.perf_counter()
+    resultado = manager.verificar_lote(lote)
+    print(f"\n⏱️ Lote de {len(lote)} respuestas verificado en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    print(resultado)
\ No newline at end of file
@@ -1,12 +1,19 @@
 from base_manager import BaseManager
 from response_handler import ResponseHandler, SarcasticResponder
+from intent_matcher import get_intent_matcher
+from viewer_profiles import get_viewer_profiles
+from response_templates import get_template_catalog
 import random
 
 class AmenazasManager(BaseManager):
     """Manager de amenazas refactorizado usando BaseManager"""
     
-    def __init__(self, amenazas_file="amenazas.json"):
-        super().__init__(amenazas_file)
+    JOURNAL_MODE = True  # usuarios_asustados cambia con cada comentario
+    USER_TABLES = {"usuarios_asustados": "counter"}
+    TOP_K_TABLES = {"usuarios_asustados": 500}  # Solo sin storage: con SQLite manda USER_TABLES
+    
+    def __init__(self, amenazas_file="amenazas.json", storage=None):
+        super().__init__(amenazas_file, storage=storage)
         print(f"👻 Amenazas Manager inicializado - Modo Terrorífico Activado")
     
     def _create_default_data(self):
@@ -56,11 +63,14 @@ class AmenazasManager(BaseManager):
             "version": "2.0"
         }
     
-    def get_amenaza_personalizada(self, username):
+    def get_amenaza_personalizada(self, username, profile=None):
         """Obtener amenaza personalizada usando métodos heredados"""
-        # Incrementar nivel de miedo del usuario
-        nivel_miedo = self.increment_counter("usuarios_asustados", username)
+        profile = profile or get_viewer_profiles().get(username)
+        # Incrementar nivel de miedo del usuario (el estimado top-K solo sirve para el ranking)
+        self.increment_counter("usuarios_asustados", username)
+        nivel_miedo = self.get_guaranteed_counter("usuarios_asustados", username)
         self.increment_counter("estadisticas", "amenazas_enviadas")
+        profile.incr("amenazas")
         
         # Si es usuario nuevo, incrementar contador
         if nivel_miedo == 1:
@@ -76,61 +86,40 @@ class AmenazasManager(BaseManager):
             amenaza = self._generar_amenaza_especifica(username, nivel_miedo)
         
         # Personalizar usando ResponseHandler
-        amenaza_personalizada = ResponseHandler.personalize_by_name(username, amenaza)
+        amenaza_personalizada = ResponseHandler.personalize_by_name(username, amenaza, profile)
         frase_intro = self.get_random_choice("frases_terrorificas")
         
         return f"👻 {frase_intro}\n\n{username}, {amenaza_personalizada}"
     
     def _generar_amenaza_especifica(self, username, nivel):
         """Generar amenazas específicas para usuarios frecuentes"""
-        amenazas_especificas = [
-            f"Ya llevas {nivel} interacciones conmigo, {username}... ¡Eso es obsesión!",
-            f"{username}, después de {nivel} veces hablándome, ya eres parte de mi circo del terror.",
-            f"¡{nivel} mensajes, {username}! ¡Oficialmente eres mi acosador favorito!",
-            f"{username}, con {nivel} interacciones ya conoces todos mis secretos terroríficos.",
-            f"¡{nivel} comentarios, {username}! ¡Ya eres mi víctima oficial!"
-        ]
-        
-        return random.choice(amenazas_especificas)
+        return get_template_catalog().render("amenaza_especifica", username=username, nivel=nivel)
     
-    def responder_comentario_terrorificamente(self, username, comentario):
+    def responder_comentario_terrorificamente(self, username, comentario, profile=None):
         """Responder a comentarios con estilo terrorífico usando ResponseHandler"""
-        comentario_clean = ResponseHandler.clean_text(comentario)
-        comentario_lower = comentario_clean.lower()
-        
-        # Respuestas específicas según el contenido usando detector de keywords
-        if ResponseHandler.detect_keywords(comentario_lower, ["miedo", "susto", "terror", "asusta"]):
-            respuestas_miedo = [
-                f"¿Miedo, {username}? ¡Esto apenas empieza!",
-                f"El miedo es solo el principio, {username}...",
-                f"{username}, el terror verdadero aún no llega.",
-                f"¿Te asusto, {username}? ¡Misión cumplida!"
-            ]
-            return ResponseHandler.personalize_by_name(username, random.choice(respuestas_miedo))
-        
-        if ResponseHandler.detect_keywords(comentario_lower, ["no", "no me asustas", "no da miedo"]):
-            respuestas_desafio = [
-                f"¿No te asusto, {username}? ¡Ya veremos!",
-                f"Valientes palabras, {username}... por ahora.",
-                f"{username}, los valientes son mis favoritos para atormentar.",
-                f"¿Seguro, {username}? La noche es joven..."
-            ]
-            return random.choice(respuestas_desafio)
-        
-        if ResponseHandler.detect_keywords(comentario_lower, ["hola", "hi", "saludos"]):
+        intents = get_intent_matcher().classify(comentario)
+        
+        # Respuestas específicas según las intenciones del comentario
+        if "miedo" in intents:
+            return ResponseHandler.personalize_by_name(username, get_template_catalog().render("amenaza_miedo", username=username), profile)
+        
+        if "desafio" in intents:
+            return get_template_catalog().render("amenaza_desafio", username=username)
+        
+        if "saludo" in intents:
             return f"Hola {username}... bienvenido a tu pesadilla favorita."
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["gracioso", "divertido", "chistoso"]):
+        if "eres_gracioso" in intents:
             return f"¿Gracioso, {username}? ¡Mi humor es oscuro como mi alma!"
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["ayuda", "help", "socorro"]):
+        if "auxilio" in intents:
             return f"No hay ayuda para ti, {username}... solo yo."
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["lindo", "tierno", "cute"]):
+        if "ternura" in intents:
             return f"¿Lindo, {username}? ¡Soy adorablemente terrorífico!"
         
         # Amenaza personalizada por defecto
-        return self.get_amenaza_personalizada(username)
+        return self.get_amenaza_personalizada(username, profile)
     
     def get_amenaza_aleatoria(self):
         """Obtener amenaza aleatoria sin personalizar"""
@@ -145,6 +134,12 @@ class AmenazasManager(BaseManager):
         
         return f"👻 {frase_intro}\n\n{amenaza}"
     
+    def prerender_texts(self):
+        """Frases y amenazas sueltas: van en párrafos distintos, así que se cachean por separado"""
+        lineas = [f"👻 {frase_intro}" for frase_intro in self.data.get("frases_terrorificas", [])]
+        lineas += self.data.get("amenazas_sutiles", []) + self.data.get("amenazas_directas", [])
+        return [ResponseHandler.clean_text(linea) for linea in lineas]
+    
     def get_amenaza_por_categoria(self, tipo):
         """Obtener amenaza por tipo (sutil/directa)"""
         if tipo.lower() == "sutil":
@@ -168,14 +163,12 @@ class AmenazasManager(BaseManager):
     
     def get_top_usuarios_asustados(self):
         """Obtener ranking de usuarios más asustados"""
-        usuarios_asustados = self.data.get("usuarios_asustados", {})
-        if not usuarios_asustados:
+        ranking = self.top_counters("usuarios_asustados", 10)
+        if not ranking:
             return "¡Nadie ha sido lo suficientemente valiente para enfrentarme!"
         
-        ranking = sorted(usuarios_asustados.items(), key=lambda x: x[1], reverse=True)
-        
         resultado = "👻 TOP VÍCTIMAS DEL TERROR:\n\n"
-        for i, (username, nivel) in enumerate(ranking[:10], 1):
+        for i, (username, nivel) in enumerate(ranking, 1):
             emoji = ["👻", "💀", "🎭"][i-1] if i <= 3 else f"{i}."
             resultado += f"{emoji} {username}: {nivel} encuentros terroríficos\n"
         
@@ -206,8 +199,7 @@ class AmenazasManager(BaseManager):
         amenaza = random.choice(amenazas_psicopata)
         
         # Incrementar significativamente el nivel de miedo
-        self.data["usuarios_asustados"][username] = self.data.get("usuarios_asustados", {}).get(username, 0) + 5
-        self.save_data()
+        self.increment_counter("usuarios_asustados", username, 5)
         
         return f"{intro}\n\n{amenaza}\n\n*risa macabra que se desvanece lentamente*"
     
@@ -233,32 +225,29 @@ class AmenazasManager(BaseManager):
         
         amenazas_enviadas = self.get_counter("estadisticas", "amenazas_enviadas")
         usuarios_aterrorizados = self.get_counter("estadisticas", "usuarios_aterrorizados")
-        usuarios_asustados = self.data.get("usuarios_asustados", {})
+        victimas = self.count_entries("usuarios_asustados")
         
         stats = f"{base_stats}\n"
         stats += f"Amenazas enviadas: {amenazas_enviadas}\n"
         stats += f"Usuarios aterrorizados: {usuarios_aterrorizados}\n"
         
-        if usuarios_asustados:
-            total_encuentros = sum(usuarios_asustados.values())
-            promedio = total_encuentros / len(usuarios_asustados)
+        if victimas:
+            total_encuentros = self.sum_counters("usuarios_asustados")
+            promedio = total_encuentros / victimas
             stats += f"Total encuentros terroríficos: {total_encuentros}\n"
             stats += f"Promedio por víctima: {promedio:.1f}\n"
             
             # Usuario más asustado
-            usuario_top = max(usuarios_asustados, key=usuarios_asustados.get)
-            nivel_top = usuarios_asustados[usuario_top]
+            usuario_top, nivel_top = self.top_counters("usuarios_asustados", 1)[0]
             stats += f"Víctima principal: {usuario_top} ({nivel_top} encuentros)\n"
         
         return stats
     
     def reset_usuarios_asustados(self):
         """Resetear contador de usuarios asustados usando método heredado"""
-        usuarios_asustados = self.data.get("usuarios_asustados", {})
-        count = len(usuarios_asustados)
+        count = self.count_entries("usuarios_asustados")
         
-        self.data["usuarios_asustados"] = {}
-        self.save_data()
+        self.set_value("usuarios_asustados", {})
         
         return f"🧹 {count} víctimas liberadas de su terror. ¡Pueden volver a asustarse!"
     
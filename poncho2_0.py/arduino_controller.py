@@ -5,6 +5,9 @@ import threading
 class ArduinoController:
     """Controlador Arduino integrado con el sistema dual robot"""
     
+    # Prefijo de los frames de boca de cada robot: "M7\n" = boca de Poncho al nivel 7 (0-9)
+    MOUTH_COMMANDS = {"poncho": "M", "regalo": "G"}
+    
     def __init__(self, port="COM16", baudrate=9600):
         self.port = port
         self.baudrate = baudrate
@@ -39,7 +42,8 @@ class ArduinoController:
         
         try:
             command_bytes = f"{command}\n".encode()
-            self.ser.write(command_bytes)
+            with self.queue_lock:  # Los frames de boca se escriben desde otro hilo
+                self.ser.write(command_bytes)
             time.sleep(0.1)
             print(f"📤 Arduino: {command}")
             return True
@@ -56,6 +60,19 @@ class ArduinoController:
         """Poncho detiene animación de habla"""
         return self.send_command("STOP")
     
+    def send_mouth(self, level, robot="poncho"):
+        """Frame de apertura de boca (lip-sync): sin pausa ni log, se envía 25 veces por segundo"""
+        if not self.connected or not self.ser:
+            return False
+        
+        try:
+            with self.queue_lock:
+                self.ser.write(f"{self.MOUTH_COMMANDS.get(robot, 'M')}{level}\n".encode())
+            return True
+        except Exception as e:
+            print(f"❌ Error enviando frame de boca: {e}")
+            return False
+    
     def happy_animation(self):
         """Poncho animación de felicidad"""
         return self.send_command("HAPPY")
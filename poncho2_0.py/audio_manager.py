@@ -1,30 +1,50 @@
 import threading
 import time
-import tempfile
-import os
-import asyncio
+import io
+import queue
 import pygame
 import speech_recognition as sr
-try:
-    import edge_tts
-    HAS_EDGE_TTS = True
-except ImportError:
-    HAS_EDGE_TTS = False
-    print("⚠️ edge-tts no disponible - síntesis de voz deshabilitada")
+from tts_service import TTS_PARAMS
+from tts_cache import get_tts_cache
+from tts_backends import get_tts_router
+from mp3_stream import Mp3Segmenter, mp3_duration
+from audio_mixer import get_audio_mixer
+from speech_scheduler import SpeechScheduler
+from lip_sync import HAS_NUMPY, LIPSYNC_SUFFIX, EnvelopeBuilder, LipSync, get_envelope
+
+# pygame.mixer.init no es seguro si se llama desde varios hilos a la vez
+_MIXER_INIT_LOCK = threading.Lock()
+
+if not get_tts_router().available():
+    print("⚠️ Ningún motor de TTS disponible (edge-tts, pyttsx3, espeak-ng) - síntesis de voz deshabilitada")
 
 class AudioManager:
     """Manager común para funcionalidades de audio"""
     
-    def __init__(self, arduino_controller=None):
+    SPEECH_POLICY = "higher"  # Cuándo una respuesta corta a la que suena (ver SpeechScheduler)
+    SPEECH_LATENCY_BUDGET = 8.0  # Segundos de cola antes de descartar respuestas viejas de baja prioridad
+    
+    def __init__(self, arduino_controller=None, channel=None):
         self.arduino = arduino_controller
         self.is_playing = False
         self.current_thread = None
-        self.temp_files = []
+        self.channel = channel  # Canal del AudioMixer (None = cualquier canal libre)
+        self._playback = None  # Reproducción en curso (PlaybackEngine)
+        self._stop_event = threading.Event()  # Se activa al detener: corta las esperas
+        self._finished_callbacks = []  # Se llaman al terminar de hablar sin interrupción
         self.voice = "es-MX-JorgeNeural"
+        # Cola de habla por prioridad: say() encola, speak_text() dice ya
+        self._speaking_item = None  # Item del scheduler que está sonando (para cortes dirigidos)
+        self._speech_lock = threading.Lock()
+        self.scheduler = SpeechScheduler(self._speak_and_wait, self._interrupt_speech,
+                                         policy=self.SPEECH_POLICY,
+                                         latency_budget=self.SPEECH_LATENCY_BUDGET,
+                                         name=channel or "audio")
         
-        # Inicializar pygame
+        # Inicializar pygame (los managers pueden construirse en paralelo)
         try:
-            pygame.mixer.init()
+            with _MIXER_INIT_LOCK:
+                pygame.mixer.init()
             print("🔊 Audio Manager inicializado")
         except Exception as e:
             print(f"❌ Error inicializando audio: {e}")
@@ -33,12 +53,11 @@ class AudioManager:
         """Reproducir archivo de audio con callback opcional"""
         if self.is_playing:
             self.stop_audio()
-            time.sleep(0.2)
         
         self.is_playing = True
         self.current_thread = threading.Thread(
-            target=self._play_file_thread, 
-            args=(audio_file, callback), 
+            target=self._play_file_thread,
+            args=(audio_file, callback),
             daemon=True
         )
         self.current_thread.start()
@@ -52,12 +71,16 @@ class AudioManager:
             if self.arduino:
                 self.arduino.start_talking()
             
-            pygame.mixer.music.load(audio_file)
-            pygame.mixer.music.play()
-            
-            while pygame.mixer.music.get_busy() and self.is_playing:
-                time.sleep(0.1)
-                
+            # Canción larga: por el stream de música, con la duración leída de sus frames
+            length = None
+            if audio_file.lower().endswith('.mp3'):
+                with open(audio_file, 'rb') as f:
+                    length = mp3_duration(f.read())
+            self._playback = get_audio_mixer().play_music(audio_file, length)
+            if not self.is_playing:
+                self._playback.stop()
+            self._playback.wait()
+        
         except Exception as e:
             print(f"❌ Error reproduciendo audio: {e}")
         finally:
@@ -68,40 +91,36 @@ class AudioManager:
                 callback('stop')
     
     def speak_text(self, text):
-        """Convertir texto a voz y reproducir"""
-        if not HAS_EDGE_TTS:
+        """Convertir texto a voz y reproducir (devuelve el hilo que habla)"""
+        if not get_tts_router().available():
             print(f"🗣️ [TEXTO]: {text}")
-            return
+            return None
         
         if self.is_playing:
             self.stop_audio()
-            time.sleep(0.2)
         
         self.is_playing = True
-        self.current_thread = threading.Thread(
+        thread = threading.Thread(
             target=self._speak_thread,
             args=(text,),
             daemon=True
         )
-        self.current_thread.start()
+        self.current_thread = thread
+        thread.start()
+        return thread
     
     def _speak_thread(self, text):
         """Thread de síntesis de voz"""
+        terminado = False
         try:
             if self.arduino:
                 self.arduino.start_talking()
             
-            # Crear audio con Edge TTS
-            audio_file = self._create_audio_async(text)
+            # Crear audio con el motor de TTS disponible (en memoria, sin archivo temporal)
+            audio = self._create_audio_async(text)
             
-            if audio_file:
-                pygame.mixer.music.load(audio_file)
-                pygame.mixer.music.play()
-                
-                while pygame.mixer.music.get_busy() and self.is_playing:
-                    time.sleep(0.1)
-                
-                self.temp_files.append(audio_file)
+            if audio:
+                terminado = self._play_and_wait(audio, text)
         
         except Exception as e:
             print(f"❌ Error en síntesis de voz: {e}")
@@ -109,29 +128,93 @@ class AudioManager:
             self.is_playing = False
             if self.arduino:
                 self.arduino.stop_talking()
-            self._cleanup_old_files()
+            if terminado:
+                self._notify_finished()
+    
+    def _make_sound(self, audio):
+        """Decodificar un MP3 en memoria a un Sound de pygame"""
+        return pygame.mixer.Sound(file=io.BytesIO(audio))
+    
+    def _play_and_wait(self, audio, text=None):
+        """Reproducir un MP3 en memoria y esperar: True si terminó, False si se detuvo"""
+        sound = self._make_sound(audio)
+        # La envolvente se calcula (o se lee del caché) antes de que empiece a sonar
+        frames = get_envelope(sound, text, self.voice, TTS_PARAMS) if self._lip_sync_enabled() else None
+        self._playback = get_audio_mixer().play(self.channel, sound)
+        if not self.is_playing:
+            self._playback.stop()  # La parada llegó mientras arrancaba
+        lips = self._start_lip_sync(self._playback, frames)
+        terminado = self._playback.wait()
+        if lips:
+            lips.join(1.0)
+        return terminado
+    
+    def _lip_sync_enabled(self):
+        """La boca sigue al audio si hay NumPy y un Arduino conectado que acepte frames"""
+        return (HAS_NUMPY and self.arduino is not None and hasattr(self.arduino, 'send_mouth')
+                and self.arduino.is_connected())
+    
+    def _start_lip_sync(self, playback, frames=None):
+        """Enviar la apertura de la boca al ritmo de la reproducción (frames=None: se agregan después)"""
+        if not self._lip_sync_enabled():
+            return None
+        robot = self.channel if self.channel in self.arduino.MOUTH_COMMANDS else "poncho"
+        lips = LipSync(lambda nivel: self.arduino.send_mouth(nivel, robot), name=f"LipSync-{robot}")
+        if frames is not None:
+            lips.feed(frames)
+            lips.close()
+        return lips.start(playback)
+    
+    def say(self, text, kind="chat", key=None, amount=1, render=None):
+        """Encolar texto para decir según su prioridad (gift, question, chat, filler)"""
+        return self.scheduler.submit(text, kind, key, amount, render)
+    
+    def stop_speech(self):
+        """Descartar lo que está en cola y detener lo que suena"""
+        self.scheduler.clear()
+        self.stop_audio()
+    
+    def _speak_and_wait(self, text):
+        """Decir un texto y volver cuando terminó o lo cortaron (lo usa el scheduler)"""
+        with self._speech_lock:
+            self._speaking_item = self.scheduler.current
+        try:
+            # El hilo que devuelve speak_text, no current_thread: otro speak_text pudo reemplazarlo
+            thread = self.speak_text(text)
+            if thread and thread is not threading.current_thread():
+                thread.join()
+        finally:
+            with self._speech_lock:
+                self._speaking_item = None
+    
+    def _interrupt_speech(self, item):
+        """Cortar `item` porque llegó algo más urgente (si ya terminó, no cortar lo siguiente)"""
+        with self._speech_lock:
+            if item is not None and item is self._speaking_item:
+                self._cut_speech()
+    
+    def _cut_speech(self):
+        """Detener lo que suena para dar paso a una respuesta urgente"""
+        self.stop_audio()
+    
+    def add_finished_callback(self, callback):
+        """Registrar una función a llamar cuando termina de hablar sin interrupción"""
+        self._finished_callbacks.append(callback)
+    
+    def _notify_finished(self):
+        """Avisar a los callbacks que el audio terminó"""
+        for callback in self._finished_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Error en callback de fin de audio: {e}")
     
     def _create_audio_async(self, text):
-        """Crear archivo de audio usando Edge TTS"""
-        if not HAS_EDGE_TTS:
-            return None
-        
+        """Crear audio con el primer motor de TTS que responda (bytes MP3 o WAV)"""
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            temp_file.close()
-            
-            async def generate():
-                communicate = edge_tts.Communicate(text, self.voice)
-                await communicate.save(temp_file.name)
-            
-            loop.run_until_complete(generate())
-            loop.close()
-            
-            return temp_file.name
-            
+            # Del caché o sintetizado, con failover a un motor local
+            return get_tts_router().synthesize(text, self.voice)
+        
         except Exception as e:
             print(f"❌ Error creando audio: {e}")
             return None
@@ -139,8 +222,10 @@ class AudioManager:
     def stop_audio(self):
         """Detener reproducción"""
         self.is_playing = False
+        self._stop_event.set()
         try:
-            pygame.mixer.music.stop()
+            if self._playback:
+                self._playback.stop()
         except:
             pass
         
@@ -153,7 +238,8 @@ class AudioManager:
     def pause_audio(self):
         """Pausar audio"""
         try:
-            pygame.mixer.music.pause()
+            if self._playback:
+                self._playback.pause()
             if self.arduino:
                 self.arduino.stop_talking()
             return True
@@ -164,7 +250,8 @@ class AudioManager:
     def resume_audio(self):
         """Reanudar audio"""
         try:
-            pygame.mixer.music.unpause()
+            if self._playback:
+                self._playback.resume()
             if self.arduino and self.is_playing:
                 self.arduino.start_talking()
             return True
@@ -172,6 +259,13 @@ class AudioManager:
             print(f"❌ Error reanudando: {e}")
             return False
     
+    def set_volume(self, volume):
+        """Cambiar el volumen del canal de este manager (0.0 a 1.0)"""
+        if self.channel is None:
+            return False
+        get_audio_mixer().set_volume(self.channel, volume)
+        return True
+    
     def set_voice(self, voice_name):
         """Cambiar voz para síntesis"""
         available_voices = [
@@ -202,20 +296,9 @@ class AudioManager:
         """Verificar si se está reproduciendo audio"""
         return self.is_playing
     
-    def _cleanup_old_files(self):
-        """Limpiar archivos temporales antiguos"""
-        for file_path in self.temp_files[:]:
-            try:
-                if os.path.exists(file_path):
-                    os.unlink(file_path)
-                self.temp_files.remove(file_path)
-            except Exception:
-                pass
-    
     def cleanup(self):
         """Limpiar todos los recursos"""
         self.stop_audio()
-        self._cleanup_old_files()
         try:
             pygame.mixer.quit()
         except:
@@ -224,8 +307,10 @@ class AudioManager:
 class ArduinoAudioManager(AudioManager):
     """AudioManager con integración sincronizada de Arduino"""
     
-    def __init__(self, arduino_controller=None, voice="es-MX-JorgeNeural"):
-        super().__init__(arduino_controller)
+    PREFETCH_SEGMENTS = 2  # Frases sintetizadas por adelantado mientras suena la actual
+    
+    def __init__(self, arduino_controller=None, voice="es-MX-JorgeNeural", channel="poncho"):
+        super().__init__(arduino_controller, channel)
         self.arduino = arduino_controller
         self.is_currently_speaking = False
         self._stop_requested = False  # Nueva bandera para controlar paradas
@@ -267,18 +352,21 @@ class ArduinoAudioManager(AudioManager):
                 print("🤖 Arduino: STOP ignorado (ya en STOP)")
     
     def speak_text(self, text):
-        """Hablar en thread separado pero con sincronización correcta"""
+        """Hablar en thread separado pero con sincronización correcta (devuelve el hilo que habla)"""
         if not text:
-            return
+            return None
         
         # Detener audio anterior si existe - SIN enviar STOP al Arduino
         if self.is_currently_speaking:
             self._stop_requested = True  # Marcar que se solicitó parada
             self._stop_audio_silent()  # Parada silenciosa sin STOP al Arduino
-            time.sleep(0.2)
+            # El hilo anterior sale en cuanto se resuelve su reproducción
+            if self.current_thread and self.current_thread is not threading.current_thread():
+                self.current_thread.join(timeout=1)
         
         # Resetear banderas
         self._stop_requested = False
+        self._stop_event.clear()
         self.is_currently_speaking = True
         self.is_playing = True
         
@@ -288,12 +376,14 @@ class ArduinoAudioManager(AudioManager):
         self._send_arduino_talk()
         
         # Crear thread para el audio
-        self.current_thread = threading.Thread(
+        thread = threading.Thread(
             target=self._speak_thread_sync,
             args=(text,),
             daemon=True
         )
-        self.current_thread.start()
+        self.current_thread = thread
+        thread.start()
+        return thread
     
     def _speak_thread_sync(self, text):
         """Thread que maneja el audio con sincronización perfecta"""
@@ -303,32 +393,37 @@ class ArduinoAudioManager(AudioManager):
             from response_handler import ResponseHandler
             clean_text = ResponseHandler.clean_text(text)
             
-            if HAS_EDGE_TTS:
-                # Crear y reproducir audio
-                audio_file = self._create_audio_sync(clean_text)
+            router = get_tts_router()
+            if router.available():
+                segmentos = ResponseHandler.split_sentences(clean_text)
+                audio = None
+                resultado = None
+                if len(segmentos) > 1:
+                    # Varias frases: sintetizar la siguiente mientras suena la actual
+                    resultado = self._play_pipelined(segmentos)
+                else:
+                    # Audio ya cacheado: reproducir directo; si no, sintetizar en streaming
+                    audio = get_tts_cache().get_bytes(clean_text, self.voice, TTS_PARAMS)
+                    if audio is None and not self._stop_requested and router.can_stream():
+                        resultado = self._play_streaming(clean_text)
+                    if audio is None and resultado is None and not self._stop_requested:
+                        # Motor sin streaming, o el streaming falló antes de sonar: sintetizar completo
+                        audio = self._create_audio_sync(clean_text)
                 
-                if audio_file and not self._stop_requested:
-                    pygame.mixer.music.load(audio_file)
-                    pygame.mixer.music.play()
-                    
+                if resultado is not None:
+                    audio_completed_naturally = resultado and not self._stop_requested
+                elif audio and not self._stop_requested:
                     print("🔊 Audio iniciado, esperando a que termine...")
                     
                     # Esperar hasta que termine completamente O se solicite parada
-                    while pygame.mixer.music.get_busy() and self.is_playing and not self._stop_requested:
-                        time.sleep(0.1)
+                    terminado = self._play_and_wait(audio, clean_text)
                     
                     # Verificar si terminó naturalmente
-                    if not self._stop_requested and not pygame.mixer.music.get_busy():
+                    if terminado and not self._stop_requested:
                         audio_completed_naturally = True
                         print("🔊 Audio terminó naturalmente")
                     elif self._stop_requested:
                         print("🔊 Audio detenido por solicitud externa")
-                    
-                    # Limpiar archivo
-                    try:
-                        os.unlink(audio_file)
-                    except:
-                        pass
                 else:
                     if self._stop_requested:
                         print("🔊 Creación de audio cancelada por stop request")
@@ -337,10 +432,8 @@ class ArduinoAudioManager(AudioManager):
                     duration = len(clean_text) * 0.1
                     print(f"🔊 Simulando audio por {duration:.1f} segundos...")
                     
-                    # Simular duración pero verificar stop_requested
-                    start_time = time.time()
-                    while (time.time() - start_time) < duration and not self._stop_requested:
-                        time.sleep(0.1)
+                    # Simular duración; una parada corta la espera en el acto
+                    self._stop_event.wait(duration)
                     
                     if not self._stop_requested:
                         audio_completed_naturally = True
@@ -350,9 +443,7 @@ class ArduinoAudioManager(AudioManager):
                 print(f"🗣️ [TEXTO]: {clean_text}")
                 print(f"🔊 Simulando habla por {duration:.1f} segundos...")
                 
-                start_time = time.time()
-                while (time.time() - start_time) < duration and not self._stop_requested:
-                    time.sleep(0.1)
+                self._stop_event.wait(duration)
                 
                 if not self._stop_requested:
                     audio_completed_naturally = True
@@ -363,7 +454,8 @@ class ArduinoAudioManager(AudioManager):
         finally:
             # SOLO enviar STOP si el audio terminó naturalmente
             # NO enviar si fue interrumpido por stop_audio()
-            if audio_completed_naturally and not self._stop_requested:
+            completado = audio_completed_naturally and not self._stop_requested
+            if completado:
                 print("🔊 Finalizando audio (terminación natural)...")
                 self._send_arduino_stop()
             elif self._stop_requested:
@@ -373,6 +465,8 @@ class ArduinoAudioManager(AudioManager):
             self.is_playing = False
             self._stop_requested = False
             print("✅ Audio finalizado completamente")
+            if completado:
+                self._notify_finished()
     
     def start_thinking_mode(self):
         """Activar modo THINKING para cuando se esté procesando una respuesta"""
@@ -388,47 +482,158 @@ class ArduinoAudioManager(AudioManager):
             # 2. Procesar respuesta (función personalizada)
             response = process_function(*args, **kwargs)
             
-            # 3. Hablar la respuesta (cambia automáticamente a TALK)
+            # 3. Hablar la respuesta por la cola de habla (cambia automáticamente a TALK)
             if response:
-                self.speak_text(response)
+                self.say(response)
             
             return response
-            
+        
         except Exception as e:
             print(f"❌ Error en process_and_speak: {e}")
             self._send_arduino_stop()
             return f"Error procesando respuesta: {e}"
     
     def _create_audio_sync(self, text):
-        """Crear archivo de audio de forma sincronizada"""
-        if not HAS_EDGE_TTS:
+        """Crear audio de forma sincronizada (bytes MP3 o WAV)"""
+        try:
+            # Audio cacheado, o síntesis con failover entre motores
+            return get_tts_router().synthesize(text, self.voice)
+        
+        except Exception as e:
+            print(f"❌ Error creando audio: {e}")
             return None
+    
+    def _play_streaming(self, text):
+        """Reproducir mientras Edge TTS sintetiza, segmento a segmento
+        
+        Devuelve True si terminó de sonar, False si se detuvo, o None si
+        falló antes de que sonara nada (para reintentar por archivo).
+        """
+        segmenter = Mp3Segmenter()
+        playback = get_audio_mixer().open(self.channel)
+        self._playback = playback
+        if not self.is_playing:
+            playback.stop()
+        # La envolvente se arma segmento a segmento, a la par del audio
+        lips = self._start_lip_sync(playback)
+        envolvente = EnvelopeBuilder() if lips else None
+        inicio = time.monotonic()
+        sintesis = None
         
+        stream = get_tts_router().stream(text, self.voice)
         try:
-            import tempfile
-            import asyncio
-            import edge_tts
-            
-            # Crear archivo temporal
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            temp_file.close()
-            
-            # Función async para generar audio
-            async def generate_audio():
-                communicate = edge_tts.Communicate(text, self.voice)
-                await communicate.save(temp_file.name)
-            
-            # Ejecutar de forma sincronizada
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(generate_audio())
-            loop.close()
-            
-            return temp_file.name
-            
+            for chunk in stream:
+                if self._stop_requested:
+                    break
+                # El motor encola cada segmento detrás del anterior, sin cortes
+                for segmento in segmenter.feed(chunk):
+                    sound = self._make_sound(segmento)
+                    if lips:
+                        lips.feed(envolvente.feed(sound))
+                    playback.append(sound)
+            else:
+                final = segmenter.flush()
+                if final:
+                    sound = self._make_sound(final)
+                    if lips:
+                        lips.feed(envolvente.feed(sound))
+                    playback.append(sound)
+                if lips:
+                    lips.feed(envolvente.flush())
+                sintesis = time.monotonic() - inicio
         except Exception as e:
-            print(f"❌ Error creando audio: {e}")
+            print(f"❌ Error en streaming de voz: {e}")
+            if playback.started_at is None:
+                playback.stop()
+                return None
+        finally:
+            stream.close()
+            if lips:
+                lips.close()
+        
+        # Esperar a que suene lo que queda (una parada resuelve la espera en el acto)
+        playback.close()
+        terminado = playback.wait()
+        if lips:
+            lips.join(1.0)
+            if sintesis is not None:
+                # El audio completo quedó en el caché: la envolvente se guarda a su lado
+                get_tts_cache().put_sidecar(text, self.voice, LIPSYNC_SUFFIX, bytes(envolvente.frames), TTS_PARAMS)
+        if playback.started_at is None:
             return None
+        if not terminado or self._stop_requested:
+            return False
+        
+        sintesis_ms = f"{sintesis * 1000:.0f} ms" if sintesis is not None else "incompleta"
+        print(f"⏱️ Primer audio en {(playback.started_at - inicio) * 1000:.0f} ms | síntesis {sintesis_ms} | "
+              f"total {(time.monotonic() - inicio) * 1000:.0f} ms ({segmenter.splitter.seconds:.1f} s de audio)")
+        return True
+    
+    def _play_pipelined(self, segmentos):
+        """Reproducir frase por frase, sintetizando las siguientes mientras suena la actual
+        
+        Devuelve True si sonaron todas, False si se detuvo a la mitad.
+        """
+        listos = queue.Queue(maxsize=self.PREFETCH_SEGMENTS)
+        cancelado = threading.Event()
+        fin = object()
+        
+        def encolar(item):
+            """Esperar lugar en la cola salvo que se cancele la reproducción"""
+            while not cancelado.is_set():
+                try:
+                    listos.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def sintetizar():
+            for segmento in segmentos:
+                if cancelado.is_set():
+                    return
+                try:
+                    audio = get_tts_router().synthesize(segmento, self.voice, verbose=False)
+                except Exception as e:
+                    print(f"❌ Error sintetizando frase: {e}")
+                    audio = None
+                if not encolar((segmento, audio)):
+                    return
+            encolar(fin)
+        
+        inicio = time.perf_counter()
+        primer_audio = None
+        sonadas = 0
+        threading.Thread(target=sintetizar, name="TTSPrefetch", daemon=True).start()
+        try:
+            while not self._stop_requested and self.is_playing:
+                try:
+                    item = listos.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is fin:
+                    break
+                segmento, audio = item
+                if not audio:
+                    continue  # Frase que no se pudo sintetizar: seguir con la próxima
+                
+                if primer_audio is None:
+                    primer_audio = time.perf_counter() - inicio
+                if not self._play_and_wait(audio, segmento):
+                    break
+                sonadas += 1
+        finally:
+            # Cancelar las frases pendientes (el hilo de síntesis deja de encolar)
+            cancelado.set()
+        
+        if primer_audio is not None:
+            print(f"⏱️ Primer audio en {primer_audio * 1000:.0f} ms | {sonadas}/{len(segmentos)} frases | "
+                  f"total {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return not self._stop_requested
+    
+    def _cut_speech(self):
+        """Cortar sin STOP al Arduino: la respuesta urgente sigue con la boca en TALK"""
+        self._stop_audio_silent()
     
     def _stop_audio_silent(self):
         """Detener audio SIN enviar comando STOP al Arduino"""
@@ -438,10 +643,12 @@ class ArduinoAudioManager(AudioManager):
         self._stop_requested = True
         self.is_playing = False
         self.is_currently_speaking = False
+        self._stop_event.set()
         
         try:
-            pygame.mixer.music.stop()
-            print("🔊 pygame.mixer.music.stop() ejecutado (silencioso)")
+            if self._playback:
+                self._playback.stop()
+            print("🔊 Reproducción detenida (silencioso)")
         except:
             pass
         
@@ -455,10 +662,12 @@ class ArduinoAudioManager(AudioManager):
         self._stop_requested = True
         self.is_playing = False
         self.is_currently_speaking = False
+        self._stop_event.set()
         
         try:
-            pygame.mixer.music.stop()
-            print("🔊 pygame.mixer.music.stop() ejecutado")
+            if self._playback:
+                self._playback.stop()
+            print("🔊 Reproducción detenida")
         except:
             pass
         
@@ -468,7 +677,8 @@ class ArduinoAudioManager(AudioManager):
     def pause_audio(self):
         """Pausar audio y animación"""
         try:
-            pygame.mixer.music.pause()
+            if self._playback:
+                self._playback.pause()
             # Pausar también la animación de Arduino
             self._send_arduino_stop()
             return True
@@ -479,7 +689,8 @@ class ArduinoAudioManager(AudioManager):
     def resume_audio(self):
         """Reanudar audio y animación"""
         try:
-            pygame.mixer.music.unpause()
+            if self._playback:
+                self._playback.resume()
             # Reanudar animación si estaba hablando
             if self.is_currently_speaking:
                 self._send_arduino_talk()
@@ -527,7 +738,7 @@ class AudioListener:
                 self.recognizer.adjust_for_ambient_noise(source, duration=1)
             
             print("✅ Dispositivo de audio configurado")
-            
+        
         except Exception as e:
             print(f"❌ Error configurando micrófono: {e}")
             self.microphone = None
@@ -537,7 +748,7 @@ class AudioListener:
         try:
             devices = sr.Microphone.list_microphone_names()
             for i, device_name in enumerate(devices):
-                if any(keyword in device_name.lower() for keyword in 
+                if any(keyword in device_name.lower() for keyword in
                       ['stereo mix', 'mezcla estéreo', 'what u hear', 'loopback']):
                     return i
         except:
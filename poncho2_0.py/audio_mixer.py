@@ -0,0 +1,160 @@
+import threading
+import pygame
+from playback_engine import get_playback_engine
+
+# Nombre del canal de canciones (usa el stream de música de pygame)
+MUSIC_CHANNEL = "musica"
+
+class AudioMixer:
+    """Un canal de pygame reservado por robot, más el de música, con volumen propio y ducking
+    
+    Cada robot suena en su canal, así que un regalo que llega a mitad de
+    frase ya no corta a Poncho: suenan a la vez y, mientras habla el robot
+    de regalos, Poncho y la música bajan de volumen y después vuelven.
+    """
+    
+    # Canales de voz: se reservan en este orden (pygame.mixer.set_reserved)
+    VOICE_CHANNELS = ("poncho", "regalo")
+    DEFAULT_VOLUMES = {"poncho": 1.0, "regalo": 1.0, MUSIC_CHANNEL: 0.8}
+    # Mientras suena el canal clave, los otros se multiplican por su factor
+    DUCKING = {"regalo": {"poncho": 0.4, MUSIC_CHANNEL: 0.3}}
+    
+    def __init__(self):
+        self.volumes = dict(self.DEFAULT_VOLUMES)
+        self._channels = None  # nombre -> pygame.mixer.Channel, al primer uso
+        self._playbacks = {}  # nombre -> reproducciones en curso
+        self._lock = threading.Lock()
+        self.ducked = 0  # Veces que se bajó el volumen a otros canales
+    
+    def _channel(self, name):
+        """Canal reservado de ese robot (None = cualquier canal libre)"""
+        if name not in self.VOICE_CHANNELS:
+            return None
+        with self._lock:
+            if self._channels is None:
+                # Reservados: Sound.play() de otros nunca los toma
+                pygame.mixer.set_reserved(len(self.VOICE_CHANNELS))
+                self._channels = {n: pygame.mixer.Channel(i) for i, n in enumerate(self.VOICE_CHANNELS)}
+            return self._channels[name]
+    
+    def open(self, name):
+        """Reproducción por partes en el canal de ese robot"""
+        channel = self._channel(name)
+        if channel is not None:
+            # Un canal suena una cosa a la vez: lo anterior de ese robot se corta
+            with self._lock:
+                anteriores = list(self._playbacks.get(name, ()))
+            for playback in anteriores:
+                playback.stop()
+        playback = get_playback_engine().open(channel)
+        self._track(name, playback)
+        return playback
+    
+    def play(self, name, sound):
+        """Reproducir un sonido en el canal de ese robot"""
+        playback = self.open(name)
+        playback.append(sound)
+        playback.close()
+        return playback
+    
+    def play_music(self, source, length=None):
+        """Reproducir una canción por el canal de música"""
+        with self._lock:
+            anteriores = list(self._playbacks.get(MUSIC_CHANNEL, ()))
+        for playback in anteriores:
+            playback.stop()
+        playback = get_playback_engine().play_music(source, length)
+        self._track(MUSIC_CHANNEL, playback)
+        return playback
+    
+    def _track(self, name, playback):
+        """Seguir la reproducción para aplicar volumen y ducking mientras dure"""
+        if name is None:
+            return
+        with self._lock:
+            duck = name in self.DUCKING and not self._playbacks.get(name)
+            self._playbacks.setdefault(name, set()).add(playback)
+            if duck:
+                self.ducked += 1
+        # Antes de que suene la primera parte, para que arranque ya con su volumen
+        playback.set_volume(self.effective_volume(name))
+        if duck:
+            self._apply()
+        playback.future.add_done_callback(lambda _: self._release(name, playback))
+    
+    def _release(self, name, playback):
+        with self._lock:
+            activas = self._playbacks.get(name, set())
+            activas.discard(playback)
+            restaurar = name in self.DUCKING and not activas
+        if restaurar:
+            self._apply()
+    
+    def effective_volume(self, name):
+        """Volumen del canal con el ducking de los que están sonando"""
+        with self._lock:
+            volume = self.volumes.get(name, 1.0)
+            for speaker, factores in self.DUCKING.items():
+                if speaker != name and name in factores and self._playbacks.get(speaker):
+                    volume *= factores[name]
+            return volume
+    
+    def _apply(self):
+        """Aplicar el volumen efectivo a todo lo que está sonando"""
+        with self._lock:
+            sonando = [(name, list(playbacks)) for name, playbacks in self._playbacks.items() if playbacks]
+        # Fuera del lock: el motor avisa los finales con su propio lock tomado
+        for name, playbacks in sonando:
+            volume = self.effective_volume(name)
+            for playback in playbacks:
+                playback.set_volume(volume)
+    
+    def set_volume(self, name, volume):
+        """Cambiar el volumen de un canal (0.0 a 1.0)"""
+        with self._lock:
+            self.volumes[name] = max(0.0, min(1.0, float(volume)))
+        self._apply()
+    
+    def is_active(self, name):
+        with self._lock:
+            return bool(self._playbacks.get(name))
+    
+    def get_stats(self):
+        """Volúmenes y canales sonando"""
+        with self._lock:
+            activos = [name for name, playbacks in self._playbacks.items() if playbacks]
+        return {
+            'volumes': dict(self.volumes),
+            'active': activos,
+            'effective': {name: round(self.effective_volume(name), 2) for name in self.volumes},
+            'ducked': self.ducked
+        }
+
+_mixer = None
+_mixer_lock = threading.Lock()
+
+def get_audio_mixer():
+    """Obtener el mixer compartido por todos los robots"""
+    global _mixer
+    with _mixer_lock:
+        if _mixer is None:
+            _mixer = AudioMixer()
+        return _mixer
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import time
+    
+    pygame.mixer.init()
+    frecuencia, bits, canales = pygame.mixer.get_init()
+    # Un segundo de silencio
+    sonido = pygame.mixer.Sound(buffer=bytes(frecuencia * abs(bits) // 8 * canales))
+    
+    mixer = get_audio_mixer()
+    poncho = mixer.play("poncho", sonido)
+    time.sleep(0.3)
+    regalo = mixer.play("regalo", sonido)
+    print(f"🎚️ Con el robot de regalos hablando: {mixer.get_stats()}")
+    regalo.wait()
+    print(f"🎚️ Poncho sigue sonando: {not poncho.done()} | {mixer.get_stats()['effective']}")
+    poncho.wait()
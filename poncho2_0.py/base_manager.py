@@ -1,45 +1,336 @@
+import copy
+import heapq
 import json
 import os
-import random
+import threading
+import time
 from abc import ABC, abstractmethod
+from types import MappingProxyType
+from content_sampler import ContentSampler, NO_REPEAT_WINDOW
+from heavy_hitters import SpaceSaving
+from persistence import (atomic_write_text, get_flusher, EventJournal,
+                         JOURNAL_COMPACT_SECONDS, JOURNAL_COMPACT_RECORDS)
 
 class BaseManager(ABC):
     """Clase base para todos los managers con funcionalidad común"""
     
-    def __init__(self, data_file=None):
+    # Los managers con estadísticas que cambian mucho pueden activar el journal
+    JOURNAL_MODE = False
+    
+    # Tablas por usuario que van al storage externo si se pasa uno: clave -> "counter" | "record"
+    USER_TABLES = {}
+    
+    # Contadores que solo se leen como top-N: clave -> capacidad K (Space-Saving).
+    # Error máximo por contador: total/K; para lógica o mostrar un valor usar get_guaranteed_counter().
+    # Si la clave está en USER_TABLES y hay storage (SQLite en main_refactored), manda el storage:
+    # ahí el contador es exacto y sin límite de claves, la cota top-K no aplica.
+    TOP_K_TABLES = {}
+    
+    # Listas que se eligen por peso en vez de shuffle bag: clave -> campo del item
+    WEIGHTED_KEYS = {}
+    # Pesos para campos no numéricos: campo -> {valor: peso}
+    WEIGHT_MAPS = {}
+    NO_REPEAT_WINDOW = NO_REPEAT_WINDOW
+    
+    def __init__(self, data_file=None, journal=None, storage=None):
         self.data_file = data_file
         self.data = {}
+        self.storage = storage
+        self._tables = {}
+        self._heavy = {}
+        self.sampler = ContentSampler(self.NO_REPEAT_WINDOW)
+        self._lock = threading.RLock()  # Serializa mutaciones y volcados
+        self._flush_lock = threading.Lock()
+        self._dirty = False
+        
+        # Copy-on-write: los lectores usan un snapshot inmutable; las claves que
+        # comparte con self.data se copian antes de la primera escritura
+        self._snapshot = None
+        self._published = None  # Último dict publicado (base del siguiente snapshot)
+        self._frozen_keys = set()
+        self._changed_keys = set()  # Claves escritas desde el último snapshot
+        
+        # Journal opcional: cada cambio se agrega a <data_file>.journal
+        usar_journal = self.JOURNAL_MODE if journal is None else journal
+        self._journal = EventJournal(f"{data_file}.journal") if (data_file and usar_journal) else None
+        self._last_compaction = time.time()
+        
         print(f"🔧 Inicializando {self.__class__.__name__}")
+        if storage is not None:
+            self._attach_user_tables()
         if data_file:
             self.load_data()
         else:
             self._create_default_data()
     
     def load_data(self):
-        """Cargar datos desde archivo JSON"""
+        """Cargar datos desde archivo JSON (y reaplicar el journal si existe)"""
+        snapshot_seq = 0
         try:
             if os.path.exists(self.data_file):
                 with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
+                    datos = json.load(f)
+                snapshot_seq = datos.pop("_journal_seq", 0)
+                with self._lock:
+                    self.data = datos
+                    self._data_replaced()
                 print(f"✅ Datos cargados desde {self.data_file}")
             else:
                 print(f"📄 Creando archivo nuevo: {self.data_file}")
-                self._create_default_data()
+                with self._lock:
+                    self._create_default_data()
+                    self._data_replaced()
                 self.save_data()
+                self.flush()
         except Exception as e:
             print(f"❌ Error cargando datos: {e}")
-            self._create_default_data()
+            with self._lock:
+                self._create_default_data()
+                self._data_replaced()
+        
+        if self._journal:
+            self._replay_journal(snapshot_seq)
+        self._migrate_user_tables()
+        self._bind_heavy_hitters()
+        self._compile_sampler()
+    
+    def get_snapshot(self):
+        """Vista de solo lectura de los datos, consistente y segura entre hilos
+        
+        Se reutiliza mientras no haya escrituras; publicar uno nuevo parte del
+        anterior y solo congela las claves escritas desde entonces, así las
+        demás no se vuelven a copiar en la próxima escritura.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    if self._published is None:
+                        publicado = dict(self.data)
+                        self._frozen_keys = set(self.data)
+                    else:
+                        publicado = dict(self._published)
+                        for key in self._changed_keys:
+                            if key in self.data:
+                                publicado[key] = self.data[key]
+                                self._frozen_keys.add(key)
+                            else:
+                                publicado.pop(key, None)
+                    self._changed_keys.clear()
+                    self._published = publicado
+                    snapshot = MappingProxyType(publicado)
+                    self._snapshot = snapshot
+        return snapshot
+    
+    def _cow(self, key):
+        """Copiar el valor de una clave antes de mutarlo si un snapshot lo comparte"""
+        if key in self._frozen_keys:
+            self._frozen_keys.discard(key)
+            valor = self.data.get(key)
+            if isinstance(valor, dict) and not any(isinstance(v, (dict, list)) for v in valor.values()):
+                self.data[key] = dict(valor)  # Contadores planos: alcanza con copia superficial
+            elif key in self.data:
+                self.data[key] = copy.deepcopy(valor)
+        self._changed_keys.add(key)
+        self._snapshot = None
+    
+    def _data_replaced(self):
+        """Invalidar snapshot tras reemplazar self.data por objetos nuevos"""
+        self._frozen_keys = set()
+        self._changed_keys = set()
+        self._published = None
+        self._snapshot = None
+    
+    def _heavy_for(self, key):
+        """Estructura Space-Saving de una clave top-K (None si no es top-K)"""
+        capacidad = self.TOP_K_TABLES.get(key)
+        if not capacidad or key in self._tables:
+            return None
+        self._cow(key)
+        self._cow("_top_k")
+        contadores = self.data.setdefault(key, {})
+        meta = self.data.setdefault("_top_k", {}).setdefault(key, {})
+        hh = self._heavy.get(key)
+        if hh is not None and (hh.counts is not contadores or hh.meta is not meta):
+            # Solo cambió el objeto por el copy-on-write: mismos valores, el heap sigue valiendo
+            hh.rebind(contadores, meta)
+        elif hh is None:
+            hh = SpaceSaving(capacidad, contadores, meta)
+            self._heavy[key] = hh
+            if hh.trimmed:
+                print(f"✂️ '{key}' recortado a top-{capacidad} ({hh.trimmed} entradas descartadas)")
+                self._dirty = True
+        return hh
+    
+    def _bind_heavy_hitters(self):
+        """Enlazar (y recortar si hace falta) los contadores top-K recién cargados"""
+        with self._lock:
+            self._heavy.clear()
+            for key in self.TOP_K_TABLES:
+                self._heavy_for(key)
+        if self._dirty:
+            self.save_data()
+    
+    def _compile_sampler(self):
+        """Compilar bolsas y tablas de muestreo para las listas cargadas"""
+        self.sampler.reset()
+        for key, value in self.get_snapshot().items():
+            if isinstance(value, list) and value:
+                if key in self.WEIGHTED_KEYS:
+                    self.sampler.compile(key, value, lambda item, k=key: self._item_weight(k, item))
+                else:
+                    self.sampler.compile(key, value)
+    
+    def _item_weight(self, key, item):
+        """Peso de un item según WEIGHTED_KEYS / WEIGHT_MAPS"""
+        campo = self.WEIGHTED_KEYS.get(key)
+        if not campo or not isinstance(item, dict):
+            return 1
+        valor = item.get(campo, 1)
+        if isinstance(valor, (int, float)):
+            return valor
+        return self.WEIGHT_MAPS.get(campo, {}).get(valor, 1)
+    
+    def _attach_user_tables(self):
+        """Crear las tablas de USER_TABLES en el storage externo"""
+        espacio = os.path.basename(self.data_file) if self.data_file else self.__class__.__name__
+        for key, kind in self.USER_TABLES.items():
+            if kind == "record":
+                self._tables[key] = self.storage.record_table(espacio, key)
+            else:
+                self._tables[key] = self.storage.counter_table(espacio, key)
+    
+    def _migrate_user_tables(self):
+        """Mover al storage las tablas por usuario que aún estén en el JSON"""
+        migradas = False
+        for key, tabla in self._tables.items():
+            if key not in self.data:
+                continue
+            with self._lock:
+                valores = self.data.pop(key)
+                self._data_replaced()
+            migradas = True
+            if isinstance(valores, dict) and valores:
+                try:
+                    tabla.import_dict(valores)
+                    print(f"🗄️ {len(valores)} entradas de '{key}' migradas al storage")
+                except Exception as e:
+                    print(f"❌ Error migrando '{key}': {e}")
+                    with self._lock:
+                        self.data[key] = valores
+                        self._data_replaced()
+                    migradas = False
+        if migradas:
+            self.save_data()
+    
+    def _replay_journal(self, snapshot_seq):
+        """Reaplicar sobre el snapshot los cambios del journal posteriores a él"""
+        try:
+            records = self._journal.read_records(after_seq=snapshot_seq)
+            with self._lock:
+                for record in records:
+                    self._apply_change(record)
+            if records:
+                print(f"📜 {len(records)} cambios recuperados del journal de {self.data_file}")
+                get_flusher().register(self)
+        except Exception as e:
+            print(f"❌ Error leyendo journal: {e}")
     
     def save_data(self):
-        """Guardar datos en archivo JSON"""
+        """Marcar datos como modificados; el flusher en segundo plano los escribe"""
         if not self.data_file:
             return
-        try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-            print(f"💾 Datos guardados en {self.data_file}")
-        except Exception as e:
-            print(f"❌ Error guardando datos: {e}")
+        self._dirty = True
+        get_flusher().register(self)
+    
+    def _needs_snapshot(self, force):
+        """Decidir si hay que reescribir el snapshot JSON"""
+        if self._dirty:
+            return True
+        if not self._journal or not self._journal.pending:
+            return False
+        if force:
+            return True
+        return (self._journal.pending >= JOURNAL_COMPACT_RECORDS or
+                time.time() - self._last_compaction >= JOURNAL_COMPACT_SECONDS)
+    
+    def flush(self, force=True):
+        """Escribir ya los cambios pendientes en una sola escritura atómica
+        
+        Con journal activo esto además compacta el journal en el snapshot.
+        El flusher en segundo plano llama con force=False, y entonces el
+        journal solo se compacta según JOURNAL_COMPACT_SECONDS/RECORDS.
+        """
+        if not self.data_file:
+            return False
+        
+        with self._flush_lock:
+            with self._lock:
+                if not self._needs_snapshot(force):
+                    return False
+                snapshot = dict(self.get_snapshot())
+                if self._journal:
+                    snapshot["_journal_seq"] = self._journal.seq
+                    self._journal.rotate()
+                self._dirty = False
+            
+            try:
+                # Serializar fuera del lock: los escritores siguen sobre sus copias
+                payload = json.dumps(snapshot, ensure_ascii=False, indent=2)
+                atomic_write_text(self.data_file, payload)
+                if self._journal:
+                    self._journal.discard_rotated()
+                    self._last_compaction = time.time()
+                print(f"💾 Datos guardados en {self.data_file}")
+                return True
+            except Exception as e:
+                print(f"❌ Error guardando datos: {e}")
+                self._dirty = True
+                return False
+    
+    def _apply_change(self, change):
+        """Aplicar un cambio elemental a self.data (llamar con el lock tomado)"""
+        op = change["op"]
+        key = change["key"]
+        self._cow(key)
+        
+        if op == "incr":
+            hh = self._heavy_for(key)
+            if hh:
+                return hh.incr(change["sub"], change.get("n", 1))
+            contadores = self.data.setdefault(key, {})
+            valor = contadores.get(change["sub"], 0) + change.get("n", 1)
+            contadores[change["sub"]] = valor
+            return valor
+        if op == "append":
+            self.data.setdefault(key, []).append(change["item"])
+        elif op == "set":
+            self.data.setdefault(key, {})[change["sub"]] = change["value"]
+        elif op == "put":
+            self.data[key] = change["value"]
+            if key in self.TOP_K_TABLES:
+                self._cow("_top_k")
+                self.data.get("_top_k", {}).pop(key, None)
+                self._heavy.pop(key, None)
+        return None
+    
+    def _record_change(self, change):
+        """Aplicar un cambio y persistirlo (journal O(1) o snapshot diferido)"""
+        with self._lock:
+            resultado = self._apply_change(change)
+            if self._journal:
+                try:
+                    self._journal.append(change)
+                except Exception as e:
+                    print(f"❌ Error escribiendo journal: {e}")
+                    self._dirty = True
+        
+        if self._journal:
+            get_flusher().register(self)
+        else:
+            self.save_data()
+        return resultado
     
     @abstractmethod
     def _create_default_data(self):
@@ -47,51 +338,135 @@ class BaseManager(ABC):
         pass
     
     def get_random_choice(self, key):
-        """Obtener elección aleatoria de una lista"""
+        """Obtener elección aleatoria de una lista (sin repetir las recientes)"""
         items = self.data.get(key, [])
-        return random.choice(items) if items else None
+        if key in self.WEIGHTED_KEYS:
+            return self.sampler.weighted_choice(key, items, lambda item: self._item_weight(key, item))
+        return self.sampler.choice(key, items)
+    
+    def choice_from(self, bag_key, items):
+        """Elegir de una lista derivada (p. ej. filtrada por categoría) sin repetir"""
+        return self.sampler.choice(bag_key, items)
+    
+    def get_top_items(self, key, limit=5):
+        """Items de mayor peso de una lista (ranking incremental)"""
+        return self.sampler.top(key, self.data.get(key, []), lambda item: self._item_weight(key, item), limit)
     
     def add_item_to_list(self, key, item):
         """Agregar item a una lista"""
-        if key not in self.data:
-            self.data[key] = []
-        self.data[key].append(item)
-        self.save_data()
+        self._record_change({"op": "append", "key": key, "item": item})
     
-    def increment_counter(self, key, subkey):
+    def increment_counter(self, key, subkey, amount=1):
         """Incrementar contador anidado"""
-        if key not in self.data:
-            self.data[key] = {}
-        self.data[key][subkey] = self.data[key].get(subkey, 0) + 1
-        self.save_data()
-        return self.data[key][subkey]
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.incr(subkey, amount)
+        return self._record_change({"op": "incr", "key": key, "sub": subkey, "n": amount})
+    
+    def set_item(self, key, subkey, value):
+        """Guardar un valor dentro de un diccionario anidado"""
+        tabla = self._tables.get(key)
+        if tabla:
+            tabla.put(subkey, value)
+            return
+        self._record_change({"op": "set", "key": key, "sub": subkey, "value": value})
+    
+    def set_value(self, key, value):
+        """Reemplazar el valor completo de una clave"""
+        tabla = self._tables.get(key)
+        if tabla:
+            tabla.clear()
+            if value:
+                tabla.import_dict(value)
+            return
+        self._record_change({"op": "put", "key": key, "value": value})
     
     def get_counter(self, key, subkey):
         """Obtener valor de contador"""
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.get(subkey, 0)
         return self.data.get(key, {}).get(subkey, 0)
     
+    def get_guaranteed_counter(self, key, subkey):
+        """Valor mínimo seguro de un contador (exacto salvo en tablas top-K)"""
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.get(subkey, 0)
+        valor = self.data.get(key, {}).get(subkey, 0)
+        if key in self.TOP_K_TABLES:
+            # Lo heredado al desalojar otra clave no cuenta (mismo cálculo que SpaceSaving.guaranteed)
+            valor -= self.data.get("_top_k", {}).get(key, {}).get("errores", {}).get(subkey, 0)
+        return valor
+    
+    def get_item(self, key, subkey, default=None):
+        """Obtener un valor de un diccionario anidado"""
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.get(subkey, default)
+        return self.data.get(key, {}).get(subkey, default)
+    
+    def top_counters(self, key, limit=10):
+        """Top-N de un diccionario de contadores como lista de (clave, valor)"""
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.top(limit)
+        return heapq.nlargest(limit, self.get_snapshot().get(key, {}).items(), key=lambda x: x[1])
+    
+    def count_entries(self, key):
+        """Número de entradas de un diccionario"""
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.count()
+        return len(self.data.get(key, {}))
+    
+    def sum_counters(self, key):
+        """Suma de todos los contadores de un diccionario"""
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.total()
+        hh = self._heavy.get(key)
+        if hh and hh.counts is self.data.get(key):
+            return hh.total()
+        return sum(self.get_snapshot().get(key, {}).values())
+    
     def get_stats(self):
         """Estadísticas básicas"""
         stats = f"📊 Estadísticas de {self.__class__.__name__}:\n"
-        for key, value in self.data.items():
+        for key, value in self.get_snapshot().items():
+            if key.startswith("_"):
+                continue
             if isinstance(value, list):
                 stats += f"  {key}: {len(value)} elementos\n"
             elif isinstance(value, dict):
                 stats += f"  {key}: {len(value)} entradas\n"
             else:
                 stats += f"  {key}: {value}\n"
+        for key, tabla in self._tables.items():
+            stats += f"  {key}: {tabla.count()} entradas (storage)\n"
+        for key, hh in self._heavy.items():
+            stats += f"  {key}: top-{hh.capacity}, error máx. ±{hh.error_bound():.0f}\n"
         return stats
     
     def reset_data(self):
         """Resetear datos a valores por defecto"""
-        self._create_default_data()
+        with self._lock:
+            self._create_default_data()
+            self._data_replaced()
+        for tabla in self._tables.values():
+            tabla.clear()
+        self._migrate_user_tables()
         self.save_data()
     
     def reload_data(self):
-        """Recargar datos desde archivo"""
+        """Recargar datos desde archivo (volcando antes los cambios pendientes)"""
         if self.data_file:
+            self.flush()
             self.load_data()
     
     def has_data(self, key):
         """Verificar si existe una clave en los datos"""
-        return key in self.data and bool(self.data[key])
\ No newline at end of file
+        tabla = self._tables.get(key)
+        if tabla:
+            return tabla.count() > 0
+        return key in self.data and bool(self.data[key])
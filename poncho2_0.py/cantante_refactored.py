@@ -1,20 +1,31 @@
 import os
 import random
 from base_manager import BaseManager
-from response_handler import ResponseHandler
+from response_handler import ResponseHandler, NormalizedComment
+from intent_matcher import get_intent_matcher
+from fuzzy_index import FuzzyIndex, TokenIndex, normalize
 from audio_manager import AudioManager
+from audio_mixer import MUSIC_CHANNEL
 
 class CantanteManager(BaseManager, AudioManager):
     """Manager cantante refactorizado usando BaseManager y AudioManager"""
     
     def __init__(self, music_folder="musica", arduino_controller=None, cantante_file="cantante.json"):
         BaseManager.__init__(self, cantante_file)
-        AudioManager.__init__(self, arduino_controller)
+        AudioManager.__init__(self, arduino_controller, channel=MUSIC_CHANNEL)
+        
+        # Volumen de las canciones según la configuración (0 a 100)
+        self.set_volume(self.data.get("configuracion", {}).get("volumen", 80) / 100)
         
         self.music_folder = music_folder
         self.playlist = []
         self.current_song = None
         
+        # Índices de búsqueda por archivo: nombre completo (aproximado) y palabras
+        self._songs_by_file = {}
+        self._name_index = FuzzyIndex(max_ratio=0.3)
+        self._word_index = TokenIndex()
+        
         self.load_music_files()
         print(f"🎵 Cantante Manager inicializado con {len(self.playlist)} canciones")
     
@@ -44,18 +55,21 @@ class CantanteManager(BaseManager, AudioManager):
                 return
             
             supported_formats = ['.mp3', '.wav', '.ogg']
-            self.playlist = []
+            songs = {}
             
             for filename in os.listdir(self.music_folder):
                 if any(filename.lower().endswith(fmt) for fmt in supported_formats):
                     full_path = os.path.join(self.music_folder, filename)
                     song_name = os.path.splitext(filename)[0]
-                    self.playlist.append({
+                    songs[full_path] = {
                         'nombre': song_name,
                         'archivo': full_path,
                         'formato': os.path.splitext(filename)[1],
                         'reproducciones': self.get_counter("reproducciones", song_name)
-                    })
+                    }
+            
+            self._update_song_index(songs)
+            self.playlist = list(songs.values())
             
             print(f"🎵 Cargadas {len(self.playlist)} canciones")
             for song in self.playlist[:5]:  # Mostrar solo las primeras 5
@@ -66,8 +80,43 @@ class CantanteManager(BaseManager, AudioManager):
         
         except Exception as e:
             print(f"❌ Error cargando música: {e}")
+            self._update_song_index({})
             self.playlist = []
     
+    @staticmethod
+    def _song_title(name):
+        """Título buscable a partir del nombre de archivo ("Las_Mananitas" -> "Las Mananitas")"""
+        return name.replace("_", " ").replace("-", " ")
+    
+    def _update_song_index(self, songs):
+        """Actualizar los índices solo con los archivos agregados o quitados"""
+        for archivo in self._songs_by_file.keys() - songs.keys():
+            self._name_index.remove(archivo)
+            self._word_index.remove(archivo)
+        
+        for archivo in songs.keys() - self._songs_by_file.keys():
+            title = self._song_title(songs[archivo]['nombre'])
+            self._name_index.add(archivo, title)
+            self._word_index.add(archivo, title)
+        
+        self._songs_by_file = songs
+    
+    def _rank_songs(self, text, prefix=True):
+        """Canciones ordenadas por relevancia: nombre casi exacto, luego palabras en común"""
+        query = normalize(self._song_title(text))
+        ranking = [archivo for _, archivo in self._name_index.search(query, normalized=True)]
+        for archivo in self._name_index.exact(query, normalized=True):
+            if archivo in ranking:
+                ranking.remove(archivo)
+            ranking.insert(0, archivo)
+        
+        vistos = set(ranking)
+        for _, archivo in self._word_index.search(query, prefix=prefix):
+            if archivo not in vistos:
+                ranking.append(archivo)
+                vistos.add(archivo)
+        return [self._songs_by_file[archivo] for archivo in ranking]
+    
     def _create_sample_playlist(self):
         """Crear archivo de instrucciones para playlist"""
         sample_info = """
@@ -83,7 +132,7 @@ class CantanteManager(BaseManager, AudioManager):
 
 Canciones sugeridas para Poncho:
 - Canciones de cumpleaños
-- Música de circo/payasos  
+- Música de circo/payasos
 - Canciones populares mexicanas
 - Música divertida o cómica
 - Canciones infantiles
@@ -99,13 +148,20 @@ NOTA: Asegúrate de que tienes derechos para usar la música
             print(f"❌ Error creando instrucciones: {e}")
     
     def get_song_by_name(self, song_name):
-        """Buscar canción por nombre usando ResponseHandler"""
-        song_name_clean = ResponseHandler.clean_text(song_name).lower()
+        """Buscar canción por nombre (exacto, con errores de tipeo o nombre parcial)"""
+        query = normalize(self._song_title(song_name))
+        if not query:
+            return None
         
-        for song in self.playlist:
-            song_name_lower = ResponseHandler.clean_text(song['nombre']).lower()
-            if song_name_clean in song_name_lower or ResponseHandler.get_similarity(song_name_clean, song_name_lower) > 0.7:
-                return song
+        archivo = self._name_index.best(query, normalized=True)
+        if archivo is not None:
+            return self._songs_by_file[archivo]
+        
+        # Nombre parcial: todas las palabras buscadas aparecen en el título
+        palabras = len(self._word_index.words(query))
+        ranking = self._word_index.search(query, prefix=True, limit=1)
+        if ranking and palabras and ranking[0][0] == palabras:
+            return self._songs_by_file[ranking[0][1]]
         return None
     
     def play_song(self, song=None):
@@ -145,16 +201,11 @@ NOTA: Asegúrate de que tienes derechos para usar la música
     
     def handle_song_request(self, comment):
         """Manejar peticiones de canciones usando ResponseHandler"""
-        comment_clean = ResponseHandler.clean_text(comment)
-        
-        # Palabras clave para peticiones
-        request_keywords = [
-            "canta", "canción", "cancion", "música", "musica", 
-            "toca", "interpreta", "tema", "play", "reproduce"
-        ]
+        comment = NormalizedComment.of(comment)
+        comment_clean = comment.clean
         
-        # Verificar si es una petición usando ResponseHandler
-        if not ResponseHandler.detect_keywords(comment_clean, request_keywords):
+        # Verificar si es una petición de canción
+        if not get_intent_matcher().matches(comment, "peticion_cancion"):
             return None
         
         # Buscar canción específica en el comentario
@@ -162,12 +213,10 @@ NOTA: Asegúrate de que tienes derechos para usar la música
         if song_found:
             return self.play_song(song_found)
         
-        # Buscar por palabras clave en nombres de canciones
-        for song in self.playlist:
-            song_words = ResponseHandler.clean_text(song['nombre']).lower().split('_')
-            for word in song_words:
-                if len(word) > 2 and word in comment_clean.lower():
-                    return self.play_song(song)
+        # Buscar por palabras del comentario en nombres de canciones
+        ranking = self._word_index.search(comment_clean, limit=1)
+        if ranking:
+            return self.play_song(self._songs_by_file[ranking[0][1]])
         
         # Si no encuentra canción específica, tocar aleatoria
         return self.play_song()
@@ -280,14 +329,8 @@ NOTA: Asegúrate de que tienes derechos para usar la música
         return stats
     
     def search_songs(self, keyword):
-        """Buscar canciones por palabra clave"""
-        keyword_clean = ResponseHandler.clean_text(keyword).lower()
-        matching_songs = []
-        
-        for song in self.playlist:
-            song_name_lower = ResponseHandler.clean_text(song['nombre']).lower()
-            if keyword_clean in song_name_lower:
-                matching_songs.append(song)
+        """Buscar canciones por palabra clave (ordenadas por relevancia)"""
+        matching_songs = self._rank_songs(keyword)
         
         if not matching_songs:
             return f"No encontré canciones con '{keyword}'. ¿Qué tal si cantas tú?"
@@ -311,7 +354,7 @@ NOTA: Asegúrate de que tienes derechos para usar la música
     
     def respond_to_music_comment(self, username, comment):
         """Responder comentarios relacionados con música"""
-        comment_clean = ResponseHandler.clean_text(comment)
+        comment_clean = NormalizedComment.of(comment)
         
         # Manejar peticiones de canciones
         song_request = self.handle_song_request(comment_clean)
@@ -319,19 +362,20 @@ NOTA: Asegúrate de que tienes derechos para usar la música
             return song_request
         
         # Comandos de control
-        if ResponseHandler.detect_keywords(comment_clean, ["para", "stop", "detener"]):
+        intents = get_intent_matcher().classify(comment_clean)
+        if "parar" in intents:
             return self.stop_song()
         
-        if ResponseHandler.detect_keywords(comment_clean, ["pausa", "pause"]):
+        if "pausa" in intents:
             return self.pause_song()
         
-        if ResponseHandler.detect_keywords(comment_clean, ["continua", "resume", "sigue"]):
+        if "continuar" in intents:
             return self.resume_song()
         
-        if ResponseHandler.detect_keywords(comment_clean, ["playlist", "lista", "canciones"]):
+        if "playlist" in intents:
             return self.get_playlist_info()
         
-        if ResponseHandler.detect_keywords(comment_clean, ["favorita", "favorite"]):
+        if "favorita" in intents:
             return self.play_favorite()
         
         # Respuesta genérica de cantante
@@ -364,6 +408,12 @@ if __name__ == "__main__":
         # Probar búsqueda
         print(f"\n🔍 Buscando 'cumpleanos':")
         print(manager.search_songs("cumpleanos"))
+        
+        import time
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            manager.get_song_by_name("cumpleanos felis")
+        print(f"⏱️ Búsqueda por nombre: {(time.perf_counter() - inicio):.3f} ms por petición")
     else:
         print("❌ No hay canciones disponibles")
         print("💡 Agrega archivos MP3/WAV/OGG a la carpeta 'musica' para probar")
@@ -1,6 +1,8 @@
 from base_manager import BaseManager
-from response_handler import ResponseHandler
-import hashlib
+from response_handler import ResponseHandler, NormalizedComment
+from intent_matcher import get_intent_matcher
+from near_duplicates import NearDuplicateTable
+from response_templates import get_template_catalog
 import time
 import random
 import threading
@@ -14,7 +16,12 @@ class ChatModeOptimizer(BaseManager):
         self.openai_client = openai_client
         self.response_cache = {}  # Cache de respuestas
         self.user_patterns = defaultdict(list)  # Patrones por usuario
-        self.repeated_questions = defaultdict(int)  # Contador de preguntas repetidas
+        config = self.data.get("configuracion", {})
+        # Contador de preguntas repetidas (agrupa paráfrasis, expira y tiene tamaño máximo)
+        self.repeated_questions = NearDuplicateTable(
+            max_entries=config.get("max_preguntas_trackeadas", 2000),
+            ttl=config.get("cache_expiry_minutes", 30) * 60
+        )
         self.batch_processing = True
         self.max_batch_size = 15  # Máximo de comentarios por lote
         self.processing_timeout = 8  # Timeout para generar respuesta
@@ -84,6 +91,7 @@ class ChatModeOptimizer(BaseManager):
             "configuracion": {
                 "max_repetitions_before_variation": 3,
                 "cache_expiry_minutes": 30,
+                "max_preguntas_trackeadas": 2000,
                 "batch_size_small": 5,
                 "batch_size_medium": 10,
                 "response_timeout_seconds": 8
@@ -117,21 +125,21 @@ class ChatModeOptimizer(BaseManager):
         """Procesar lote pequeño (1-5 comentarios) - Respuestas individuales"""
         responses = []
         
-        for username, comment, msg_type in comments_batch:
+        for username, comment, msg_type, profile in comments_batch:
             # Verificar si es pregunta repetida
-            question_hash = self._get_question_hash(comment)
-            repetition_count = self.repeated_questions[question_hash]
+            question_key = self.repeated_questions.key_for(comment)
+            repetition_count = self.repeated_questions[question_key]
             
             if repetition_count >= 3:
-                response = self._get_anti_spam_response(username, comment)
+                response = self._get_anti_spam_response(username, comment, profile)
                 responses.append(f"{username}: {response}")
                 continue
             
             # Intentar respuesta variada para preguntas comunes
-            varied_response = self._get_varied_response(username, comment, repetition_count)
+            varied_response = self._get_varied_response(username, comment, repetition_count, profile)
             if varied_response:
                 responses.append(f"{username}: {varied_response}")
-                self.repeated_questions[question_hash] += 1
+                self.repeated_questions.increment(question_key)
                 continue
             
             # Si no es pregunta repetida común, usar OpenAI con timeout
@@ -155,16 +163,17 @@ class ChatModeOptimizer(BaseManager):
         greetings = []
         others = []
         
-        for username, comment, msg_type in comments_batch:
-            comment_lower = comment.lower()
+        matcher = get_intent_matcher()
+        for username, comment, msg_type, _ in comments_batch:
+            intents = matcher.classify(comment)
             
             if self._is_question(comment):
                 questions.append((username, comment))
-            elif ResponseHandler.detect_keywords(comment_lower, ["gracioso", "genial", "me gusta"]):
+            elif "cumplido" in intents:
                 compliments.append((username, comment))
-            elif ResponseHandler.detect_keywords(comment_lower, ["malo", "aburrido", "no me gusta"]):
+            elif "insulto" in intents:
                 insults.append((username, comment))
-            elif ResponseHandler.detect_keywords(comment_lower, ["hola", "hi", "saludos"]):
+            elif "saludo" in intents:
                 greetings.append((username, comment))
             else:
                 others.append((username, comment))
@@ -176,39 +185,24 @@ class ChatModeOptimizer(BaseManager):
         """Procesar lote grande (15+ comentarios) - Respuesta general"""
         batch_size = len(comments_batch)
         
-        # Respuestas para lotes muy grandes
-        large_batch_responses = [
-            f"¡{batch_size} comentarios! ¿Esto es un chat o una invasión? Mi sarcasmo no da para tantos.",
-            f"Wow, {batch_size} mensajes. El chat está más activo que mi vida amorosa... y eso es decir mucho.",
-            f"¡{batch_size} comentarios! Si pusieran esa energía en algo útil... nah, mejor sigan aquí.",
-            f"Tantos mensajes que mi cerebro de payaso se sobrecargó. Dejen de ser tan 'brillantes' todos a la vez.",
-            f"¡{batch_size} comentarios! ¿Es mi cumpleaños o qué? Porque esto se siente como un castigo."
-        ]
-        
         # Mencionar algunos usuarios específicos
         mentioned_users = random.sample([c[0] for c in comments_batch], min(3, len(comments_batch)))
         user_mentions = ", ".join(mentioned_users)
         
-        base_response = random.choice(large_batch_responses)
+        # Respuesta para lotes muy grandes (plantilla editable en plantillas.json)
+        base_response = get_template_catalog().render("chat_lote_grande", batch_size=batch_size)
         return f"{base_response}\n\nSaludos especiales a {user_mentions} por contribuir al caos."
     
-    def _get_varied_response(self, username, comment, repetition_count):
+    def _get_varied_response(self, username, comment, repetition_count, profile=None):
         """Obtener respuesta variada para preguntas comunes"""
-        comment_lower = ResponseHandler.clean_text(comment).lower()
+        intents = get_intent_matcher().classify(comment)
         
-        # Detectar tipo de pregunta común
+        # Detectar tipo de pregunta común (en orden de prioridad)
         variation_key = None
-        
-        if ResponseHandler.detect_keywords(comment_lower, ["como estas", "que tal", "how are you"]):
-            variation_key = "como_estas"
-        elif ResponseHandler.detect_keywords(comment_lower, ["que haces", "what are you doing"]):
-            variation_key = "que_haces"
-        elif ResponseHandler.detect_keywords(comment_lower, ["gracioso", "funny", "divertido"]):
-            variation_key = "eres_gracioso"
-        elif ResponseHandler.detect_keywords(comment_lower, ["malo", "bad", "terrible"]):
-            variation_key = "eres_malo"
-        elif ResponseHandler.detect_keywords(comment_lower, ["hola", "hi", "hey", "saludos"]):
-            variation_key = "saludo"
+        for key in ("como_estas", "que_haces", "eres_gracioso", "eres_malo", "saludo"):
+            if key in intents:
+                variation_key = key
+                break
         
         if variation_key:
             variations = self.data.get("response_variations", {}).get(variation_key, [])
@@ -216,17 +210,17 @@ class ChatModeOptimizer(BaseManager):
                 # Seleccionar variación basada en el número de repetición
                 variation_index = repetition_count % len(variations)
                 response = variations[variation_index]
-                return ResponseHandler.personalize_by_name(username, response)
+                return ResponseHandler.personalize_by_name(username, response, profile)
         
         return None
     
-    def _get_anti_spam_response(self, username, comment):
+    def _get_anti_spam_response(self, username, comment, profile=None):
         """Respuesta para usuarios que repiten mucho"""
         anti_spam = self.data.get("anti_spam_responses", [])
         response = random.choice(anti_spam) if anti_spam else "Ya preguntaste eso."
         
         self.increment_counter("estadisticas", "preguntas_repetidas_detectadas")
-        return ResponseHandler.personalize_by_name(username, response)
+        return ResponseHandler.personalize_by_name(username, response, profile)
     
     def _get_ai_response_with_timeout(self, username, comment):
         """Obtener respuesta de OpenAI con timeout"""
@@ -314,16 +308,7 @@ class ChatModeOptimizer(BaseManager):
     def _is_question(self, text):
         """Determinar si es una pregunta"""
         indicators = ["?", "qué", "cómo", "cuál", "cuándo", "dónde", "por qué", "quién"]
-        return any(indicator in text.lower() for indicator in indicators)
-    
-    def _get_question_hash(self, question):
-        """Generar hash para detectar preguntas repetidas"""
-        clean_question = ResponseHandler.clean_text(question).lower()
-        # Remover palabras comunes para mejor detección
-        words = clean_question.split()
-        content_words = [w for w in words if w not in ["el", "la", "de", "que", "es", "por", "como"]]
-        normalized = " ".join(sorted(content_words))
-        return hashlib.md5(normalized.encode()).hexdigest()[:8]
+        return NormalizedComment.of(text).contains_any(indicators)
     
     def get_optimizer_stats(self):
         """Obtener estadísticas del optimizador"""
@@ -346,29 +331,26 @@ class ChatModeOptimizer(BaseManager):
         
         stats += f"Preguntas únicas trackeadas: {len(self.repeated_questions)}\n"
         
+        stats += f"Preguntas expiradas o desalojadas: {self.repeated_questions.evicted}\n"
+        
         # Top preguntas más repetidas
-        if self.repeated_questions:
-            top_repeated = sorted(self.repeated_questions.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_repeated = self.repeated_questions.top(5)
+        if top_repeated:
             stats += f"\nTop preguntas más repetidas:\n"
-            for hash_q, count in top_repeated:
-                stats += f"  Hash {hash_q}: {count} veces\n"
+            for texto, count in top_repeated:
+                stats += f"  '{texto}': {count} veces\n"
         
         return stats
     
     def clear_repeated_questions(self):
         """Limpiar historial de preguntas repetidas"""
-        count = len(self.repeated_questions)
-        self.repeated_questions.clear()
+        count = self.repeated_questions.clear()
         return f"🧹 {count} patrones de preguntas repetidas limpiados."
     
     def add_custom_variation(self, trigger_words, responses):
         """Agregar variación personalizada"""
         key = "_".join(trigger_words)
-        if "response_variations" not in self.data:
-            self.data["response_variations"] = {}
-        
-        self.data["response_variations"][key] = responses
-        self.save_data()
+        self.set_item("response_variations", key, responses)
         return f"✅ Variación personalizada agregada para: {trigger_words}"
 
 # Integración con ModeController
@@ -413,9 +395,9 @@ if __name__ == "__main__":
     # Simular diferentes tamaños de lote
     print("\n📝 LOTE PEQUEÑO (3 comentarios):")
     small_batch = [
-        ("Juan", "¿Cómo estás?", "comment"),
-        ("Ana", "Eres muy gracioso", "comment"),
-        ("Pedro", "¿Cómo estás?", "comment")  # Repetida
+        ("Juan", "¿Cómo estás?", "comment", None),
+        ("Ana", "Eres muy gracioso", "comment", None),
+        ("Pedro", "¿Cómo estás?", "comment", None)  # Repetida
     ]
     
     response = optimizer.process_comments_optimized(small_batch)
@@ -423,21 +405,21 @@ if __name__ == "__main__":
     
     print("\n📝 LOTE MEDIANO (8 comentarios):")
     medium_batch = [
-        ("User1", "Hola", "comment"),
-        ("User2", "¿Qué haces?", "comment"),
-        ("User3", "Eres malo", "comment"),
-        ("User4", "Me gusta tu show", "comment"),
-        ("User5", "¿Cómo estás?", "comment"),
-        ("User6", "Aburrido", "comment"),
-        ("User7", "¿Tienes familia?", "comment"),
-        ("User8", "Genial", "comment")
+        ("User1", "Hola", "comment", None),
+        ("User2", "¿Qué haces?", "comment", None),
+        ("User3", "Eres malo", "comment", None),
+        ("User4", "Me gusta tu show", "comment", None),
+        ("User5", "¿Cómo estás?", "comment", None),
+        ("User6", "Aburrido", "comment", None),
+        ("User7", "¿Tienes familia?", "comment", None),
+        ("User8", "Genial", "comment", None)
     ]
     
     response = optimizer.process_comments_optimized(medium_batch)
     print(response)
     
     print("\n📝 LOTE GRANDE (20+ comentarios):")
-    large_batch = [(f"User{i}", f"Mensaje {i}", "comment") for i in range(25)]
+    large_batch = [(f"User{i}", f"Mensaje {i}", "comment", None) for i in range(25)]
     
     response = optimizer.process_comments_optimized(large_batch)
     print(response)
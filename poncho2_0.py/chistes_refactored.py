@@ -1,10 +1,13 @@
 from base_manager import BaseManager
 from response_handler import ResponseHandler
+from intent_matcher import get_intent_matcher
 import random
 
 class ChisteManager(BaseManager):
     """Manager de chistes refactorizado usando BaseManager"""
     
+    WEIGHTED_KEYS = {"chistes": "rating"}  # Los mejor calificados salen más seguido
+    
     def __init__(self, chistes_file="chistes.json"):
         super().__init__(chistes_file)
         print(f"😂 Chiste Manager inicializado con {len(self.data.get('chistes', []))} chistes")
@@ -121,10 +124,18 @@ class ChisteManager(BaseManager):
         # Incrementar contador
         self.increment_counter("estadisticas", "chistes_contados")
         
-        # Formatear chiste
+        return self._format_joke(chiste)
+    
+    @staticmethod
+    def _format_joke(chiste):
+        """Texto del chiste tal como se dice"""
         joke_text = f"{chiste['setup']}\n\n{chiste['punchline']}"
         return ResponseHandler.clean_text(joke_text)
     
+    def prerender_texts(self):
+        """Textos que get_random_joke puede decir (para sintetizarlos por adelantado)"""
+        return [self._format_joke(chiste) for chiste in self.data.get("chistes", [])]
+    
     def get_joke_by_category(self, categoria):
         """Obtener chiste de una categoría específica"""
         chistes = self.data.get("chistes", [])
@@ -133,18 +144,17 @@ class ChisteManager(BaseManager):
         if not chistes_categoria:
             return f"No tengo chistes de '{categoria}', pero puedo contarte uno de lo malo que eres!"
         
-        chiste = random.choice(chistes_categoria)
+        chiste = self.choice_from(f"chistes:{categoria.lower()}", chistes_categoria)
         self.increment_counter("estadisticas", "chistes_contados")
         
         return f"{chiste['setup']}\n\n{chiste['punchline']}"
     
     def get_best_jokes(self, limit=5):
         """Obtener los mejores chistes por rating"""
-        chistes = self.data.get("chistes", [])
-        best_chistes = sorted(chistes, key=lambda x: x.get("rating", 0), reverse=True)
+        best_chistes = self.get_top_items("chistes", limit)
         
         result = "🏆 MIS MEJORES CHISTES:\n\n"
-        for i, chiste in enumerate(best_chistes[:limit], 1):
+        for i, chiste in enumerate(best_chistes, 1):
             result += f"{i}. {chiste['setup']}\n   {chiste['punchline']}\n\n"
         
         return result
@@ -226,7 +236,7 @@ class ChisteManager(BaseManager):
         clean_comment = ResponseHandler.clean_text(comment)
         
         # Detectar peticiones específicas
-        if ResponseHandler.detect_keywords(clean_comment, ["chiste", "joke", "gracioso", "divertido"]):
+        if get_intent_matcher().matches(comment, "chiste"):
             # Buscar categoría específica
             for categoria in self.data.get("categorias", []):
                 if categoria in clean_comment.lower():
@@ -1,12 +1,17 @@
 from base_manager import BaseManager
-from response_handler import ResponseHandler
+from response_handler import ResponseHandler, MIN_SEGMENT_CHARS
+from intent_matcher import get_intent_matcher
+from viewer_profiles import get_viewer_profiles
 import random
 
 class ClarividenteManager(BaseManager):
     """Manager clarividente refactorizado usando BaseManager"""
     
-    def __init__(self, predicciones_file="predicciones.json"):
-        super().__init__(predicciones_file)
+    JOURNAL_MODE = True  # predicciones_personales crece con cada espectador
+    USER_TABLES = {"predicciones_personales": "record"}
+    
+    def __init__(self, predicciones_file="predicciones.json", storage=None):
+        super().__init__(predicciones_file, storage=storage)
         print(f"🔮 Clarividente Manager inicializado")
     
     def _create_default_data(self):
@@ -76,14 +81,15 @@ class ClarividenteManager(BaseManager):
             "version": "2.0"
         }
     
-    def get_prediccion_for_user(self, username):
+    def get_prediccion_for_user(self, username, profile=None):
         """Obtener predicción específica para un usuario"""
-        predicciones_personales = self.data.get("predicciones_personales", {})
-        username_lower = username.lower()
+        profile = profile or get_viewer_profiles().get(username)
+        profile.incr("predicciones")
+        username_lower = profile.key
         
         # Si ya tiene predicción guardada, devolverla
-        if username_lower in predicciones_personales:
-            stored = predicciones_personales[username_lower]
+        stored = self.get_item("predicciones_personales", username_lower)
+        if stored:
             frase_mistica = self.get_random_choice("frases_mysticas")
             return f"🔮 {frase_mistica} {stored['prediccion']} (Probabilidad: {stored['probabilidad']})"
         
@@ -93,30 +99,26 @@ class ClarividenteManager(BaseManager):
             return "Mi bola de cristal está rota! No puedo ver tu futuro."
         
         # Personalizar usando ResponseHandler
-        prediccion_personalizada = self._personalizar_prediccion(username, prediccion_base.copy())
+        prediccion_personalizada = self._personalizar_prediccion(username, prediccion_base.copy(), profile)
         
         # Guardar para futuras consultas
-        predicciones_personales[username_lower] = {
+        self.set_item("predicciones_personales", username_lower, {
             "prediccion": prediccion_personalizada["prediccion"],
             "tipo": prediccion_personalizada["tipo"],
             "probabilidad": prediccion_personalizada["probabilidad"]
-        }
-        self.data["predicciones_personales"] = predicciones_personales
+        })
         
-        # Incrementar estadísticas
+        # Incrementar estadísticas (aquí el usuario siempre es nuevo)
         self.increment_counter("estadisticas", "predicciones_dadas")
-        if username_lower not in predicciones_personales:
-            self.increment_counter("estadisticas", "usuarios_consultados")
-        
-        self.save_data()
+        self.increment_counter("estadisticas", "usuarios_consultados")
         
         frase_mistica = self.get_random_choice("frases_mysticas")
         return f"🔮 {frase_mistica} {prediccion_personalizada['prediccion']} (Probabilidad: {prediccion_personalizada['probabilidad']})"
     
-    def _personalizar_prediccion(self, username, prediccion_base):
+    def _personalizar_prediccion(self, username, prediccion_base, profile=None):
         """Personalizar predicción usando ResponseHandler"""
         # Usar método heredado para personalización por nombre
-        prediccion_personalizada = ResponseHandler.personalize_by_name(username, prediccion_base["prediccion"])
+        prediccion_personalizada = ResponseHandler.personalize_by_name(username, prediccion_base["prediccion"], profile)
         
         # Crear nueva predicción con personalización
         return {
@@ -136,21 +138,29 @@ class ClarividenteManager(BaseManager):
         
         return f"🔮 {frase_mistica} {prediccion['prediccion']} (Probabilidad: {prediccion['probabilidad']})"
     
-    def responder_a_comentario(self, username, comentario):
+    def prerender_texts(self):
+        """Frases místicas y predicciones por separado (no cada combinación)
+        
+        Las frases cortas se dicen unidas a lo que sigue, igual que una
+        predicción que empieza con frase corta se une a la frase mística;
+        esas uniones las completa el caché la primera vez que se dicen.
+        """
+        frases = [ResponseHandler.clean_text(f"🔮 {frase_mistica}") for frase_mistica in self.data.get("frases_mysticas", [])]
+        textos = [frase for frase in frases if len(frase) >= MIN_SEGMENT_CHARS]
+        if not textos:
+            return []
+        for p in self.data.get("predicciones_genericas", []):
+            dicha = ResponseHandler.clean_text(f"{textos[0]} {p['prediccion']} (Probabilidad: {p['probabilidad']})")
+            textos.extend(ResponseHandler.split_sentences(dicha)[1:])
+        return textos
+    
+    def responder_a_comentario(self, username, comentario, profile=None):
         """Responder a comentarios desde perspectiva clarividente"""
-        comentario_clean = ResponseHandler.clean_text(comentario)
-        comentario_lower = comentario_clean.lower()
-        
-        # Palabras que indican petición de predicción
-        palabras_prediccion = [
-            "futuro", "destino", "predice", "prediccion", "que pasara", 
-            "que va a pasar", "mi futuro", "clarividente", "adivina",
-            "horoscopo", "suerte", "amor", "dinero", "trabajo", "cuando"
-        ]
+        intents = get_intent_matcher().classify(comentario)
         
         # Si el comentario pide predicción explícitamente
-        if ResponseHandler.detect_keywords(comentario_lower, palabras_prediccion):
-            return self.get_prediccion_for_user(username)
+        if "prediccion" in intents or "tema_prediccion" in intents:
+            return self.get_prediccion_for_user(username, profile)
         
         # Respuestas místicas a comentarios normales
         respuestas_misticas = [
@@ -163,18 +173,18 @@ class ClarividenteManager(BaseManager):
         ]
         
         # Respuestas específicas según el contenido
-        if ResponseHandler.detect_keywords(comentario_lower, ["hola", "hi", "saludos"]):
+        if "saludo" in intents:
             return f"🔮 {username}, ya sabía que ibas a saludar... mi don es impresionante."
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["como estas", "que tal"]):
+        if "como_estas" in intents:
             return f"🔮 {username}, estoy como las cartas predicen: molesto y sarcástico."
         
-        if ResponseHandler.detect_keywords(comentario_lower, ["gracioso", "funny"]):
+        if "eres_gracioso" in intents:
             return f"🔮 {username}, preveo que tu sentido del humor mejorará... en otra vida."
         
         # Respuesta mística aleatoria personalizada
         respuesta = random.choice(respuestas_misticas)
-        return ResponseHandler.personalize_by_name(username, respuesta)
+        return ResponseHandler.personalize_by_name(username, respuesta, profile)
     
     def get_lectura_completa(self, username):
         """Dar una lectura completa de tarot/clarividente"""
@@ -254,7 +264,7 @@ class ClarividenteManager(BaseManager):
         
         predicciones_dadas = self.get_counter("estadisticas", "predicciones_dadas")
         usuarios_consultados = self.get_counter("estadisticas", "usuarios_consultados")
-        predicciones_personales = self.data.get("predicciones_personales", {})
+        predicciones_personales = self.count_entries("predicciones_personales")
         
         # Análisis por tipos
         tipos = {}
@@ -265,7 +275,7 @@ class ClarividenteManager(BaseManager):
         stats = f"{base_stats}\n"
         stats += f"Predicciones dadas: {predicciones_dadas}\n"
         stats += f"Usuarios consultados: {usuarios_consultados}\n"
-        stats += f"Predicciones personalizadas: {len(predicciones_personales)}\n"
+        stats += f"Predicciones personalizadas: {predicciones_personales}\n"
         
         if tipos:
             stats += "\nTipos de predicciones:\n"
@@ -276,11 +286,9 @@ class ClarividenteManager(BaseManager):
     
     def limpiar_predicciones_antiguas(self):
         """Limpiar predicciones personalizadas"""
-        predicciones_personales = self.data.get("predicciones_personales", {})
-        count = len(predicciones_personales)
+        count = self.count_entries("predicciones_personales")
         
-        self.data["predicciones_personales"] = {}
-        self.save_data()
+        self.set_value("predicciones_personales", {})
         
         return f"🧹 {count} predicciones limpiadas. Nuevas lecturas disponibles para todos."
     
@@ -0,0 +1,211 @@
+import bisect
+import random
+import threading
+from collections import deque
+
+# Cuántas elecciones recientes no se repiten por clave
+NO_REPEAT_WINDOW = 3
+
+class ShuffleBag:
+    """Bolsa barajada de índices: cada elemento sale una vez por ronda"""
+    
+    def __init__(self, size, recent):
+        self.size = size
+        self.recent = recent  # deque compartida con el sampler de esa clave
+        self.bag = []
+    
+    def draw(self):
+        """Sacar el siguiente índice, rellenando la bolsa si se vació"""
+        if not self.bag:
+            self._refill()
+        return self.bag.pop()
+    
+    def _refill(self):
+        """Nueva ronda barajada sin repetir los últimos elementos al principio"""
+        ventana = min(self.recent.maxlen or 0, self.size - 1)
+        recientes = list(self.recent)[-ventana:] if ventana > 0 else []
+        excluidos = set(recientes)
+        
+        bag = [i for i in range(self.size) if i not in excluidos]
+        # Fisher-Yates con random() directo: random.shuffle/randint cuestan ~5x más por paso
+        azar = random.random
+        for i in range(len(bag) - 1, 0, -1):
+            j = int(azar() * (i + 1))
+            bag[i], bag[j] = bag[j], bag[i]
+        # Se saca por el final: dejar al menos `ventana` elementos después de cada reciente
+        for indice in recientes:
+            bag.insert(int(azar() * (max(0, len(bag) - ventana) + 1)), indice)
+        self.bag = bag
+    
+    def extend(self, new_size):
+        """Agregar índices nuevos en posiciones aleatorias de la ronda actual"""
+        for indice in range(self.size, new_size):
+            self.bag.insert(random.randint(0, len(self.bag)), indice)
+        self.size = new_size
+
+class AliasTable:
+    """Tabla alias (Vose) para muestreo ponderado en O(1)"""
+    
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        self.size = n
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+        if n == 0:
+            return
+        if total <= 0:
+            weights = [1.0] * n
+            total = float(n)
+        
+        escalados = [w * n / total for w in weights]
+        pequenos = [i for i, p in enumerate(escalados) if p < 1.0]
+        grandes = [i for i, p in enumerate(escalados) if p >= 1.0]
+        
+        while pequenos and grandes:
+            chico = pequenos.pop()
+            grande = grandes.pop()
+            self.prob[chico] = escalados[chico]
+            self.alias[chico] = grande
+            escalados[grande] = escalados[grande] + escalados[chico] - 1.0
+            if escalados[grande] < 1.0:
+                pequenos.append(grande)
+            else:
+                grandes.append(grande)
+        
+        for i in pequenos + grandes:
+            self.prob[i] = 1.0
+    
+    def draw(self):
+        """Sacar un índice según los pesos"""
+        i = random.randrange(self.size)
+        return i if random.random() < self.prob[i] else self.alias[i]
+
+class ContentSampler:
+    """Estructuras de muestreo compiladas por clave de contenido"""
+    
+    def __init__(self, no_repeat=NO_REPEAT_WINDOW):
+        self.no_repeat = no_repeat
+        self._lock = threading.Lock()
+        self._bags = {}
+        self._alias = {}  # clave -> (AliasTable, pesos)
+        self._rankings = {}  # clave -> (pesos negados ordenados, índices)
+        self._recent = {}
+    
+    def reset(self):
+        """Olvidar todo lo compilado (al recargar datos)"""
+        with self._lock:
+            self._bags.clear()
+            self._alias.clear()
+            self._rankings.clear()
+            self._recent.clear()
+    
+    def compile(self, key, items, weight_fn=None):
+        """Construir por adelantado la bolsa o tabla alias de una clave"""
+        with self._lock:
+            if weight_fn is None:
+                self._bags[key] = ShuffleBag(len(items), self._recent_for(key))
+            else:
+                self._alias.pop(key, None)
+                self._alias_for(key, items, weight_fn)
+    
+    def _recent_for(self, key):
+        recent = self._recent.get(key)
+        if recent is None:
+            recent = deque(maxlen=self.no_repeat)
+            self._recent[key] = recent
+        return recent
+    
+    def choice(self, key, items):
+        """Elemento de `items` sin repetir los recientes (shuffle bag)"""
+        if not items:
+            return None
+        with self._lock:
+            bag = self._bags.get(key)
+            if bag is None or bag.size > len(items):
+                bag = ShuffleBag(len(items), self._recent_for(key))
+                self._bags[key] = bag
+            elif bag.size < len(items):
+                bag.extend(len(items))
+            
+            indice = bag.draw()
+            bag.recent.append(indice)
+        return items[indice]
+    
+    def weighted_choice(self, key, items, weight_fn):
+        """Elemento de `items` según pesos (alias), evitando los recientes"""
+        if not items:
+            return None
+        with self._lock:
+            table, pesos = self._alias_for(key, items, weight_fn)
+            recent = self._recent_for(key)
+            ventana = min(len(recent), len(items) - 1)
+            recientes = set(list(recent)[-ventana:]) if ventana > 0 else set()
+            
+            indice = table.draw()
+            intentos = 1
+            while indice in recientes and intentos < 10:
+                indice = table.draw()
+                intentos += 1
+            recent.append(indice)
+        return items[indice]
+    
+    def _alias_for(self, key, items, weight_fn):
+        """Tabla alias de la clave, recompilada solo si la lista cambió de tamaño"""
+        compilado = self._alias.get(key)
+        if compilado is None or compilado[0].size != len(items):
+            pesos = compilado[1] if compilado and compilado[0].size < len(items) else []
+            # Al agregar elementos solo se calculan los pesos nuevos
+            pesos = pesos + [weight_fn(item) for item in items[len(pesos):]]
+            compilado = (AliasTable(pesos), pesos)
+            self._alias[key] = compilado
+        return compilado
+    
+    def top(self, key, items, weight_fn, limit):
+        """Los `limit` elementos de mayor peso (ranking mantenido incrementalmente)"""
+        with self._lock:
+            ranking = self._rankings.get(key)
+            if ranking is None or len(ranking[1]) > len(items):
+                ranking = ([], [])
+                self._rankings[key] = ranking
+            claves, indices = ranking
+            for indice in range(len(indices), len(items)):
+                # Negado para ordenar de mayor a menor; empates por orden de llegada
+                peso = -weight_fn(items[indice])
+                pos = bisect.bisect_right(claves, peso)
+                claves.insert(pos, peso)
+                indices.insert(pos, indice)
+            return [items[i] for i in indices[:limit]]
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import time
+    from collections import Counter
+    
+    sampler = ContentSampler(no_repeat=3)
+    chistes = [{"id": i, "rating": (i % 5) + 1} for i in range(10)]
+    
+    salidas = [sampler.choice("chistes", chistes)["id"] for _ in range(30)]
+    repetidos = sum(1 for i in range(1, len(salidas)) if salidas[i] in salidas[max(0, i - 3):i])
+    print(f"🎲 Shuffle bag: {salidas}")
+    print(f"🔁 Repeticiones dentro de la ventana: {repetidos}")
+    
+    conteo = Counter(sampler.weighted_choice("chistes_rating", chistes, lambda c: c["rating"])["id"]
+                     for _ in range(20000))
+    print(f"⚖️ Alias por rating: {sorted(conteo.items())}")
+    
+    chistes.append({"id": 10, "rating": 5})
+    print(f"🏆 Top 3: {[c['id'] for c in sampler.top('chistes', chistes, lambda c: c['rating'], 3)]}")
+    
+    grande = [{"rating": random.randint(1, 5)} for _ in range(10000)]
+    # Mismas condiciones: la tabla de alias se arma antes de medir (como tras cargar el manager)
+    sampler.weighted_choice("grande", grande, lambda c: c["rating"])
+    inicio = time.perf_counter()
+    for _ in range(10000):
+        random.choices(grande, weights=[c["rating"] for c in grande])
+    base = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for _ in range(10000):
+        sampler.weighted_choice("grande", grande, lambda c: c["rating"])
+    alias = time.perf_counter() - inicio
+    print(f"⏱️ 10k elecciones ponderadas: random.choices {base * 1000:.1f} ms | alias {alias * 1000:.1f} ms")
@@ -1,5 +1,6 @@
 from base_manager import BaseManager
 from response_handler import ResponseHandler
+from response_templates import get_template_catalog
 from audio_manager import AudioListener
 import random
 import time
@@ -215,9 +216,9 @@ class ConversacionInvitadoManager(BaseManager):
         
         self.historial_conversacion.append(respuesta_historial)
         
-        # Reproducir respuesta usando audio manager
+        # Reproducir respuesta usando audio manager (encolada: no corta lo que suena)
         if self.audio_manager:
-            self.audio_manager.speak_text(respuesta)
+            self.audio_manager.say(respuesta, "question")
         
         return respuesta
     
@@ -241,128 +242,49 @@ class ConversacionInvitadoManager(BaseManager):
         """Respuestas para entrevista casual"""
         # Detectar saludos
         if ResponseHandler.detect_keywords(texto_lower, ["hola", "buenas", "hi", "hey"]):
-            respuestas = [
-                f"¡Hola {nombre}! Bienvenido a mi show, donde la lógica viene a morir.",
-                f"¡Hey {nombre}! Espero que estés listo para una conversación interesante.",
-                f"Saludos {nombre}, prepárate para preguntas que no sabías que existían."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_casual_saludo", nombre=nombre)
         
         # Detectar estado de ánimo
         if ResponseHandler.detect_keywords(texto_lower, ["bien", "genial", "perfecto", "excelente"]):
-            respuestas = [
-                f"¡Perfecto {nombre}! Me alegra que estés bien, porque yo voy a arruinar tu día.",
-                f"Qué bueno {nombre}, necesito que estés en tu mejor estado para soportar mis preguntas.",
-                f"Excelente {nombre}, así me gusta, con energía para esta aventura."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_casual_animo_bueno", nombre=nombre)
         
         if ResponseHandler.detect_keywords(texto_lower, ["mal", "cansado", "terrible", "horrible"]):
-            respuestas = [
-                f"¿Mal día {nombre}? ¡Perfecto! Así encajas con la temática de mi vida.",
-                f"No te preocupes {nombre}, después de hablar conmigo te sentirás peor.",
-                f"Tranquilo {nombre}, todos tenemos días malos... yo los tengo todos."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_casual_animo_malo", nombre=nombre)
         
         # Respuesta general casual
-        respuestas_generales = [
-            f"Interesante {nombre}, cuéntame más sobre eso.",
-            f"Ya veo {nombre}, ¿y cómo te sientes al respecto?",
-            f"Mm-hmm {nombre}, eso suena... como algo que diría alguien.",
-            f"Fascinante {nombre}, aunque no estoy seguro de qué significa."
-        ]
-        
-        return random.choice(respuestas_generales)
+        return get_template_catalog().render("invitado_casual_general", nombre=nombre)
     
     def _respuesta_personal(self, nombre, texto_lower, texto_original):
         """Respuestas para entrevista personal"""
         if ResponseHandler.detect_keywords(texto_lower, ["familia", "padre", "madre", "hermano", "hijo"]):
-            respuestas = [
-                f"La familia es importante {nombre}, aunque la mía me abandonó cuando se enteraron de mi carrera.",
-                f"¡Qué bonito {nombre}! Mi familia también es especial... especialmente disfuncional.",
-                f"Familia... {nombre}, esa palabra me trae recuerdos dolorosos y cómicos."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_personal_familia", nombre=nombre)
         
         if ResponseHandler.detect_keywords(texto_lower, ["trabajo", "carrera", "profesion", "empleo"]):
-            respuestas = [
-                f"El trabajo es esencial {nombre}, aunque el mío consiste en hacer reír a gente que no ríe.",
-                f"Interesante carrera {nombre}, yo elegí ser payaso... claramente no soy bueno tomando decisiones.",
-                f"Tu trabajo suena mejor que el mío {nombre}, yo hago reír por dinero y fracaso en ambas."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_personal_trabajo", nombre=nombre)
         
         if ResponseHandler.detect_keywords(texto_lower, ["sueño", "meta", "objetivo", "ambición"]):
-            respuestas = [
-                f"Los sueños son importantes {nombre}, aunque los míos se convirtieron en pesadillas.",
-                f"¡Qué ambicioso {nombre}! Yo también tuve sueños... luego me desperté.",
-                f"Me gusta tu actitud {nombre}, sigue soñando mientras puedas."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_personal_suenos", nombre=nombre)
         
         # Respuesta personal general
-        respuestas_generales = [
-            f"Eso es muy personal {nombre}, gracias por compartirlo conmigo.",
-            f"Me parece fascinante {nombre}, ¿hay algo más que quieras contar?",
-            f"Aprecio tu honestidad {nombre}, no todos son tan abiertos.",
-            f"Qué interesante perspectiva {nombre}, nunca lo había visto así."
-        ]
-        
-        return random.choice(respuestas_generales)
+        return get_template_catalog().render("invitado_personal_general", nombre=nombre)
     
     def _respuesta_comica(self, nombre, texto_lower, texto_original):
         """Respuestas para entrevista cómica"""
         if ResponseHandler.detect_keywords(texto_lower, ["chiste", "gracioso", "divertido", "humor"]):
-            respuestas = [
-                f"¡Humor {nombre}! Mi especialidad, aunque no soy muy bueno en ella.",
-                f"Los chistes son geniales {nombre}, tengo miles... todos malos.",
-                f"¿Te gusta el humor {nombre}? ¡Perfecto! Porque mi vida es una comedia trágica.",
-                f"El humor es subjetivo {nombre}, pero el mío es objetivamente malo."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_comica_humor", nombre=nombre)
         
         if ResponseHandler.detect_keywords(texto_lower, ["payaso", "circo", "espectáculo"]):
-            respuestas = [
-                f"¡Ah, hablando de payasos {nombre}! Soy un experto en la materia... lamentablemente.",
-                f"El circo {nombre}, mi hogar dulce hogar... bueno, más bien amargo hogar.",
-                f"Los payasos {nombre}, somos una especie en extinción... por buenas razones.",
-                f"El mundo del espectáculo {nombre}, donde los sueños van a morir lentamente."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_comica_payaso", nombre=nombre)
         
         if ResponseHandler.detect_keywords(texto_lower, ["reir", "risa", "carcajada"]):
-            respuestas = [
-                f"¡La risa {nombre}! Mi trabajo es provocarla, aunque más bien provoco lágrimas.",
-                f"Reír es saludable {nombre}, aunque mi humor puede ser tóxico.",
-                f"La risa es contagiosa {nombre}, pero la mía causa inmunidad.",
-                f"Me alegra que rías {nombre}, porque yo no he reído en años."
-            ]
-            return random.choice(respuestas)
+            return get_template_catalog().render("invitado_comica_risa", nombre=nombre)
         
         # Respuesta cómica general
-        respuestas_generales = [
-            f"Ja, ja, ja... {nombre}, fingir que es gracioso es parte de mi trabajo.",
-            f"Qué cómico {nombre}, casi tan gracioso como mi situación laboral.",
-            f"Interesante {nombre}, ¿tienes más material como ese?",
-            f"No está mal {nombre}, aunque mi abuela cuenta mejores chistes... y está muerta."
-        ]
-        
-        return random.choice(respuestas)
+        return get_template_catalog().render("invitado_comica_general", nombre=nombre)
     
     def _respuesta_generica(self, nombre, texto_original):
         """Respuesta genérica cuando no se identifica el contexto"""
-        respuestas = [
-            f"Ya veo {nombre}, esa es una perspectiva... única.",
-            f"Mm-hmm {nombre}, sigue hablando que esto se está poniendo interesante.",
-            f"Entiendo {nombre}, o al menos finjo que entiendo.",
-            f"Fascinante {nombre}, cuéntame más sobre eso.",
-            f"Interesante punto de vista {nombre}, ¿cómo llegaste a esa conclusión?",
-            f"Okay {nombre}, eso no me lo esperaba.",
-            f"Ya veo {nombre}, ¿y qué opinas tú al respecto?"
-        ]
-        
-        return ResponseHandler.personalize_by_name(nombre, random.choice(respuestas))
+        return ResponseHandler.personalize_by_name(nombre, get_template_catalog().render("invitado_generica", nombre=nombre))
     
     def hacer_pregunta_invitado(self):
         """Hacer una pregunta al invitado"""
@@ -398,7 +320,7 @@ class ConversacionInvitadoManager(BaseManager):
         
         # Reproducir pregunta
         if self.audio_manager:
-            self.audio_manager.speak_text(pregunta_personalizada)
+            self.audio_manager.say(pregunta_personalizada, "question")
         
         return f"❓ {pregunta_personalizada}\n\n🎧 Escuchando respuesta..."
     
@@ -418,21 +340,15 @@ class ConversacionInvitadoManager(BaseManager):
         tipo = self.invitado_actual["tipo_entrevista"]["nombre"]
         
         # Actualizar estadísticas
-        tiempo_actual = self.get_counter("estadisticas", "tiempo_total_conversacion")
-        self.data["estadisticas"]["tiempo_total_conversacion"] = tiempo_actual + duracion
+        self.increment_counter("estadisticas", "tiempo_total_conversacion", duracion)
         
         # Guardar historial del invitado
-        if "invitados_historicos" not in self.data:
-            self.data["invitados_historicos"] = {}
-        
-        self.data["invitados_historicos"][nombre] = {
+        self.set_item("invitados_historicos", nombre, {
             "ultima_visita": time.time(),
             "tipo_entrevista": tipo,
             "duracion": duracion,
             "interacciones": len(self.historial_conversacion)
-        }
-        
-        self.save_data()
+        })
         
         # Mensaje de despedida
         despedida = self.get_random_choice("respuestas_automaticas") or "¡Gracias por venir!"
@@ -537,7 +453,7 @@ class ConversacionInvitadoManager(BaseManager):
             stats += f"\nEstado: Sin conversación activa\n"
         
         # Invitados históricos
-        invitados_historicos = self.data.get("invitados_historicos", {})
+        invitados_historicos = self.get_snapshot().get("invitados_historicos", {})
         if invitados_historicos:
             stats += f"\nInvitados históricos: {len(invitados_historicos)}\n"
             ultimo_invitado = max(invitados_historicos.items(), 
@@ -1,5 +1,6 @@
 from base_manager import BaseManager
 from response_handler import ResponseHandler, SarcasticResponder
+from viewer_profiles import get_viewer_profiles
 import random
 import time
 
@@ -10,7 +11,7 @@ class ConversacionPublicoManager(BaseManager):
         super().__init__(conversacion_file)
         self.conversacion_activa = False
         self.tema_actual = None
-        self.participantes = {}  # username: participacion_count
+        self.participantes = {}  # clave del perfil: participaciones en esta conversación
         self.preguntas_publico = []
         print("🗣️ Conversación Público Manager inicializado")
     
@@ -129,7 +130,7 @@ class ConversacionPublicoManager(BaseManager):
         
         return inicio
     
-    def procesar_comentario_publico(self, username, comentario):
+    def procesar_comentario_publico(self, username, comentario, profile=None):
         """Procesar comentario del público en conversación"""
         if not self.conversacion_activa:
             return "No hay conversación activa. Escribe 'iniciar conversación' para comenzar."
@@ -142,15 +143,17 @@ class ConversacionPublicoManager(BaseManager):
             return self._respuesta_moderacion()
         
         # Registrar participante
-        if username not in self.participantes:
-            self.participantes[username] = 0
+        profile = profile or get_viewer_profiles().get(username)
+        profile.incr("participaciones")
+        if profile.key not in self.participantes:
+            self.participantes[profile.key] = 0
             self.increment_counter("estadisticas", "participantes_unicos")
         
-        self.participantes[username] += 1
+        self.participantes[profile.key] += 1
         
         # Detectar si es pregunta
         if self._es_pregunta(comentario_limpio):
-            return self._responder_pregunta(username, comentario_limpio)
+            return self._responder_pregunta(username, comentario_limpio, profile)
         else:
             return self._responder_comentario_general(username, comentario_limpio)
     
@@ -165,7 +168,7 @@ class ConversacionPublicoManager(BaseManager):
         texto_lower = texto.lower()
         return any(indicador in texto_lower for indicador in indicadores_pregunta)
     
-    def _responder_pregunta(self, username, pregunta):
+    def _responder_pregunta(self, username, pregunta, profile=None):
         """Responder pregunta del público"""
         self.preguntas_publico.append({
             "usuario": username,
@@ -179,7 +182,7 @@ class ConversacionPublicoManager(BaseManager):
         respuesta = self._generar_respuesta_tematica(username, pregunta)
         
         # Personalizar usando ResponseHandler
-        respuesta_personalizada = ResponseHandler.personalize_by_name(username, respuesta)
+        respuesta_personalizada = ResponseHandler.personalize_by_name(username, respuesta, profile)
         
         return f"🤔 Pregunta de {username}: {pregunta}\n\n💭 {respuesta_personalizada}"
     
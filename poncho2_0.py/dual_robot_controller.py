@@ -3,11 +3,13 @@ import time
 from mode_controller import ModeController
 from robot_regalo_manager import RobotRegaloManager
 from response_handler import ResponseHandler
+from persistence import flush_all_managers
+from prerender_scheduler import PrerenderScheduler
 
 class DualRobotController:
     """Controlador para sistema de dos robots: Poncho (principal) y Robot de Regalos"""
     
-    def __init__(self, poncho_managers, audio_manager=None, openai_client=None, arduino_controller=None):
+    def __init__(self, poncho_managers, audio_manager=None, openai_client=None, arduino_controller=None, storage=None):
         # Robot Principal (Poncho) - maneja todo excepto regalos con voz de Jorge
         if audio_manager is None and arduino_controller is not None:
             from audio_manager import ArduinoAudioManager
@@ -25,7 +27,8 @@ class DualRobotController:
         # Robot de Regalos - con su propio audio manager y voz de Álvaro
         self.robot_regalo = RobotRegaloManager(
             audio_manager=None,  # Crear uno nuevo
-            arduino_controller=arduino_controller
+            arduino_controller=arduino_controller,
+            storage=storage  # Donantes en la misma base SQLite que el resto
         )
         
         # Configuración
@@ -37,10 +40,39 @@ class DualRobotController:
         self.last_gift_time = 0
         self.gift_timeout = 10  # Segundos sin regalo para resetear racha
         
+        # Sintetizar los catálogos fijos mientras los robots están callados
+        self.prerender = PrerenderScheduler(idle_check=self._audio_idle)
+        self._setup_prerender(poncho_managers)
+        
         print("🤖 Dual Robot Controller inicializado")
         print("  - Poncho: Comentarios y conversación (Voz Jorge)")  
         print("  - Robot Regalos: Exclusivamente regalos (Voz Álvaro)")
     
+    def _audio_idle(self):
+        """Verificar que ningún robot esté hablando"""
+        for audio in (self.poncho_controller.audio_manager, self.robot_regalo.audio_manager):
+            if audio and audio.is_audio_playing():
+                return False
+        return True
+    
+    def _setup_prerender(self, poncho_managers):
+        """Registrar catálogos por modo y voz, y seguir los cambios de modo"""
+        poncho_audio = self.poncho_controller.audio_manager
+        if poncho_audio:
+            for mode, name in ModeController.PRERENDER_MANAGERS.items():
+                if name in poncho_managers:
+                    # Lazy: con un ManagerRegistry el manager se pide recién al expandir
+                    self.prerender.register(mode, poncho_audio.voice,
+                                            lambda name=name: poncho_managers[name].prerender_texts())
+        
+        regalo_audio = self.robot_regalo.audio_manager
+        if regalo_audio:
+            self.prerender.register(None, regalo_audio.voice, self.robot_regalo.prerender_texts)
+        
+        if self.prerender.sources:
+            self.poncho_controller.register_callback(self.prerender.set_current_mode)
+            self.prerender.start(self.poncho_controller.current_mode)
+    
     def register_poncho_callback(self, callback):
         """Registrar callback para el robot principal"""
         self.poncho_controller.register_callback(callback)
@@ -53,7 +85,7 @@ class DualRobotController:
         """Dirigir comentario al robot apropiado"""
         if msg_type == "gift":
             # Dirigir al robot de regalos
-            self._handle_gift(username, comment)
+            self._handle_gift(username, str(comment))
         else:
             # Dirigir al robot principal (Poncho) con THINKING mode
             self._handle_poncho_comment(username, comment, msg_type)
@@ -291,28 +323,38 @@ class DualRobotController:
         # Probar Poncho (Jorge)
         if self.poncho_controller.audio_manager:
             print("🤖 Poncho hablando con voz de Jorge...")
-            self.poncho_controller.audio_manager.speak_text("Hola, soy Poncho con voz de Jorge de México")
+            self.poncho_controller.audio_manager.say("Hola, soy Poncho con voz de Jorge de México")
             time.sleep(3)
         
         # Probar Robot Regalos (Álvaro)
         if self.robot_regalo.audio_manager:
             print("🎁 Robot Regalos hablando con voz de Álvaro...")
-            self.robot_regalo.audio_manager.speak_text("¡Hola! Soy el Robot de Regalos con voz de Álvaro de España")
+            self.robot_regalo.audio_manager.say("¡Hola! Soy el Robot de Regalos con voz de Álvaro de España")
             time.sleep(3)
         
         print("✅ Prueba de voces completada")
     
     def cleanup(self):
         """Limpiar recursos de ambos robots"""
+        self.prerender.stop()
+        
         if hasattr(self.poncho_controller, 'audio_manager'):
             self.poncho_controller.audio_manager.cleanup()
         
         if hasattr(self.robot_regalo, 'audio_manager') and self.robot_regalo.audio_manager:
             self.robot_regalo.audio_manager.cleanup()
         
-        for manager in self.poncho_controller.managers.values():
+        # Con un ManagerRegistry, no construir managers lazy solo para limpiarlos
+        managers = self.poncho_controller.managers
+        if hasattr(managers, 'loaded'):
+            managers = managers.loaded()
+        
+        for manager in managers.values():
             if hasattr(manager, 'cleanup'):
                 manager.cleanup()
+        
+        # Volcar a disco las estadísticas pendientes del write-behind
+        flush_all_managers()
 
 # Integración con el sistema principal
 def integrate_dual_robots(managers_dict, audio_manager, openai_client, arduino_controller=None):
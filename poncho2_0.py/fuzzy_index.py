@@ -0,0 +1,236 @@
+import bisect
+from collections import defaultdict
+from response_handler import NormalizedComment
+
+def normalize(text):
+    """Minúsculas, sin tildes, emojis ni puntuación, un espacio entre palabras"""
+    return " ".join(NormalizedComment.of(text).tokens)
+
+def trigrams(text):
+    """Trigramas del texto con relleno (una palabra de N letras da N+1 trigramas)"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def bounded_levenshtein(a, b, k):
+    """Distancia de edición entre a y b, o k + 1 si supera k (corta en cuanto se pasa)"""
+    if abs(len(a) - len(b)) > k:
+        return k + 1
+    if len(a) > len(b):
+        a, b = b, a
+    anterior = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        actual = [j]
+        minimo = j
+        for i, ca in enumerate(a, 1):
+            valor = min(anterior[i] + 1, actual[i - 1] + 1, anterior[i - 1] + (ca != cb))
+            actual.append(valor)
+            if valor < minimo:
+                minimo = valor
+        if minimo > k:
+            return k + 1
+        anterior = actual
+    return anterior[-1] if anterior[-1] <= k else k + 1
+
+class FuzzyIndex:
+    """Índice de textos normalizados: búsqueda exacta y aproximada por trigramas
+    
+    Cada edición destruye como mucho 3 trigramas, así que un texto a
+    distancia <= k del buscado comparte al menos len(trigramas) - 3k con él;
+    solo esos candidatos pasan a la distancia de edición acotada.
+    """
+    
+    def __init__(self, max_ratio=0.2):
+        self.max_ratio = max_ratio  # Errores permitidos por letra del texto indexado
+        self._texts = {}  # clave -> texto normalizado
+        self._exact = defaultdict(set)  # texto -> claves
+        self._grams = defaultdict(set)  # trigrama -> claves
+        self._gram_count = {}  # clave -> cantidad de trigramas
+    
+    def __len__(self):
+        return len(self._texts)
+    
+    def __contains__(self, key):
+        return key in self._texts
+    
+    def add(self, key, text):
+        """Indexar (o reindexar) un texto bajo una clave"""
+        if key in self._texts:
+            self.remove(key)
+        text = normalize(text)
+        if not text:
+            return
+        grams = trigrams(text)
+        self._texts[key] = text
+        self._exact[text].add(key)
+        self._gram_count[key] = len(grams)
+        for gram in grams:
+            self._grams[gram].add(key)
+    
+    def remove(self, key):
+        """Quitar una clave del índice"""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        self._gram_count.pop(key, None)
+        self._discard(self._exact, text, key)
+        for gram in trigrams(text):
+            self._discard(self._grams, gram, key)
+    
+    @staticmethod
+    def _discard(index, entry, key):
+        keys = index.get(entry)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[entry]
+    
+    def clear(self):
+        """Vaciar el índice"""
+        self._texts.clear()
+        self._exact.clear()
+        self._grams.clear()
+        self._gram_count.clear()
+    
+    def text_of(self, key):
+        """Texto normalizado guardado para una clave"""
+        return self._texts.get(key)
+    
+    def exact(self, text, normalized=False):
+        """Claves cuyo texto normalizado es idéntico"""
+        return set(self._exact.get(text if normalized else normalize(text), ()))
+    
+    def search(self, text, limit=None, normalized=False):
+        """Claves a distancia aceptable, ordenadas por (distancia, clave)"""
+        if not normalized:
+            text = normalize(text)
+        if not text:
+            return []
+        
+        compartidos = defaultdict(int)
+        for gram in trigrams(text):
+            for key in self._grams.get(gram, ()):
+                compartidos[key] += 1
+        
+        resultados = []
+        for key, shared in compartidos.items():
+            candidato = self._texts[key]
+            k = int(len(candidato) * self.max_ratio)
+            if shared < self._gram_count[key] - 3 * k:
+                continue
+            distancia = bounded_levenshtein(text, candidato, k)
+            if distancia <= k:
+                resultados.append((distancia, key))
+        
+        resultados.sort(key=lambda r: (r[0], str(r[1])))
+        return resultados[:limit] if limit else resultados
+    
+    def best(self, text, normalized=False):
+        """Mejor clave para el texto (exacta primero) o None"""
+        if not normalized:
+            text = normalize(text)
+        exactas = self._exact.get(text)
+        if exactas:
+            return min(exactas, key=str)
+        resultados = self.search(text, limit=1, normalized=True)
+        return resultados[0][1] if resultados else None
+
+class TokenIndex:
+    """Índice invertido palabra -> claves, con búsqueda por palabra completa o prefijo"""
+    
+    def __init__(self, min_len=3):
+        self.min_len = min_len  # Palabras más cortas ("de", "la") no se indexan
+        self._postings = defaultdict(set)  # palabra -> claves
+        self._words = {}  # clave -> palabras indexadas
+        self._vocab = []  # palabras ordenadas para buscar por prefijo
+        self._vocab_dirty = False
+    
+    def __len__(self):
+        return len(self._words)
+    
+    def words(self, text):
+        """Palabras indexables de un texto (normalizadas, sin repetir, en orden)"""
+        return list(dict.fromkeys(w for w in normalize(text).split() if len(w) >= self.min_len))
+    
+    def add(self, key, text):
+        """Indexar (o reindexar) las palabras de un texto"""
+        if key in self._words:
+            self.remove(key)
+        palabras = self.words(text)
+        self._words[key] = palabras
+        for palabra in palabras:
+            if palabra not in self._postings:
+                self._vocab_dirty = True
+            self._postings[palabra].add(key)
+    
+    def remove(self, key):
+        """Quitar una clave del índice"""
+        for palabra in self._words.pop(key, ()):
+            keys = self._postings.get(palabra)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[palabra]
+                    self._vocab_dirty = True
+    
+    def clear(self):
+        """Vaciar el índice"""
+        self._postings.clear()
+        self._words.clear()
+        self._vocab = []
+        self._vocab_dirty = False
+    
+    def _expand(self, palabra):
+        """Palabras del vocabulario que empiezan con `palabra`"""
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        inicio = bisect.bisect_left(self._vocab, palabra)
+        fin = bisect.bisect_left(self._vocab, palabra + "\uffff")
+        return self._vocab[inicio:fin]
+    
+    def search(self, text, prefix=False, limit=None):
+        """Claves ordenadas por palabras coincidentes: [(coincidencias, clave)]
+        
+        A igual cantidad de coincidencias gana la clave con menos palabras
+        (la coincidencia más específica).
+        """
+        coincidencias = defaultdict(int)
+        for palabra in self.words(text):
+            encontradas = set()
+            for candidata in (self._expand(palabra) if prefix else (palabra,)):
+                encontradas.update(self._postings.get(candidata, ()))
+            for key in encontradas:
+                coincidencias[key] += 1
+        
+        resultados = sorted(coincidencias.items(),
+                            key=lambda r: (-r[1], len(self._words[r[0]]), str(r[0])))
+        resultados = [(cantidad, key) for key, cantidad in resultados]
+        return resultados[:limit] if limit else resultados
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import random
+    import string
+    import time
+    from difflib import SequenceMatcher
+    
+    palabras = ["".join(random.choices(string.ascii_lowercase, k=random.randint(4, 12))) for _ in range(2000)]
+    index = FuzzyIndex()
+    for i, palabra in enumerate(palabras):
+        index.add(i, palabra)
+    
+    objetivo = palabras[1234]
+    con_error = objetivo[:2] + "x" + objetivo[3:]
+    print(f"🔎 '{con_error}' -> {[palabras[k] for _, k in index.search(con_error, limit=3)]} (buscado '{objetivo}')")
+    
+    consultas = [random.choice(palabras)[:-1] + "z" for _ in range(200)]
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        max(palabras, key=lambda p: SequenceMatcher(None, consulta, p).ratio())
+    t_difflib = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        index.best(consulta)
+    t_index = time.perf_counter() - inicio
+    print(f"⏱️ 200 búsquedas en 2000 textos: difflib {t_difflib * 1000:.0f} ms | índice {t_index * 1000:.1f} ms")
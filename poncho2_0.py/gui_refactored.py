@@ -544,7 +544,7 @@ Nota: No todos los sistemas tienen esta opción."""
     def stop_audio(self):
         """Detener audio actual"""
         if hasattr(self.mode_controller, 'poncho_controller') and hasattr(self.mode_controller.poncho_controller, 'audio_manager'):
-            self.mode_controller.poncho_controller.audio_manager.stop_audio()
+            self.mode_controller.poncho_controller.audio_manager.stop_speech()
             self.add_system_message("Audio detenido por el usuario")
     
     def clear_queue(self):
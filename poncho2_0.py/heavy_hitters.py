@@ -0,0 +1,117 @@
+import heapq
+
+class SpaceSaving:
+    """Top-K aproximado (Space-Saving) sobre un dict clave -> contador
+    
+    Guarda como mucho `capacity` claves. Cuando llega una clave nueva con la
+    tabla llena, reemplaza a la de menor contador y hereda su valor como
+    error. Todo contador sobreestima el real en como mucho total/capacity.
+    """
+    
+    def __init__(self, capacity, counts, meta):
+        self.capacity = capacity
+        self.counts = counts  # El dict que se persiste en el JSON
+        self.meta = meta  # {"errores": {...}, "total": N} también persistido
+        self.errors = meta.setdefault("errores", {})
+        meta.setdefault("total", sum(counts.values()))
+        self.trimmed = self._trim()
+        self._rebuild_heap()
+    
+    def rebind(self, counts, meta):
+        """Apuntar a una copia con los mismos valores (copy-on-write) sin reconstruir el heap"""
+        self.counts = counts
+        self.meta = meta
+        self.errors = meta.setdefault("errores", {})
+    
+    def _trim(self):
+        """Recortar a `capacity` claves (datos viejos sin límite); devuelve cuántas se quitaron"""
+        sobrantes = len(self.counts) - self.capacity
+        if sobrantes <= 0:
+            return 0
+        # Lo descartado nunca supera al mínimo conservado, que es lo que hereda el próximo desalojo
+        conservar = heapq.nlargest(self.capacity, self.counts.items(), key=lambda x: (x[1], x[0]))
+        self.counts.clear()
+        self.counts.update(conservar)
+        for clave in list(self.errors):
+            if clave not in self.counts:
+                del self.errors[clave]
+        return sobrantes
+    
+    def _rebuild_heap(self):
+        self._heap = [(valor, clave) for clave, valor in self.counts.items()]
+        heapq.heapify(self._heap)
+    
+    def _pop_min(self):
+        """Sacar la clave de menor contador (las entradas viejas del heap se saltan)"""
+        while True:
+            if not self._heap:
+                self._rebuild_heap()
+            valor, clave = heapq.heappop(self._heap)
+            if self.counts.get(clave) == valor:
+                return valor, clave
+    
+    def incr(self, clave, amount=1):
+        """Incrementar una clave y devolver su contador estimado"""
+        self.meta["total"] += amount
+        if clave in self.counts:
+            self.counts[clave] += amount
+        elif len(self.counts) < self.capacity:
+            self.counts[clave] = amount
+        else:
+            minimo, victima = self._pop_min()
+            del self.counts[victima]
+            self.errors.pop(victima, None)
+            self.counts[clave] = minimo + amount
+            self.errors[clave] = minimo
+        
+        heapq.heappush(self._heap, (self.counts[clave], clave))
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._rebuild_heap()
+        return self.counts[clave]
+    
+    def top(self, limit):
+        """Top-N en O(K)"""
+        return heapq.nlargest(limit, self.counts.items(), key=lambda x: x[1])
+    
+    def total(self):
+        """Suma exacta de todos los incrementos vistos"""
+        return self.meta["total"]
+    
+    def error_bound(self):
+        """Cota máxima de sobreestimación de cualquier contador"""
+        return self.meta["total"] / self.capacity if self.capacity else 0
+    
+    def guaranteed(self, clave):
+        """Valor mínimo garantizado de una clave"""
+        return self.counts.get(clave, 0) - self.errors.get(clave, 0)
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import random
+    import time
+    from collections import Counter
+    
+    usuarios = [f"user{i}" for i in range(50000)]
+    pesos = [1 / (i + 1) ** 1.1 for i in range(len(usuarios))]  # Zipf: pocos donan mucho
+    stream = random.choices(usuarios, weights=pesos, k=200000)
+    
+    exacto = Counter()
+    inicio = time.perf_counter()
+    for usuario in stream:
+        exacto[usuario] += 1
+    t_exacto = time.perf_counter() - inicio
+    
+    counts, meta = {}, {}
+    top_k = SpaceSaving(500, counts, meta)
+    inicio = time.perf_counter()
+    for usuario in stream:
+        top_k.incr(usuario)
+    t_top_k = time.perf_counter() - inicio
+    
+    real = [u for u, _ in exacto.most_common(10)]
+    aprox = [u for u, _ in top_k.top(10)]
+    print(f"📦 Claves guardadas: exacto {len(exacto)} | space-saving {len(counts)}")
+    print(f"🎯 Top-10 coincidente: {len(set(real) & set(aprox))}/10")
+    print(f"📏 Cota de error: {top_k.error_bound():.0f} (máx. error real en top-10: "
+          f"{max(counts[u] - exacto[u] for u in aprox)})")
+    print(f"⏱️ 200k incrementos: dict {t_exacto * 1000:.0f} ms | space-saving {t_top_k * 1000:.0f} ms")
@@ -0,0 +1,204 @@
+import threading
+from base_manager import BaseManager
+from response_handler import NormalizedComment, ACCENT_TABLE
+
+class AhoCorasick:
+    """Autómata Aho-Corasick: busca todos los patrones en una sola pasada"""
+    
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+    
+    def add(self, pattern, payload):
+        """Agregar patrón con el dato a devolver cuando aparezca"""
+        node = 0
+        for ch in pattern:
+            siguiente = self.goto[node].get(ch)
+            if siguiente is None:
+                siguiente = len(self.goto)
+                self.goto[node][ch] = siguiente
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = siguiente
+        self.out[node].append((len(pattern), payload))
+    
+    def build(self):
+        """Calcular enlaces de fallo (BFS) una vez agregados todos los patrones"""
+        cola = list(self.goto[0].values())
+        for node in cola:
+            self.fail[node] = 0
+        i = 0
+        while i < len(cola):
+            node = cola[i]
+            i += 1
+            for ch, hijo in self.goto[node].items():
+                cola.append(hijo)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                destino = self.goto[f].get(ch, 0)
+                self.fail[hijo] = destino if destino != hijo else 0
+                self.out[hijo] = self.out[hijo] + self.out[self.fail[hijo]]
+    
+    def iter_matches(self, text):
+        """Generar (inicio, fin, payload) de cada aparición"""
+        node = 0
+        goto = self.goto
+        fail = self.fail
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in self.out[node]:
+                yield i - length + 1, i + 1, payload
+
+class IntentMatcher(BaseManager):
+    """Clasificador de intenciones compilado desde intenciones.json
+    
+    Los patrones se comparan sin tildes y por palabra completa ("hi" no
+    aparece dentro de "chiste"). Un patrón que termina en "*" es prefijo:
+    "asust*" encuentra "asusta", "asustas", "asustaste".
+    """
+    
+    def __init__(self, intenciones_file="intenciones.json"):
+        self.automaton = None
+        super().__init__(intenciones_file)
+        print(f"🧭 Intent Matcher inicializado con {len(self.data.get('intenciones', {}))} intenciones")
+    
+    def _create_default_data(self):
+        """Crear tablas de palabras clave por defecto"""
+        self.data = {
+            "intenciones": {
+                "donacion_falsa": ["dono", "doné", "donate", "regalo", "te mando", "envío", "envio",
+                                   "dinero", "pesos", "dolares", "dólares", "coins", "monedas",
+                                   "tip", "propina", "gift", "present", "te doy", "aquí tienes"],
+                "cumplido": ["gracioso", "genial", "me gusta"],
+                "insulto": ["malo", "aburrido", "no me gusta"],
+                "saludo": ["hola", "hi", "hey", "saludos"],
+                "como_estas": ["como estas", "que tal", "how are you"],
+                "que_haces": ["que haces", "what are you doing"],
+                "eres_gracioso": ["gracioso", "funny", "divertido", "chistoso"],
+                "eres_malo": ["malo", "bad", "terrible"],
+                "miedo": ["miedo", "susto", "terror", "asust*"],
+                "desafio": ["no", "no me asustas", "no da miedo"],
+                "auxilio": ["ayuda", "help", "socorro"],
+                "ternura": ["lindo", "tierno", "cute"],
+                "prediccion": ["futuro", "destino", "predice", "prediccion", "que pasara",
+                               "clarividente", "adivina", "horoscopo", "suerte", "amor"],
+                "tema_prediccion": ["que va a pasar", "dinero", "trabajo", "cuando"],
+                "pista": ["pista", "ayuda", "hint"],
+                "ranking": ["ranking", "puntuacion", "puntaje"],
+                "nuevo": ["nuevo", "otro", "siguiente"],
+                "chiste": ["chiste*", "joke*", "gracioso", "divertido"],
+                "peticion_cancion": ["canta*", "canción", "cancion", "música", "musica",
+                                     "toca", "interpreta", "tema", "play", "reproduce"],
+                "parar": ["para", "stop", "detener"],
+                "pausa": ["pausa", "pause"],
+                "continuar": ["continua", "resume", "sigue"],
+                "playlist": ["playlist", "lista", "canciones"],
+                "favorita": ["favorita", "favorite"]
+            },
+            "version": "1.0"
+        }
+    
+    def load_data(self):
+        """Cargar tablas y compilar el autómata"""
+        super().load_data()
+        self._compile()
+    
+    def _compile(self):
+        """Compilar todas las palabras clave en un solo autómata"""
+        automaton = AhoCorasick()
+        for intent, patrones in self.data.get("intenciones", {}).items():
+            for patron in patrones:
+                patron = " ".join(patron.lower().translate(ACCENT_TABLE).split())
+                prefijo = patron.endswith("*")
+                patron = patron.rstrip("*")
+                if patron:
+                    automaton.add(patron, (intent, prefijo))
+        automaton.build()
+        self.automaton = automaton
+    
+    def classify(self, comment):
+        """Todas las intenciones presentes en el comentario (una sola pasada)"""
+        comment = NormalizedComment.of(comment)
+        cache = comment._intents
+        if cache is not None and cache[0] is self.automaton:
+            return cache[1]
+        
+        automaton = self.automaton
+        texto = " ".join(comment.tokens)
+        intents = set()
+        for inicio, fin, (intent, prefijo) in automaton.iter_matches(texto):
+            if intent in intents:
+                continue
+            # Límite de palabra: los tokens están separados por un solo espacio
+            if inicio > 0 and texto[inicio - 1] != " ":
+                continue
+            if not prefijo and fin < len(texto) and texto[fin] != " ":
+                continue
+            intents.add(intent)
+        
+        resultado = frozenset(intents)
+        comment._intents = (automaton, resultado)
+        return resultado
+    
+    def matches(self, comment, intent):
+        """Verificar si el comentario tiene una intención"""
+        return intent in self.classify(comment)
+    
+    def add_keyword(self, intent, keyword):
+        """Agregar palabra clave a una intención y recompilar"""
+        self.set_item("intenciones", intent, self.data.get("intenciones", {}).get(intent, []) + [keyword])
+        self._compile()
+        return f"✅ '{keyword}' agregada a la intención '{intent}'"
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+def get_intent_matcher():
+    """Obtener el matcher compartido (se compila una vez por proceso)"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = IntentMatcher()
+        return _matcher
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import time
+    from response_handler import ResponseHandler
+    
+    matcher = get_intent_matcher()
+    
+    pruebas = [
+        "cuéntame un chiste",
+        "¿Cuál es tu nombre?",
+        "hola Poncho, ¿cómo estás?",
+        "no me asustas, payaso",
+        "te mando 100 monedas jaja",
+        "cántame una canción de amor",
+        "me asustaste 😱",
+    ]
+    for texto in pruebas:
+        print(f"🧭 {texto!r} -> {sorted(matcher.classify(texto))}")
+    
+    # Comparación con los detect_keywords sueltos de antes
+    tablas = matcher.data["intenciones"]
+    comentarios = [NormalizedComment(t) for t in pruebas * 300]
+    
+    inicio = time.perf_counter()
+    for c in comentarios:
+        for patrones in tablas.values():
+            ResponseHandler.detect_keywords(c, patrones)
+    antes = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    for c in comentarios:
+        c._intents = None
+        matcher.classify(c)
+    ahora = time.perf_counter() - inicio
+    print(f"⏱️ {len(tablas)} intenciones x {len(comentarios)} comentarios: "
+          f"detect_keywords {antes * 1000:.0f} ms | autómata {ahora * 1000:.0f} ms")
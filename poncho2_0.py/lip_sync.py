@@ -0,0 +1,215 @@
+import threading
+import time
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+import pygame
+from tts_cache import get_tts_cache
+
+# Frames de boca por segundo que se envían al Arduino
+LIPSYNC_FPS = 25
+# Niveles de apertura de la boca (0 = cerrada, LIPSYNC_LEVELS - 1 = abierta del todo)
+LIPSYNC_LEVELS = 10
+# RMS (fracción de escala completa) con la que la boca queda abierta del todo
+OPEN_RMS = 0.12
+# Por debajo de este RMS la boca queda cerrada (respiraciones, silencios)
+CLOSED_RMS = 0.01
+# Extensión de la envolvente guardada junto al audio en el caché de TTS
+LIPSYNC_SUFFIX = f".lips{LIPSYNC_FPS}"
+
+class EnvelopeBuilder:
+    """Envolvente RMS por ventanas de 1/fps s, de un audio que puede llegar por partes
+    
+    Las muestras que no completan una ventana pasan a la parte siguiente,
+    así la envolvente de un audio en streaming es idéntica a la del clip
+    entero y los frames no se corren respecto del sonido.
+    """
+    
+    def __init__(self, fps=LIPSYNC_FPS, levels=LIPSYNC_LEVELS):
+        self.fps = fps
+        self.levels = levels
+        self.frames = bytearray()
+        self._resto = None
+    
+    def feed(self, sound):
+        """Agregar un Sound de pygame y devolver los frames (bytes, un nivel por byte) completos"""
+        muestras = pygame.sndarray.array(sound)
+        escala = float(np.iinfo(muestras.dtype).max) if muestras.dtype.kind in "iu" else 1.0
+        mono = muestras.astype(np.float32)
+        if mono.ndim > 1:
+            mono = mono.mean(axis=1)
+        mono /= escala
+        if self._resto is not None and len(self._resto):
+            mono = np.concatenate((self._resto, mono))
+        
+        ventana = max(1, pygame.mixer.get_init()[0] // self.fps)
+        completas = len(mono) // ventana
+        self._resto = mono[completas * ventana:]
+        return self._quantize(mono[:completas * ventana].reshape(completas, ventana))
+    
+    def flush(self):
+        """Último frame con lo que quedó"""
+        if self._resto is None or not len(self._resto):
+            return b""
+        resto, self._resto = self._resto, None
+        return self._quantize(resto.reshape(1, -1))
+    
+    def _quantize(self, ventanas):
+        if not len(ventanas):
+            return b""
+        rms = np.sqrt(np.mean(ventanas * ventanas, axis=1))
+        niveles = np.clip(np.rint(rms / OPEN_RMS * (self.levels - 1)), 0, self.levels - 1)
+        niveles[rms < CLOSED_RMS] = 0
+        frames = niveles.astype(np.uint8).tobytes()
+        self.frames.extend(frames)
+        return frames
+
+def compute_envelope(sound, fps=LIPSYNC_FPS):
+    """Envolvente completa de un Sound"""
+    builder = EnvelopeBuilder(fps)
+    return builder.feed(sound) + builder.flush()
+
+def get_envelope(sound, text=None, voice=None, params=None):
+    """Envolvente del clip: guardada junto al audio en el caché, o calculada (y guardada si el audio está cacheado)"""
+    cache = get_tts_cache()
+    if text:
+        frames = cache.get_sidecar(text, voice, LIPSYNC_SUFFIX, params)
+        if frames is not None:
+            return frames
+    frames = compute_envelope(sound)
+    if text:
+        cache.put_sidecar(text, voice, LIPSYNC_SUFFIX, frames, params)
+    return frames
+
+class LipSync:
+    """Envía los niveles de boca al Arduino a ritmo fijo, alineados con una reproducción
+    
+    El frame i se envía en started_at + i / fps de la reproducción. Los
+    frames pueden llegar de a poco (streaming); al terminar o detenerse la
+    reproducción se cierra la boca. Se mide cuánto se atrasa cada envío
+    respecto de su hora (jitter).
+    """
+    
+    def __init__(self, send, fps=LIPSYNC_FPS, name="LipSync"):
+        self.send = send  # callable(nivel)
+        self.fps = fps
+        self.name = name
+        self._frames = bytearray()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self.sent = 0
+        self.skipped = 0  # Frames que ya habían pasado al llegar (se saltean)
+        self._delays = []
+    
+    def feed(self, frames):
+        with self._cond:
+            self._frames.extend(frames)
+            self._cond.notify()
+    
+    def close(self):
+        """No vendrán más frames"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+    
+    def start(self, playback):
+        self._thread = threading.Thread(target=self._run, args=(playback,), name=self.name, daemon=True)
+        self._thread.start()
+        return self
+    
+    def _run(self, playback):
+        indice = 0
+        ultimo = None
+        try:
+            while not playback.done():
+                with self._cond:
+                    while indice >= len(self._frames) and not self._closed and not playback.done():
+                        # Esperando frames del streaming (o el final)
+                        self._cond.wait(1.0 / self.fps)
+                    if indice >= len(self._frames):
+                        break
+                    nivel = self._frames[indice]
+                if playback.started_at is None:
+                    # Todavía no empezó a sonar (esperando la primera parte)
+                    playback.wait(1.0 / self.fps)
+                    continue
+                
+                objetivo = playback.started_at + indice / self.fps
+                espera = objetivo - time.monotonic()
+                if espera > 0:
+                    # wait() del future: si se detiene la reproducción, despierta en el acto
+                    playback.wait(espera)
+                    if playback.done():
+                        break
+                atraso = time.monotonic() - objetivo
+                if atraso > 1.0 / self.fps:
+                    # Muy atrasado (el hilo no corrió a tiempo): saltar al frame que corresponde ahora
+                    siguiente = int((time.monotonic() - playback.started_at) * self.fps)
+                    self.skipped += max(0, siguiente - indice)
+                    indice = max(indice + 1, siguiente)
+                    continue
+                
+                if self.send(nivel) is False:
+                    break  # Arduino desconectado
+                ultimo = nivel
+                self._delays.append(atraso)
+                self.sent += 1
+                indice += 1
+        except Exception as e:
+            print(f"❌ Error en lip-sync: {e}")
+        finally:
+            if ultimo:
+                self.send(0)  # Cerrar la boca
+            self._report()
+    
+    def _report(self):
+        stats = self.get_stats()
+        if stats['frames']:
+            print(f"👄 Lip-sync: {stats['frames']} frames a {self.fps} fps | jitter medio {stats['jitter_avg_ms']} ms, "
+                  f"p95 {stats['jitter_p95_ms']} ms, máx {stats['jitter_max_ms']} ms | salteados {self.skipped}")
+    
+    def get_stats(self):
+        """Atraso de cada frame respecto de su hora"""
+        atrasos = sorted(self._delays)
+        return {
+            'frames': self.sent,
+            'skipped': self.skipped,
+            'jitter_avg_ms': round(sum(atrasos) / len(atrasos) * 1000, 1) if atrasos else 0,
+            'jitter_p95_ms': round(atrasos[int(len(atrasos) * 0.95)] * 1000, 1) if atrasos else 0,
+            'jitter_max_ms': round(atrasos[-1] * 1000, 1) if atrasos else 0
+        }
+    
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    from playback_engine import get_playback_engine
+    
+    pygame.mixer.init()
+    frecuencia, bits, canales = pygame.mixer.get_init()
+    if not HAS_NUMPY:
+        print("⚠️ NumPy no disponible - lip-sync deshabilitado")
+    else:
+        # Dos segundos de "sílabas": un tono que sube y baja 4 veces por segundo
+        t = np.arange(frecuencia * 2) / frecuencia
+        onda = np.sin(2 * np.pi * 220 * t) * np.abs(np.sin(2 * np.pi * 2 * t)) * 0.3
+        muestras = (onda * 32767).astype(np.int16)
+        if canales > 1:
+            muestras = np.repeat(muestras[:, None], canales, axis=1)
+        sonido = pygame.sndarray.make_sound(np.ascontiguousarray(muestras))
+        
+        inicio = time.perf_counter()
+        frames = compute_envelope(sonido)
+        print(f"👄 Envolvente: {len(frames)} frames en {(time.perf_counter() - inicio) * 1000:.1f} ms: {list(frames[:12])}")
+        
+        playback = get_playback_engine().play(sonido)
+        lips = LipSync(lambda nivel: None).start(playback)
+        lips.feed(frames)
+        lips.close()
+        playback.wait()
+        lips.join()
@@ -9,7 +9,7 @@ from TikTokLive.events import ConnectEvent, CommentEvent, GiftEvent
 
 # Importar módulos refactorizados
 from base_manager import BaseManager
-from response_handler import ResponseHandler
+from response_handler import ResponseHandler, NormalizedComment
 from audio_manager import ArduinoAudioManager, AudioListener
 from mode_controller import ModeController
 from chistes_refactored import ChisteManager
@@ -20,6 +20,8 @@ from cantante_refactored import CantanteManager
 from conversacion_publico import ConversacionPublicoManager
 from conversacion_invitado import ConversacionInvitadoManager
 from dual_robot_controller import DualRobotController
+from sqlite_storage import SQLiteStorage
+from manager_registry import ManagerRegistry
 from gui_refactored import RefactoredGUI
 
 # Configuración
@@ -150,20 +152,24 @@ class RefactoredNPCApp:
         self.setup_openai()
         self.setup_tiktok()
         
-        # Inicializar managers usando clases refactorizadas
-        self.managers = {
-            'chistes': ChisteManager(),
-            'acertijos': AcertijoManager(), 
-            'amenazas': AmenazasManager(),
-            'clarividente': ClarividenteManager(),
-            'cantante': CantanteManager(),
-            'conversacion_publico': ConversacionPublicoManager(),
-            'conversacion_invitado': ConversacionInvitadoManager()
-        }
-        
-        print("✅ Managers inicializados:")
+        # Tablas por usuario (ganadores, víctimas, donantes, predicciones) en SQLite
+        self.storage = SQLiteStorage("poncho_stats.db")
+        
+        # Inicializar managers en paralelo; cada modo espera solo por el suyo
+        self.managers = ManagerRegistry({
+            'chistes': ChisteManager,
+            'acertijos': lambda: AcertijoManager(storage=self.storage), 
+            'amenazas': lambda: AmenazasManager(storage=self.storage),
+            'clarividente': lambda: ClarividenteManager(storage=self.storage),
+            'cantante': CantanteManager,
+            'conversacion_publico': ConversacionPublicoManager,
+            'conversacion_invitado': ConversacionInvitadoManager
+        })
+        
+        print("⏳ Managers inicializándose en segundo plano:")
         for name in self.managers.keys():
             print(f"  - {name}")
+        threading.Thread(target=self.managers.wait_all, daemon=True).start()  # Reporta tiempos al terminar
         
         # NO crear audio_manager aquí - dejar que cada robot cree el suyo
         self.audio_listener = AudioListener(self.handle_audio_input)
@@ -173,7 +179,8 @@ class RefactoredNPCApp:
             self.managers,
             audio_manager=None,  # Cada robot creará el suyo
             openai_client=self.openai_client,
-            arduino_controller=self.arduino_controller  # Pasar arduino controller
+            arduino_controller=self.arduino_controller,  # Pasar arduino controller
+            storage=self.storage
         )
         
         # Para compatibilidad, usar el audio manager de Poncho como principal
@@ -254,7 +261,7 @@ class RefactoredNPCApp:
         @self.tiktok_client.on(CommentEvent)
         async def on_comment(event):
             username = ResponseHandler.clean_text(event.user.nickname)
-            comment = ResponseHandler.clean_text(event.comment)
+            comment = NormalizedComment(event.comment)  # Se normaliza una sola vez
             
             if username and comment:
                 self.handle_comment(username, comment, "comment")
@@ -277,15 +284,15 @@ class RefactoredNPCApp:
         
         # Solo agregar a GUI los comentarios normales (no regalos)
         if msg_type != "gift":
-            self.root.after(0, lambda: self.gui.add_comment(username, comment, msg_type))
+            self.root.after(0, lambda: self.gui.add_comment(username, str(comment), msg_type))
             print(f"💬 {msg_type.upper()}: {username} -> {comment}")
         # Los regalos se manejan en on_gift_received
     
     def handle_audio_input(self, text):
         """Manejar entrada de audio"""
-        clean_text = ResponseHandler.clean_text(text)
-        if clean_text:
-            self.handle_comment("Audio", clean_text, "audio")
+        comment = NormalizedComment(text)
+        if comment:
+            self.handle_comment("Audio", comment, "audio")
     
     def on_gift_received(self, event_type, username, gift_info, response):
         """Callback para cuando el robot de regalos procesa un regalo"""
@@ -485,6 +492,8 @@ class RefactoredNPCApp:
             
             # Limpiar sistema dual
             self.dual_controller.cleanup()
+            self.managers.shutdown()
+            self.storage.close()
             print("✅ Recursos limpiados correctamente")
             
         except Exception as e:
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+class ManagerRegistry(Mapping):
+    """Diccionario de managers que se construyen en paralelo o al primer acceso"""
+    
+    def __init__(self, factories, lazy=(), max_workers=4):
+        self._factories = dict(factories)
+        self._lazy = set(lazy)
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ManagerInit")
+        self.timings = {}  # nombre -> segundos que tardó en construirse
+        self._start_time = time.perf_counter()
+        
+        # Los que no son lazy arrancan ya en el pool
+        for name in self._factories:
+            if name not in self._lazy:
+                self._submit(name)
+    
+    def _submit(self, name):
+        """Encolar la construcción de un manager (solo una vez)"""
+        with self._lock:
+            future = self._futures.get(name)
+            if future is None:
+                future = self._executor.submit(self._build, name)
+                self._futures[name] = future
+            return future
+    
+    def _build(self, name):
+        """Construir un manager midiendo cuánto tarda"""
+        start = time.perf_counter()
+        try:
+            manager = self._factories[name]()
+        except Exception as e:
+            print(f"❌ Error inicializando manager '{name}': {e}")
+            raise
+        self.timings[name] = time.perf_counter() - start
+        print(f"⏱️ Manager '{name}' listo en {self.timings[name] * 1000:.0f} ms")
+        return manager
+    
+    def __getitem__(self, name):
+        if name not in self._factories:
+            raise KeyError(name)
+        future = self._submit(name)
+        try:
+            return future.result()
+        except Exception:
+            # Olvidar el intento fallido: el próximo acceso vuelve a construirlo
+            with self._lock:
+                if self._futures.get(name) is future:
+                    del self._futures[name]
+            raise
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self):
+        return len(self._factories)
+    
+    def is_loaded(self, name):
+        """Verificar si un manager ya terminó de construirse sin bloquear"""
+        future = self._futures.get(name)
+        return future is not None and future.done() and future.exception() is None
+    
+    def loaded(self):
+        """Managers ya construidos (no dispara la carga de los lazy)"""
+        return {name: self._futures[name].result() for name in self._factories if self.is_loaded(name)}
+    
+    def wait_all(self):
+        """Esperar a que terminen los managers en curso y reportar tiempos"""
+        for name in self._factories:
+            future = self._futures.get(name)
+            if future is not None:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+        print(self.get_timing_report())
+    
+    def get_timing_report(self):
+        """Resumen de tiempos de arranque por manager"""
+        report = "⏱️ Tiempos de inicialización de managers:\n"
+        for name in self._factories:
+            if name in self.timings:
+                report += f"  - {name}: {self.timings[name] * 1000:.0f} ms\n"
+            elif name in self._lazy and name not in self._futures:
+                report += f"  - {name}: pendiente (se carga al usarlo)\n"
+            else:
+                report += f"  - {name}: en curso o con error\n"
+        if self.timings:
+            total = time.perf_counter() - self._start_time
+            report += f"  Suma secuencial: {sum(self.timings.values()) * 1000:.0f} ms | Reloj: {total * 1000:.0f} ms"
+        return report
+    
+    def shutdown(self):
+        """Liberar el pool de hilos"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    def lento(nombre, segundos):
+        def factory():
+            time.sleep(segundos)
+            return nombre
+        return factory
+    
+    intentos = []
+    
+    def inestable():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise RuntimeError("archivo bloqueado")
+        return "inestable"
+    
+    registry = ManagerRegistry({
+        "inestable": inestable,
+        "uno": lento("uno", 0.3),
+        "dos": lento("dos", 0.3),
+        "tres": lento("tres", 0.3),
+        "cuatro": lento("cuatro", 0.2),
+    }, lazy=["cuatro"])
+    
+    print(f"🔎 Acceso a 'dos': {registry['dos']}")
+    registry.wait_all()
+    print(f"🔎 Cargados: {list(registry.loaded())}")
+    print(f"🔎 Acceso lazy a 'cuatro': {registry['cuatro']}")
+    try:
+        registry['inestable']
+    except RuntimeError:
+        pass
+    print(f"🔎 Reintento de 'inestable' tras el error: {registry['inestable']}")
+    print(registry.get_timing_report())
+    registry.shutdown()
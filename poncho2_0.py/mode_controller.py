@@ -1,10 +1,16 @@
 import threading
 import time
 from collections import deque
+from response_handler import NormalizedComment
+from intent_matcher import get_intent_matcher
+from viewer_profiles import get_viewer_profiles
 
 class ModeController:
     """Controlador común para manejar cambios de modo"""
     
+    # Modo -> manager cuyo texto inicial (prerender_texts) conviene sintetizar por adelantado
+    PRERENDER_MANAGERS = {2: 'chistes', 3: 'clarividente', 4: 'acertijos', 5: 'amenazas'}
+    
     def __init__(self, managers_dict, audio_manager=None, openai_client=None):
         self.managers = managers_dict
         self.audio_manager = audio_manager
@@ -15,6 +21,10 @@ class ModeController:
         self.queue_lock = threading.Lock()
         self.is_processing = False
         
+        # Atender los comentarios que llegaron mientras hablaba apenas termine
+        if audio_manager and hasattr(audio_manager, 'add_finished_callback'):
+            audio_manager.add_finished_callback(self._on_audio_finished)
+        
         # Historial para chat
         self.chat_history = [
             {"role": "system", "content": (
@@ -37,9 +47,12 @@ class ModeController:
         if new_mode == self.current_mode:
             return
         
-        # Detener audio actual
+        # Detener audio actual (y lo que quedaba en cola para el modo anterior)
         if self.audio_manager:
-            self.audio_manager.stop_audio()
+            if hasattr(self.audio_manager, 'stop_speech'):
+                self.audio_manager.stop_speech()
+            else:
+                self.audio_manager.stop_audio()
         
         # Limpiar cola
         with self.queue_lock:
@@ -86,13 +99,25 @@ class ModeController:
     
     def add_comment(self, username, comment, msg_type="comment"):
         """Agregar comentario a la cola de procesamiento"""
+        comment = NormalizedComment.of(comment)
+        # Una sola consulta al perfil por comentario: viaja en la cola hasta los handlers
+        # (los regalos se cuentan al procesarlos)
+        if msg_type == "gift":
+            profile = get_viewer_profiles().get(username)
+        else:
+            profile = get_viewer_profiles().seen(username)
         with self.queue_lock:
-            self.comment_queue.append((username, comment, msg_type))
+            self.comment_queue.append((username, comment, msg_type, profile))
         
         # Procesar si no está ocupado
         if not self.is_processing and not self.audio_manager.is_audio_playing():
             threading.Thread(target=self._process_queue, daemon=True).start()
     
+    def _on_audio_finished(self):
+        """El audio terminó: procesar la cola si quedaron comentarios esperando"""
+        if self.comment_queue and not self.is_processing:
+            threading.Thread(target=self._process_queue, daemon=True).start()
+    
     def _process_queue(self):
         """Procesar cola de comentarios"""
         if self.is_processing:
@@ -115,7 +140,7 @@ class ModeController:
             response = self._process_comments_batch(comments_batch)
             
             if response:
-                self._speak_response(response)
+                self._speak_response(response, self._speech_kind(comments_batch))
         
         except Exception as e:
             print(f"❌ Error procesando cola: {e}")
@@ -157,7 +182,7 @@ class ModeController:
         has_real_gifts = False
         has_fake_donations = False
         
-        for username, comment, msg_type in comments_batch:
+        for username, comment, msg_type, _ in comments_batch:
             if msg_type == "gift":
                 messages_text += f"- {username} envió regalo REAL: {comment}\n"
                 has_real_gifts = True
@@ -195,18 +220,15 @@ class ModeController:
     def _handle_clarividente_mode(self, comments_batch):
         """Manejar modo clarividente"""
         # Buscar peticiones de predicción
-        for username, comment, msg_type in reversed(comments_batch):
-            prediction_keywords = [
-                "futuro", "destino", "predice", "prediccion", "que pasara",
-                "clarividente", "adivina", "horoscopo", "suerte", "amor"
-            ]
-            if any(keyword in comment.lower() for keyword in prediction_keywords):
-                return self.managers['clarividente'].get_prediccion_for_user(username)
+        matcher = get_intent_matcher()
+        for username, comment, msg_type, profile in reversed(comments_batch):
+            if matcher.matches(comment, "prediccion"):
+                return self.managers['clarividente'].get_prediccion_for_user(username, profile)
         
         # Respuesta mística general
         if comments_batch:
-            username = comments_batch[-1][0]
-            return self.managers['clarividente'].responder_a_comentario(username, "general")
+            username, _, _, profile = comments_batch[-1]
+            return self.managers['clarividente'].responder_a_comentario(username, "general", profile)
         
         return self.managers['clarividente'].get_prediccion_generica()
     
@@ -216,17 +238,20 @@ class ModeController:
         
         # Si hay acertijo activo, verificar respuestas
         if acertijos_manager.acertijo_actual:
-            for username, comment, msg_type in comments_batch:
-                # Comandos especiales
-                if any(cmd in comment.lower() for cmd in ["pista", "ayuda", "hint"]):
-                    return acertijos_manager.dar_pista()
-                
-                # Verificar respuesta
-                resultado = acertijos_manager.verificar_respuesta(username, comment)
-                if "Correcto" in resultado or "correcto" in resultado:
-                    return resultado
+            matcher = get_intent_matcher()
+            respuestas = []
+            for username, comment, msg_type, profile in comments_batch:
+                # Los pedidos de pista no son respuestas; las demás se verifican igual
+                if matcher.matches(comment, "pista"):
+                    continue
+                respuestas.append((username, comment, profile))
+            
+            # Verificar todas las respuestas; gana la primera en llegar
+            resultado = acertijos_manager.verificar_lote(respuestas)
+            if resultado:
+                return resultado
             
-            # Nadie acertó, dar pista
+            # Nadie acertó (o pidieron pista), dar pista
             return acertijos_manager.dar_pista()
         else:
             # No hay acertijo activo
@@ -235,8 +260,8 @@ class ModeController:
     def _handle_amenazas_mode(self, comments_batch):
         """Manejar modo amenazas"""
         if comments_batch:
-            username, comment, msg_type = comments_batch[-1]
-            return self.managers['amenazas'].responder_comentario_terrorificamente(username, comment)
+            username, comment, msg_type, profile = comments_batch[-1]
+            return self.managers['amenazas'].responder_comentario_terrorificamente(username, comment, profile)
         
         return self.managers['amenazas'].get_amenaza_aleatoria()
     
@@ -245,7 +270,7 @@ class ModeController:
         cantante_manager = self.managers['cantante']
         
         # Buscar peticiones de canciones
-        for username, comment, msg_type in comments_batch:
+        for username, comment, msg_type, _ in comments_batch:
             resultado = cantante_manager.handle_song_request(comment)
             if resultado:
                 return resultado
@@ -264,13 +289,26 @@ class ModeController:
         from response_handler import ResponseHandler
         return ResponseHandler.detect_fake_donation(comment_text)
     
-    def _speak_response(self, response):
+    def _speech_kind(self, comments_batch):
+        """Prioridad de la respuesta según lo que traía el lote"""
+        if any(msg_type == "gift" for _, _, msg_type, _ in comments_batch):
+            return "gift"
+        for _, comment, _, _ in comments_batch:
+            # Pregunta directa: con signo de pregunta o nombrando a Poncho
+            if "?" in comment.clean or "poncho" in comment.token_set:
+                return "question"
+        return "chat"
+    
+    def _speak_response(self, response, kind="chat"):
         """Reproducir respuesta usando audio manager"""
         if self.audio_manager and response:
             # Limpiar texto antes de hablar
             from response_handler import ResponseHandler
             clean_response = ResponseHandler.clean_text(response)
-            self.audio_manager.speak_text(clean_response)
+            if hasattr(self.audio_manager, 'say'):
+                self.audio_manager.say(clean_response, kind)
+            else:
+                self.audio_manager.speak_text(clean_response)
     
     def get_current_mode(self):
         """Obtener modo actual"""
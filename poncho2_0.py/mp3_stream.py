@@ -0,0 +1,136 @@
+# Tablas del encabezado MPEG de audio (solo Layer III, lo que entrega edge-tts)
+_BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0]
+_BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0]
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def frame_info(header):
+    """(bytes, segundos) de un frame MP3 a partir de sus 4 bytes de encabezado, o None"""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03  # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer = (header[1] >> 1) & 0x03  # 1 = Layer III
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or rate_index == 3:
+        return None
+
+    bitrates = _BITRATES_MPEG1 if version == 3 else _BITRATES_MPEG2
+    bitrate = bitrates[bitrate_index] * 1000
+    if not bitrate:
+        return None
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    samples = 1152 if version == 3 else 576
+    length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples / sample_rate
+
+def mp3_duration(data):
+    """Duración en segundos de un MP3 completo, sumando sus frames"""
+    pos = 0
+    # Etiqueta ID3v2 al principio (puede traer la carátula): saltarla entera
+    if data[:3] == b"ID3" and len(data) >= 10:
+        pos = 10 + ((data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F))
+    segundos = 0.0
+    while pos + 4 <= len(data):
+        info = frame_info(data[pos:pos + 4])
+        if info is None:
+            pos = data.find(b"\xff", pos + 1)
+            if pos == -1:
+                break
+            continue
+        pos += info[0]
+        segundos += info[1]
+    return segundos
+
+class Mp3FrameSplitter:
+    """Corta un flujo MP3 que llega por partes en frames completos
+
+    Los pedazos que entrega edge-tts no respetan los límites de frame; este
+    separador guarda el resto incompleto hasta el próximo pedazo y descarta
+    lo que no sea audio (etiquetas ID3, basura) buscando el siguiente sync.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.frames = 0
+        self.seconds = 0.0
+
+    def feed(self, data):
+        """Agregar bytes y devolver [(frame, segundos)] completos"""
+        self._buffer.extend(data)
+        buffer = self._buffer
+        frames = []
+        pos = 0
+        while len(buffer) - pos >= 4:
+            info = frame_info(buffer[pos:pos + 4])
+            if info is None:
+                siguiente = buffer.find(b"\xff", pos + 1)
+                pos = siguiente if siguiente != -1 else len(buffer)
+                continue
+            length, seconds = info
+            if len(buffer) - pos < length:
+                break
+            frames.append((bytes(buffer[pos:pos + length]), seconds))
+            self.frames += 1
+            self.seconds += seconds
+            pos += length
+        del buffer[:pos]
+        return frames
+
+class Mp3Segmenter:
+    """Agrupa frames en segmentos reproducibles: el primero corto, los demás más largos"""
+
+    def __init__(self, first_seconds=0.4, seconds=1.5):
+        self.first_seconds = first_seconds
+        self.seconds = seconds
+        self.splitter = Mp3FrameSplitter()
+        self._frames = []
+        self._duration = 0.0
+        self.segments = 0
+
+    def feed(self, data):
+        """Agregar bytes del flujo y devolver los segmentos (bytes MP3) que se completaron"""
+        segmentos = []
+        objetivo = self.first_seconds if self.segments == 0 else self.seconds
+        for frame, seconds in self.splitter.feed(data):
+            self._frames.append(frame)
+            self._duration += seconds
+            if self._duration >= objetivo:
+                segmentos.append(self._take())
+                objetivo = self.seconds
+        return segmentos
+
+    def flush(self):
+        """Último segmento con lo que quedó, o None"""
+        return self._take() if self._frames else None
+
+    def _take(self):
+        segmento = b"".join(self._frames)
+        self._frames = []
+        self._duration = 0.0
+        self.segments += 1
+        return segmento
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import time
+
+    # Frame MPEG2 Layer III de 48 kbps a 24 kHz (lo que usa edge-tts): 144 bytes, 24 ms
+    header = bytes([0xFF, 0xF3, 0x64, 0xC4])
+    print(f"🎵 frame_info: {frame_info(header)}")
+    frame = header + bytes(frame_info(header)[0] - 4)
+    print(f"🎵 mp3_duration de 417 frames: {mp3_duration(frame * 417):.3f} s")
+
+    # 10 segundos de audio llegando en pedazos de 1000 bytes
+    flujo = b"ID3" + bytes(20) + frame * 417
+    segmenter = Mp3Segmenter()
+    inicio = time.perf_counter()
+    tamanos = []
+    for i in range(0, len(flujo), 1000):
+        tamanos.extend(len(s) for s in segmenter.feed(flujo[i:i + 1000]))
+    final = segmenter.flush()
+    if final:
+        tamanos.append(len(final))
+    total = time.perf_counter() - inicio
+    print(f"🎵 {segmenter.splitter.frames} frames, {segmenter.splitter.seconds:.2f} s en {len(tamanos)} segmentos "
+          f"(primero {tamanos[0]} bytes) en {total * 1000:.2f} ms")
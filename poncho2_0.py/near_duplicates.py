@@ -0,0 +1,180 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from fuzzy_index import normalize, trigrams
+
+class MinHasher:
+    """Firma MinHash de un conjunto de shingles (estima similitud de Jaccard)
+    
+    Cada función hash es el crc32 del shingle con XOR de una máscara fija:
+    barato y suficiente para repartir en bandas LSH, porque los candidatos
+    se confirman después con el Jaccard exacto.
+    """
+    
+    def __init__(self, num_hashes=24, seed=1):
+        self.num_hashes = num_hashes
+        # Máscaras fijas: la misma pregunta da la misma firma entre ejecuciones
+        estado = seed
+        self._masks = []
+        for _ in range(num_hashes):
+            estado = (estado * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            self._masks.append(estado >> 32)
+    
+    def signature(self, shingles):
+        """Mínimo de cada función hash sobre los shingles"""
+        if not shingles:
+            return (0,) * self.num_hashes
+        valores = [zlib.crc32(s.encode()) for s in shingles]
+        return tuple(min(v ^ mask for v in valores) for mask in self._masks)
+
+class NearDuplicateTable:
+    """Contador de preguntas casi repetidas: MinHash + LSH, con TTL y límite LRU
+    
+    Cada pregunta se convierte en los trigramas de sus palabras (sin importar
+    el orden), se firma con MinHash y se reparte en bandas LSH. Las preguntas
+    que comparten una banda son candidatas y se confirman con su Jaccard real.
+    Las entradas que no se ven en `ttl` segundos expiran, y si la tabla pasa
+    de `max_entries` se desaloja la usada hace más tiempo.
+    """
+    
+    # Artículos y el nombre del payaso no distinguen una pregunta de otra
+    # (los interrogativos sí: "¿cómo estás?" y "¿qué estás haciendo?" son preguntas distintas)
+    STOPWORDS = frozenset(["el", "la", "de", "es", "por", "poncho", "payaso"])
+    
+    def __init__(self, max_entries=2000, ttl=1800, threshold=0.6, bands=12, rows=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold  # Jaccard mínimo para considerar dos preguntas iguales
+        self.bands = bands
+        self.rows = rows
+        self._hasher = MinHasher(bands * rows)
+        self._entries = OrderedDict()  # clave -> entrada, de menos a más reciente
+        self._buckets = defaultdict(set)  # (banda, valores) -> claves
+        self._lock = threading.Lock()
+        self._next_key = 0
+        self.evicted = 0
+    
+    def shingles(self, text):
+        """Trigramas de cada palabra con contenido (el orden de las palabras no importa)"""
+        palabras = [w for w in normalize(text).split() if w not in self.STOPWORDS]
+        resultado = set()
+        for palabra in palabras:
+            resultado |= trigrams(palabra)
+        return frozenset(resultado)
+    
+    def _band_keys(self, signature):
+        r = self.rows
+        return [(i, signature[i * r:(i + 1) * r]) for i in range(self.bands)]
+    
+    def key_for(self, text):
+        """Clave de la pregunta equivalente ya vista, o una nueva con contador 0"""
+        shingles = self.shingles(text)
+        # Sin shingles (solo emojis o stopwords) no hay con qué comparar: nunca es repetida
+        bandas = self._band_keys(self._hasher.signature(shingles)) if shingles else []
+        ahora = time.monotonic()
+        
+        with self._lock:
+            self._expire(ahora)
+            
+            mejor, mejor_jaccard = None, self.threshold
+            candidatos = set()
+            for banda in bandas:
+                candidatos |= self._buckets.get(banda, set())
+            for key in candidatos:
+                otros = self._entries[key]["shingles"]
+                jaccard = len(shingles & otros) / len(shingles | otros)
+                if jaccard >= mejor_jaccard:
+                    mejor, mejor_jaccard = key, jaccard
+            
+            if mejor is not None:
+                self._entries[mejor]["visto"] = ahora
+                self._entries.move_to_end(mejor)
+                return mejor
+            
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = {"shingles": shingles, "bandas": bandas, "count": 0,
+                                  "visto": ahora, "texto": str(text)[:60]}
+            for banda in bandas:
+                self._buckets[banda].add(key)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+            return key
+    
+    def __getitem__(self, key):
+        entry = self._entries.get(key)
+        return entry["count"] if entry else 0
+    
+    def increment(self, key, amount=1):
+        """Sumar repeticiones a una pregunta (si no expiró mientras tanto)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return 0
+            entry["count"] += amount
+            return entry["count"]
+    
+    def _evict_oldest(self):
+        key, entry = self._entries.popitem(last=False)
+        for banda in entry["bandas"]:
+            keys = self._buckets.get(banda)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[banda]
+        self.evicted += 1
+    
+    def _expire(self, ahora):
+        """Quitar las entradas más viejas que el TTL (están al principio)"""
+        limite = ahora - self.ttl
+        while self._entries:
+            primera = next(iter(self._entries.values()))
+            if primera["visto"] >= limite:
+                break
+            self._evict_oldest()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def top(self, limit=5):
+        """Preguntas más repetidas: [(texto de ejemplo, contador)]"""
+        with self._lock:
+            entradas = sorted(self._entries.values(), key=lambda e: e["count"], reverse=True)
+            return [(e["texto"], e["count"]) for e in entradas[:limit] if e["count"] > 0]
+    
+    def clear(self):
+        """Olvidar todas las preguntas"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._buckets.clear()
+            return count
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import hashlib
+    import random
+    import string
+    
+    tabla = NearDuplicateTable(max_entries=500, ttl=1800)
+    
+    variantes = ["¿Cómo estás?", "como estas???", "¿cómo estás poncho?", "Como estaas",
+                 "¿Qué estás haciendo poncho?", "¿Qué haces?", "que haces payaso", "¿Estás bien?", "🔥🔥", "👻"]
+    for texto in variantes:
+        key = tabla.key_for(texto)
+        tabla.increment(key)
+        print(f"🔁 {texto!r} -> grupo {key} ({tabla[key]} veces)")
+    
+    # Con md5 de palabras ordenadas cada variante era una pregunta distinta
+    md5s = {hashlib.md5(" ".join(sorted(t.lower().split())).encode()).hexdigest() for t in variantes}
+    print(f"📊 Grupos: md5 {len(md5s)} | minhash {len(tabla)}")
+    
+    # Memoria plana con miles de preguntas únicas
+    inicio = time.perf_counter()
+    for _ in range(20000):
+        texto = " ".join("".join(random.choices(string.ascii_lowercase, k=5)) for _ in range(4))
+        tabla.increment(tabla.key_for(texto))
+    total = time.perf_counter() - inicio
+    print(f"📦 20000 preguntas únicas: {len(tabla)} entradas, {tabla.evicted} desalojadas, "
+          f"{total / 20000 * 1e6:.0f} µs por pregunta")
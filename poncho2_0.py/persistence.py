@@ -0,0 +1,196 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import weakref
+
+# Intervalo por defecto entre volcados a disco (segundos)
+FLUSH_INTERVAL_SECONDS = 2.0
+
+# Compactación del journal: cada cuánto tiempo o tras cuántos registros
+JOURNAL_COMPACT_SECONDS = 300
+JOURNAL_COMPACT_RECORDS = 5000
+
+def atomic_write_text(path, text):
+    """Escribir archivo de forma atómica (archivo temporal + rename)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea el archivo con permisos 0600; conservar los del original
+        os.chmod(temp_path, _target_mode(path))
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def _target_mode(path):
+    """Permisos que debe tener el archivo final"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+class WriteBehindFlusher:
+    """Hilo único que vuelca a disco los managers con cambios pendientes"""
+    
+    def __init__(self, interval=FLUSH_INTERVAL_SECONDS):
+        self.interval = interval
+        self._managers = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def register(self, manager):
+        """Registrar manager con cambios pendientes e iniciar el hilo si hace falta"""
+        with self._lock:
+            self._managers.add(manager)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="WriteBehindFlusher", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        """Loop del hilo: volcar cada `interval` segundos hasta que se detenga"""
+        while not self._stop_event.wait(self.interval):
+            self.flush_all(force=False)
+    
+    def flush_all(self, force=True):
+        """Volcar todos los managers registrados (force=True compacta también los journals)"""
+        with self._lock:
+            managers = list(self._managers)
+        
+        for manager in managers:
+            try:
+                manager.flush(force=force)
+            except Exception as e:
+                print(f"❌ Error volcando {manager.__class__.__name__}: {e}")
+    
+    def stop(self):
+        """Detener el hilo y hacer un último volcado"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 1)
+        self.flush_all()
+
+class EventJournal:
+    """Journal append-only (una línea JSON por cambio) para un archivo de datos"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.rotated_path = f"{path}.old"
+        self.seq = 0  # Último número de secuencia asignado
+        self.pending = 0  # Registros escritos desde la última compactación
+        self._file = None
+    
+    def append(self, change):
+        """Agregar un cambio al journal y devolver su número de secuencia"""
+        self.seq += 1
+        record = dict(change)
+        record["seq"] = self.seq
+        
+        f = self._open()
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        self.pending += 1
+        return self.seq
+    
+    def _open(self):
+        """Abrir journal en modo append, reparando una última línea truncada"""
+        if self._file is None:
+            needs_newline = False
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(0, os.SEEK_END)
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        needs_newline = f.read(1) != b"\n"
+            except FileNotFoundError:
+                pass
+            
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if needs_newline:
+                self._file.write("\n")
+        return self._file
+    
+    def read_records(self, after_seq=0):
+        """Leer registros con secuencia mayor que `after_seq` (rotado primero, luego actual)"""
+        records = []
+        for path in (self.rotated_path, self.path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # Línea incompleta por un corte a mitad de escritura
+                            continue
+                        if record.get("seq", 0) > after_seq:
+                            records.append(record)
+            except FileNotFoundError:
+                pass
+        
+        records.sort(key=lambda r: r["seq"])
+        if records:
+            self.seq = max(self.seq, records[-1]["seq"])
+        self.seq = max(self.seq, after_seq)
+        self.pending = len(records)
+        return records
+    
+    def rotate(self):
+        """Apartar el journal actual mientras se escribe el snapshot compactado"""
+        self.close()
+        if os.path.exists(self.path):
+            if os.path.exists(self.rotated_path):
+                # Una compactación anterior falló: acumular en el rotado
+                with open(self.path, 'r', encoding='utf-8') as src, \
+                        open(self.rotated_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.unlink(self.path)
+            else:
+                os.replace(self.path, self.rotated_path)
+        self.pending = 0
+    
+    def discard_rotated(self):
+        """Eliminar el journal rotado una vez que el snapshot quedó en disco"""
+        try:
+            os.unlink(self.rotated_path)
+        except FileNotFoundError:
+            pass
+    
+    def close(self):
+        """Cerrar el archivo del journal"""
+        if self._file:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+def get_flusher():
+    """Obtener el flusher compartido del proceso"""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = WriteBehindFlusher()
+            atexit.register(_flusher.stop)
+        return _flusher
+
+def flush_all_managers():
+    """Volcar todos los cambios pendientes (usar al cerrar la aplicación)"""
+    get_flusher().flush_all()
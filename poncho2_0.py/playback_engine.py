@@ -0,0 +1,289 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import pygame
+
+# Al llegar la hora de fin, si el mixer sigue ocupado se vuelve a mirar tras este margen
+END_RECHECK_SECONDS = 0.02
+# Máximo que se espera de más a que el mixer suelte el canal antes de darla por terminada
+END_GRACE_SECONDS = 0.5
+# Música sin duración conocida: cada cuánto se consulta el mixer
+UNKNOWN_LENGTH_POLL_SECONDS = 0.25
+
+class Playback:
+    """Una reproducción en curso; `future` se resuelve con True al terminar o False si se detuvo"""
+    
+    def __init__(self, engine, channel=None, music=False):
+        self.engine = engine
+        self.channel = channel
+        self.music = music
+        self.future = Future()
+        self.started_at = None  # time.monotonic() cuando empezó a sonar
+        self.volume = None  # Volumen del canal (None = el que tenga)
+        self.closed = False  # Ya no se agregarán más partes
+        self._pending = deque()  # Partes que todavía no se entregaron al canal
+        self._queued = None  # Parte en la cola del canal: el mixer la encadena sin corte
+        self._deadline = None  # time.monotonic() en que termina lo que ya suena
+        self._overdue_since = None
+        self._remaining = None  # Segundos que faltaban al pausar
+        self._unknown_length = False
+    
+    def append(self, sound):
+        """Agregar una parte (pygame Sound) a continuación de las anteriores"""
+        self.engine._append(self, sound)
+    
+    def close(self):
+        """Indicar que no vendrán más partes"""
+        self.engine._close(self)
+    
+    def stop(self):
+        self.engine._finish(self, False)
+    
+    def pause(self):
+        self.engine._pause(self)
+    
+    def resume(self):
+        self.engine._resume(self)
+    
+    def set_volume(self, volume):
+        self.engine._set_volume(self, volume)
+    
+    def done(self):
+        return self.future.done()
+    
+    def wait(self, timeout=None):
+        """Esperar el final: True si terminó, False si se detuvo, None si venció el timeout"""
+        try:
+            return self.future.result(timeout)
+        except FutureTimeoutError:  # Distinto del TimeoutError builtin antes de Python 3.11
+            return None
+
+class PlaybackEngine:
+    """Hilo único que avisa cuándo termina cada reproducción
+    
+    Los eventos de fin de pygame (set_endevent) llegan por la cola de
+    eventos de pygame, que en esta app (interfaz Tkinter) nadie atiende.
+    En cambio, la duración de cada parte se conoce al decodificarla: el
+    hilo duerme hasta la hora de fin más próxima, confirma con el mixer y
+    resuelve el future de esa reproducción. Detener una reproducción la
+    resuelve en el acto.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = set()
+        self._thread = None
+    
+    def open(self, channel=None):
+        """Reproducción vacía a la que se le irán agregando partes"""
+        return Playback(self, channel)
+    
+    def play(self, sound, channel=None):
+        """Reproducir un solo sonido"""
+        playback = Playback(self, channel)
+        playback.append(sound)
+        playback.close()
+        return playback
+    
+    def play_music(self, source, length=None):
+        """Reproducir por el stream de música de pygame (canciones largas, sin decodificar entera)"""
+        pygame.mixer.music.load(source)
+        pygame.mixer.music.play()
+        playback = Playback(self, music=True)
+        with self._cond:
+            playback.closed = True
+            playback.started_at = time.monotonic()
+            playback._unknown_length = not length
+            playback._deadline = playback.started_at + (length or UNKNOWN_LENGTH_POLL_SECONDS)
+            self._watch(playback)
+        return playback
+    
+    def _append(self, playback, sound):
+        with self._cond:
+            if playback.future.done():
+                return
+            playback._pending.append(sound)
+            if playback._deadline is None and playback._remaining is None:
+                self._start_next(playback)
+            else:
+                self._fill_queue(playback)
+    
+    def _close(self, playback):
+        with self._cond:
+            playback.closed = True
+            if playback._deadline is None and playback._remaining is None and not playback._pending:
+                # Todo lo agregado ya sonó
+                self._finish(playback, True)
+    
+    def _start_next(self, playback):
+        """Hacer sonar la próxima parte (al empezar, o si llegó después de que terminó la anterior)"""
+        sound = playback._pending.popleft()
+        if playback.channel is None:
+            playback.channel = sound.play()
+            if playback.channel is None:
+                print("❌ No hay canales de audio libres")
+                self._finish(playback, False)
+                return
+        else:
+            playback.channel.play(sound)
+        # pygame restablece el volumen del canal en cada play()
+        self._apply_volume(playback)
+        
+        ahora = time.monotonic()
+        if playback.started_at is None:
+            playback.started_at = ahora
+        playback._deadline = ahora + sound.get_length()
+        playback._overdue_since = None
+        self._fill_queue(playback)
+        self._watch(playback)
+    
+    def _fill_queue(self, playback):
+        """Dejar la parte siguiente en la cola del canal para que no haya corte"""
+        if playback._pending and playback._queued is None and playback.channel is not None:
+            playback._queued = playback._pending.popleft()
+            playback.channel.queue(playback._queued)
+    
+    def _watch(self, playback):
+        self._active.add(playback)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="PlaybackEngine", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+    
+    def _run(self):
+        """Loop del hilo: dormir hasta el próximo fin de parte"""
+        with self._cond:
+            while True:
+                ahora = time.monotonic()
+                proximo = None
+                for playback in list(self._active):
+                    if playback._deadline is not None and playback._deadline <= ahora:
+                        self._on_deadline(playback, ahora)
+                    if playback in self._active and playback._deadline is not None:
+                        proximo = playback._deadline if proximo is None else min(proximo, playback._deadline)
+                self._cond.wait(None if proximo is None else max(0.0, proximo - ahora))
+    
+    def _on_deadline(self, playback, ahora):
+        """Terminó la parte que sonaba"""
+        if playback._queued is not None:
+            # El mixer ya pasó solo a la parte encolada
+            playback._deadline += playback._queued.get_length()
+            playback._queued = None
+            self._fill_queue(playback)
+            return
+        if playback._pending:
+            self._start_next(playback)
+            return
+        if not playback.closed:
+            # Esperando más partes (síntesis más lenta que la reproducción)
+            playback._deadline = None
+            return
+        
+        ocupado = pygame.mixer.music.get_busy() if playback.music else playback.channel.get_busy()
+        if ocupado:
+            playback._overdue_since = playback._overdue_since or ahora
+            if playback._unknown_length:
+                playback._deadline = ahora + UNKNOWN_LENGTH_POLL_SECONDS
+                return
+            if ahora - playback._overdue_since < END_GRACE_SECONDS:
+                playback._deadline = ahora + END_RECHECK_SECONDS
+                return
+        self._finish(playback, True)
+    
+    def _finish(self, playback, natural):
+        """Resolver la reproducción (deteniendo el audio si fue interrumpida)"""
+        with self._cond:
+            if playback.future.done():
+                return
+            self._active.discard(playback)
+            playback._pending.clear()
+            playback._deadline = None
+            playback._remaining = None
+            if not natural:
+                try:
+                    if playback.music:
+                        pygame.mixer.music.stop()
+                    elif playback.channel is not None:
+                        playback.channel.stop()
+                except Exception as e:
+                    print(f"❌ Error deteniendo audio: {e}")
+            playback.future.set_result(natural)
+            self._cond.notify()
+    
+    def _pause(self, playback):
+        with self._cond:
+            if playback._deadline is None or playback.future.done():
+                return
+            playback._remaining = max(0.0, playback._deadline - time.monotonic())
+            playback._deadline = None
+            if playback.music:
+                pygame.mixer.music.pause()
+            elif playback.channel is not None:
+                playback.channel.pause()
+    
+    def _resume(self, playback):
+        with self._cond:
+            if playback._remaining is None or playback.future.done():
+                return
+            if playback.music:
+                pygame.mixer.music.unpause()
+            elif playback.channel is not None:
+                playback.channel.unpause()
+            playback._deadline = time.monotonic() + playback._remaining
+            playback._remaining = None
+            self._cond.notify()
+    
+    def _set_volume(self, playback, volume):
+        with self._cond:
+            playback.volume = volume
+            if not playback.future.done():
+                self._apply_volume(playback)
+    
+    def _apply_volume(self, playback):
+        if playback.volume is None:
+            return
+        if playback.music:
+            pygame.mixer.music.set_volume(playback.volume)
+        elif playback.channel is not None:
+            playback.channel.set_volume(playback.volume)
+    
+    def active_count(self):
+        """Reproducciones en curso"""
+        return len(self._active)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_playback_engine():
+    """Obtener el motor de reproducción compartido"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+        return _engine
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    pygame.mixer.init()
+    frecuencia, bits, canales = pygame.mixer.get_init()
+    # Medio segundo de silencio
+    sonido = pygame.mixer.Sound(buffer=bytes(int(frecuencia * 0.5) * abs(bits) // 8 * canales))
+    
+    engine = get_playback_engine()
+    retrasos = []
+    for _ in range(5):
+        playback = engine.play(sonido)
+        playback.wait()
+        retrasos.append(time.monotonic() - playback.started_at - sonido.get_length())
+    print(f"⏱️ Fin avisado por el motor: {sum(retrasos) / len(retrasos) * 1000:.1f} ms después del final")
+    
+    # Lo que había antes: consultar get_busy cada 100 ms
+    retrasos = []
+    for _ in range(5):
+        channel = sonido.play()
+        inicio = time.monotonic()
+        while channel.get_busy():
+            time.sleep(0.1)
+        retrasos.append(time.monotonic() - inicio - sonido.get_length())
+    print(f"⏱️ Polling cada 100 ms: {sum(retrasos) / len(retrasos) * 1000:.1f} ms después del final")
@@ -0,0 +1,181 @@
+import heapq
+import itertools
+import threading
+from tts_service import get_tts_service, HAS_EDGE_TTS, TTS_PARAMS
+from tts_cache import get_tts_cache
+from response_handler import ResponseHandler
+
+# Cada cuánto se revisa si el audio está libre para seguir sintetizando (segundos)
+IDLE_POLL_SECONDS = 0.5
+
+class PrerenderScheduler:
+    """Sintetiza por adelantado los catálogos fijos de cada modo y los deja en el caché de TTS
+    
+    Cada modo registra fuentes de textos (los chistes, acertijos, amenazas...)
+    con la voz que los dirá. Mientras los robots no hablan, un pequeño pool de
+    hilos los sintetiza empezando por el modo actual, luego las fuentes de
+    todos los modos (bendiciones del robot de regalos) y después los modos a
+    los que más se suele pasar desde el actual.
+    """
+    
+    def __init__(self, workers=2, idle_check=None):
+        self.workers = workers
+        self.idle_check = idle_check or (lambda: True)
+        self.sources = {}  # modo -> [(voz, fuente)]; modo None = siempre
+        self.current_mode = None
+        self._transitions = {}  # (modo anterior, modo nuevo) -> veces
+        self._heap = []  # (prioridad, orden, voz, texto o None, fuente)
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopped = False
+        self.rendered = 0
+        self.already_cached = 0
+        self.errors = 0
+    
+    def register(self, mode, voice, source):
+        """Registrar una fuente (callable que devuelve textos) para un modo, o None para todos"""
+        with self._cond:
+            self.sources.setdefault(mode, []).append((voice, source))
+            self._rebuild()
+    
+    def start(self, mode=None):
+        """Iniciar el pool de síntesis en segundo plano"""
+        if not HAS_EDGE_TTS:
+            print("⚠️ Pre-render deshabilitado: edge-tts no disponible")
+            return False
+        
+        with self._cond:
+            if self._threads:
+                return True
+            self._stopped = False
+            self.current_mode = mode
+            self._rebuild()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"Prerender-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        print(f"🎙️ Pre-render iniciado con {self.workers} hilos")
+        return True
+    
+    def set_current_mode(self, mode, old_mode=None):
+        """Reordenar la cola al cambiar de modo (firma compatible con callbacks de ModeController)"""
+        with self._cond:
+            if old_mode is not None:
+                clave = (old_mode, mode)
+                self._transitions[clave] = self._transitions.get(clave, 0) + 1
+            self.current_mode = mode
+            self._rebuild()
+    
+    def _mode_order(self):
+        """Modos en orden de prioridad: actual, todos, y los siguientes más probables"""
+        actual = self.current_mode
+        otros = [m for m in self.sources if m is not None and m != actual]
+        # Más veces elegido desde el modo actual primero; si no hay historial, el más cercano
+        otros.sort(key=lambda m: (-self._transitions.get((actual, m), 0),
+                                  abs(m - actual) if actual is not None else m, m))
+        orden = [actual] if actual in self.sources else []
+        if None in self.sources:
+            orden.append(None)
+        return orden + otros
+    
+    def _rebuild(self):
+        """Reencolar las fuentes por prioridad (se expanden en textos al sacarlas)"""
+        self._heap = []
+        for prioridad, mode in enumerate(self._mode_order()):
+            for voice, source in self.sources.get(mode, []):
+                heapq.heappush(self._heap, (prioridad, next(self._counter), voice, None, source))
+        self._cond.notify_all()
+    
+    def _next_job(self):
+        """Esperar a que haya trabajo y el audio esté libre"""
+        with self._cond:
+            while not self._stopped:
+                if self._heap and self.idle_check():
+                    return heapq.heappop(self._heap)
+                self._cond.wait(IDLE_POLL_SECONDS)
+            return None
+    
+    def _worker(self):
+        """Loop de cada hilo del pool"""
+        cache = get_tts_cache()
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            prioridad, _, voice, text, source = job
+            
+            if text is None:
+                # Expandir la fuente fuera del lock (puede construir el manager)
+                try:
+                    textos = source()
+                except Exception as e:
+                    print(f"❌ Error obteniendo textos para pre-render: {e}")
+                    continue
+                # Se cachea por frase, igual que las sintetiza ArduinoAudioManager
+                segmentos = [s for t in textos if t for s in ResponseHandler.split_sentences(t)]
+                with self._cond:
+                    for texto in dict.fromkeys(segmentos):
+                        heapq.heappush(self._heap, (prioridad, next(self._counter), voice, texto, None))
+                    self._cond.notify_all()
+                continue
+            
+            if cache.contains(text, voice, TTS_PARAMS):
+                with self._cond:
+                    self.already_cached += 1
+                continue
+            
+            try:
+                get_tts_service().synthesize(text, voice, verbose=False)
+                with self._cond:
+                    self.rendered += 1
+            except Exception as e:
+                with self._cond:
+                    self.errors += 1
+                print(f"❌ Error en pre-render: {e}")
+    
+    def pending(self):
+        """Trabajos en cola (una fuente sin expandir cuenta como uno)"""
+        return len(self._heap)
+    
+    def get_stats(self):
+        """Progreso del pre-render"""
+        return {
+            'mode': self.current_mode,
+            'pending': self.pending(),
+            'rendered': self.rendered,
+            'already_cached': self.already_cached,
+            'errors': self.errors
+        }
+    
+    def stop(self):
+        """Detener el pool (lo que esté sintetizándose termina)"""
+        with self._cond:
+            self._stopped = True
+            self._heap = []
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=1)
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import time
+    
+    scheduler = PrerenderScheduler()
+    scheduler.register(2, "es-MX-JorgeNeural", lambda: [f"Chiste {i}" for i in range(3)])
+    scheduler.register(4, "es-MX-JorgeNeural", lambda: [f"Acertijo {i}" for i in range(3)])
+    scheduler.register(5, "es-MX-JorgeNeural", lambda: [f"Amenaza {i}" for i in range(3)])
+    scheduler.register(None, "es-ES-AlvaroNeural", lambda: ["¡Bendiciones!"])
+    
+    scheduler.current_mode = 2
+    scheduler.set_current_mode(5, 2)
+    scheduler.set_current_mode(4, 5)
+    scheduler.set_current_mode(5, 4)
+    print(f"🎙️ Orden de modos estando en 5: {scheduler._mode_order()}")
+    
+    if scheduler.start(scheduler.current_mode):
+        while scheduler.pending() and not scheduler.errors:
+            time.sleep(0.5)
+        scheduler.stop()
+    print(f"📊 {scheduler.get_stats()}")
@@ -1,5 +1,91 @@
 import re
 import random
+from response_templates import get_template_catalog
+
+# Patrón para eliminar emojis (compilado una sola vez)
+EMOJI_PATTERN = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+    u"\U0001f926-\U0001f937"
+    u'\U00010000-\U0010ffff'
+    u"\u200d"
+    u"\u2640-\u2642"
+    u"\u2600-\u2B55"
+    u"\u23cf"
+    u"\u23e9"
+    u"\u231a"
+    u"\ufe0f"  # dingbats
+    u"\u3030"
+    "]+", flags=re.UNICODE)
+
+# Quitar tildes para comparar ("canción" == "cancion"); la ñ se conserva
+ACCENT_TABLE = str.maketrans("áéíóúüàèìòùÁÉÍÓÚÜÀÈÌÒÙ", "aeiouuaeiouAEIOUUAEIOU")
+
+TOKEN_PATTERN = re.compile(r"\w+", flags=re.UNICODE)
+
+# Fin de frase: después de . ! ? o … seguidos de espacio
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?…])\s+")
+PARAGRAPH_PATTERN = re.compile(r"\s*\n\s*")
+
+# Frases más cortas que esto se sintetizan junto con la vecina ("¡Gracias!")
+MIN_SEGMENT_CHARS = 25
+
+class NormalizedComment:
+    """Comentario normalizado una sola vez al entrar y reutilizado por todos los handlers"""
+    
+    __slots__ = ("raw", "clean", "lowered", "_folded", "_tokens", "_token_set", "_intents")
+    
+    def __init__(self, raw):
+        self.raw = raw or ""
+        self.clean = EMOJI_PATTERN.sub('', self.raw).strip()
+        self.lowered = self.clean.lower()
+        self._folded = None
+        self._tokens = None
+        self._token_set = None
+        self._intents = None  # Cache de IntentMatcher.classify
+    
+    @classmethod
+    def of(cls, text):
+        """Normalizar solo si aún no lo está"""
+        return text if isinstance(text, cls) else cls(text)
+    
+    @property
+    def folded(self):
+        """Minúsculas sin tildes (calculado al primer uso)"""
+        if self._folded is None:
+            self._folded = self.lowered.translate(ACCENT_TABLE)
+        return self._folded
+    
+    @property
+    def tokens(self):
+        """Palabras del texto sin tildes (calculadas al primer uso)"""
+        if self._tokens is None:
+            self._tokens = tuple(TOKEN_PATTERN.findall(self.folded))
+        return self._tokens
+    
+    @property
+    def token_set(self):
+        """Tokens como conjunto (calculado al primer uso)"""
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+    
+    def contains_any(self, keywords):
+        """Alguna palabra clave (ya en minúsculas) aparece en el texto"""
+        return any(keyword in self.lowered for keyword in keywords)
+    
+    def __str__(self):
+        return self.clean
+    
+    def __repr__(self):
+        return f"NormalizedComment({self.clean!r})"
+    
+    def __bool__(self):
+        return bool(self.clean)
 
 class ResponseHandler:
     """Manejador común para procesar respuestas y comentarios"""
@@ -9,28 +95,39 @@ class ResponseHandler:
         """Limpiar texto de emojis y caracteres especiales"""
         if not text:
             return ""
+        if isinstance(text, NormalizedComment):
+            return text.clean
         
-        # Patrón para eliminar emojis
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            u"\U00002702-\U000027B0"
-            u"\U000024C2-\U0001F251"
-            u"\U0001f926-\U0001f937"
-            u'\U00010000-\U0010ffff'
-            u"\u200d"
-            u"\u2640-\u2642"
-            u"\u2600-\u2B55"
-            u"\u23cf"
-            u"\u23e9"
-            u"\u231a"
-            u"\ufe0f"  # dingbats
-            u"\u3030"
-            "]+", flags=re.UNICODE)
+        return EMOJI_PATTERN.sub(r'', text).strip()
+    
+    @staticmethod
+    def split_sentences(text, min_chars=MIN_SEGMENT_CHARS):
+        """Partir un texto en frases para sintetizarlas por separado
         
-        return emoji_pattern.sub(r'', text).strip()
+        Una frase corta se une a la anterior del mismo párrafo (o a la
+        siguiente si es la primera). Un mismo texto siempre se parte igual,
+        así las frases fijas (bendiciones, chistes) coinciden en el caché.
+        """
+        segmentos = []
+        for parrafo in PARAGRAPH_PATTERN.split(text or ""):
+            frases = [f for f in SENTENCE_END_PATTERN.split(parrafo.strip()) if f]
+            actuales = []
+            pendiente = ""
+            for frase in frases:
+                if pendiente:
+                    frase = f"{pendiente} {frase}"
+                    pendiente = ""
+                if len(frase) < min_chars:
+                    if actuales:
+                        actuales[-1] = f"{actuales[-1]} {frase}"
+                    else:
+                        pendiente = frase
+                    continue
+                actuales.append(frase)
+            if pendiente:
+                actuales.append(pendiente)
+            segmentos.extend(actuales)
+        return segmentos
     
     @staticmethod
     def detect_keywords(text, keywords):
@@ -38,46 +135,20 @@ class ResponseHandler:
         if not text or not keywords:
             return False
         
-        text_lower = text.lower()
+        text_lower = text.lowered if isinstance(text, NormalizedComment) else text.lower()
         return any(keyword.lower() in text_lower for keyword in keywords)
     
     @staticmethod
-    def personalize_by_name(username, base_text):
-        """Personalizar texto según características del nombre"""
+    def personalize_by_name(username, base_text, profile=None):
+        """Personalizar texto según características del nombre (profile: perfil ya resuelto)"""
         if not username:
             return base_text
         
-        name_lower = username.lower()
-        additions = []
-        
-        # Longitud del nombre
-        if len(username) > 15:
-            additions.append("Tu nombre es tan largo que me da pereza escribirlo completo.")
-        elif len(username) < 4:
-            additions.append("Tu nombre es tan corto como tu paciencia.")
-        
-        # Números en el nombre
-        if any(char.isdigit() for char in username):
-            additions.append("Los números en tu nombre revelan falta de creatividad.")
-        
-        # Nombres especiales
-        special_names = {
-            "admin": "Ser admin no te salva de mi sarcasmo.",
-            "user": "¡Qué original! ¿También tu contraseña es 'password'?",
-            "guest": "Invitado... como el que no invitan a las fiestas.",
-            "test": "¿Eres un test? Porque has fallado en mi corazón.",
-            "null": "Tu nombre es 'null' como tu personalidad.",
-            "bot": "¿Bot? Al menos yo admito que soy artificial.",
-            "anonymous": "Anónimo... como el que dejó esa mancha en mi cara.",
-            "troll": "¿Troll? ¡Yo soy el monstruo bajo tu puente!",
-            "gamer": "Los gamers no pueden pausar la vida real.",
-            "streamer": "Tu stream será mi escenario de terror."
-        }
-        
-        for name, addition in special_names.items():
-            if name in name_lower:
-                additions.append(addition)
-                break
+        # Rasgos del nombre cacheados en el perfil del espectador
+        if profile is None:
+            from viewer_profiles import get_viewer_profiles
+            profile = get_viewer_profiles().get(username)
+        additions = profile.name_additions
         
         # Agregar personalización aleatoria
         if additions:
@@ -90,13 +161,8 @@ class ResponseHandler:
         if not comment_text:
             return False
         
-        fake_keywords = [
-            "dono", "doné", "donate", "regalo", "te mando", "envío", "envio",
-            "dinero", "pesos", "dolares", "dólares", "coins", "monedas",
-            "tip", "propina", "gift", "present", "te doy", "aquí tienes"
-        ]
-        
-        return ResponseHandler.detect_keywords(comment_text, fake_keywords)
+        from intent_matcher import get_intent_matcher
+        return get_intent_matcher().matches(comment_text, "donacion_falsa")
     
     @staticmethod
     def format_with_timestamp(text):
@@ -145,7 +211,7 @@ class ResponseHandler:
             return 0.0
         
         from difflib import SequenceMatcher
-        return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+        return SequenceMatcher(None, str(text1).lower(), str(text2).lower()).ratio()
 
 class SarcasticResponder:
     """Generador de respuestas sarcásticas reutilizable"""
@@ -183,25 +249,94 @@ class SarcasticResponder:
     @staticmethod
     def mock_comment(comment):
         """Generar burla de un comentario"""
-        mock_responses = [
-            f"'{comment}'... ¡qué profundo!",
-            f"¿En serio dijiste '{comment}'? ¡Qué ingenioso!",
-            f"'{comment}' - palabras de un verdadero filósofo.",
-            f"¡Wow! '{comment}' - nunca había oído algo tan original.",
-            f"'{comment}'... y yo que pensaba que era imposible decir algo más tonto."
-        ]
-        
-        return random.choice(mock_responses)
+        return get_template_catalog().render("burla_comentario", comment=comment)
     
     @staticmethod
     def generate_insult(username):
         """Generar insulto creativo personalizado"""
-        insults = [
-            f"{username}, tienes la personalidad de una tostada sin mantequilla.",
-            f"{username}, eres como un nubarrón en un día soleado.",
-            f"{username}, si fueras más aburrido serías una clase de matemáticas.",
-            f"{username}, tienes tanto carisma como un calcetín mojado.",
-            f"{username}, eres la razón por la que los aliens no nos visitan."
-        ]
-        
-        return random.choice(insults)
\ No newline at end of file
+        return get_template_catalog().render("insulto", username=username)
+
+# Microbenchmark: normalizar una vez vs. limpiar en cada handler
+if __name__ == "__main__":
+    import time
+    
+    def clean_text_antiguo(text):
+        """ResponseHandler.clean_text tal como era antes de NormalizedComment"""
+        if not text:
+            return ""
+        
+        # Patrón para eliminar emojis
+        emoji_pattern = re.compile("["
+            u"\U0001F600-\U0001F64F"  # emoticons
+            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+            u"\U0001F680-\U0001F6FF"  # transport & map symbols
+            u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+            u"\U00002702-\U000027B0"
+            u"\U000024C2-\U0001F251"
+            u"\U0001f926-\U0001f937"
+            u'\U00010000-\U0010ffff'
+            u"\u200d"
+            u"\u2640-\u2642"
+            u"\u2600-\u2B55"
+            u"\u23cf"
+            u"\u23e9"
+            u"\u231a"
+            u"\ufe0f"  # dingbats
+            u"\u3030"
+            "]+", flags=re.UNICODE)
+        
+        return emoji_pattern.sub(r'', text).strip()
+    
+    def detect_keywords_antiguo(text, keywords):
+        """ResponseHandler.detect_keywords tal como era antes: baja a minúsculas en cada llamada"""
+        if not text or not keywords:
+            return False
+        
+        text_lower = text.lower()
+        return any(keyword.lower() in text_lower for keyword in keywords)
+    
+    comentarios = [
+        "jajaja 😂😂 que gracioso eres Poncho 🔥",
+        "¿Cómo estás? canta una canción 🎵",
+        "la respuesta es el reloj ⏰",
+        "me das miedo 👻 no me asustas",
+        "hola a todos!! saludos desde México 🇲🇽",
+    ] * 200  # 1000 comentarios
+    
+    claves = ["pista", "ayuda", "futuro", "canta", "miedo", "hola", "chiste"]
+    
+    def camino_antiguo():
+        for c in comentarios:
+            limpio = clean_text_antiguo(c)                     # on_comment
+            any(k in limpio.lower() for k in claves)            # ModeController
+            clean_text_antiguo(limpio).lower()                  # handler del modo
+            clean_text_antiguo(limpio).lower().split()          # _get_question_hash
+            clean_text_antiguo(limpio).lower()                  # _get_varied_response
+            detect_keywords_antiguo(limpio, claves)             # keywords del manager
+    
+    def camino_nuevo():
+        for c in comentarios:
+            n = NormalizedComment(c)                            # una sola vez al entrar
+            n.contains_any(claves)
+            n.lowered
+            n.lowered.split()
+            n.lowered
+            ResponseHandler.detect_keywords(n, claves)
+    
+    def medir(camino, vueltas=5):
+        """Mismas condiciones para los dos: una vuelta de calentamiento y el mejor de `vueltas`"""
+        camino()
+        tiempos = []
+        for _ in range(vueltas):
+            inicio = time.perf_counter()
+            camino()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos)
+    
+    antiguo = medir(camino_antiguo)
+    nuevo = medir(camino_nuevo)
+    
+    por_comentario_antiguo = antiguo / len(comentarios) * 1e6
+    por_comentario_nuevo = nuevo / len(comentarios) * 1e6
+    print(f"⏱️ Antes: {por_comentario_antiguo:.1f} µs/comentario | Ahora: {por_comentario_nuevo:.1f} µs/comentario")
+    print(f"📉 A 100 comentarios/s: {(por_comentario_antiguo - por_comentario_nuevo) * 100 / 1000:.2f} ms de CPU ahorrados por segundo")
@@ -0,0 +1,323 @@
+import copy
+import string
+import threading
+from base_manager import BaseManager
+
+# Plantillas con las que se crea plantillas.json (y que se agregan si faltan)
+DEFAULT_TEMPLATES = {
+    "burla_comentario": [
+        "'{comment}'... ¡qué profundo!",
+        "¿En serio dijiste '{comment}'? ¡Qué ingenioso!",
+        "'{comment}' - palabras de un verdadero filósofo.",
+        "¡Wow! '{comment}' - nunca había oído algo tan original.",
+        "'{comment}'... y yo que pensaba que era imposible decir algo más tonto."
+    ],
+    "insulto": [
+        "{username}, tienes la personalidad de una tostada sin mantequilla.",
+        "{username}, eres como un nubarrón en un día soleado.",
+        "{username}, si fueras más aburrido serías una clase de matemáticas.",
+        "{username}, tienes tanto carisma como un calcetín mojado.",
+        "{username}, eres la razón por la que los aliens no nos visitan."
+    ],
+    "acertijo_correcto": [
+        "¡Correcto, {username}! ¡Hasta un reloj descompuesto da la hora correcta dos veces al día!",
+        "¡Bien {username}! ¡Por fin usaste esa cosa que tienes entre las orejas!",
+        "¡Exacto, {username}! ¡Veo que no eres tan inútil como pensé!",
+        "¡Correcto, {username}! ¡Felicidades por tener más de dos neuronas funcionando!"
+    ],
+    "acertijo_incorrecto_1": [
+        "¡Incorrecto, {username}! ¡Pero no te preocupes, todos empezamos siendo tontos!",
+        "¡Fallaste, {username}! ¡Inténtalo de nuevo, a ver si la suerte te acompaña!",
+        "¡Nope, {username}! ¡Tu cerebro necesita más ejercicio!"
+    ],
+    "acertijo_incorrecto_2": [
+        "¡Otra vez mal, {username}! ¡Tu récord de fracasos va creciendo!",
+        "¡Dos errores, {username}! ¡Impresionante consistencia en ser malo!",
+        "¡Fallaste de nuevo, {username}! ¡Al menos eres constante!"
+    ],
+    "acertijo_incorrecto_3": [
+        "¡Tres errores, {username}! ¡Eres todo un profesional... del fracaso!",
+        "¡Triple falla, {username}! ¡Tu talento para errar es impresionante!",
+        "¡Tercera vez mal, {username}! ¡Deberías dedicarte a otra cosa!"
+    ],
+    "acertijo_incorrecto_muchos": [
+        "¡{intentos} errores, {username}! ¡Ya perdí la cuenta de tus fracasos!",
+        "¡Sigues fallando, {username}! ¡Al menos eres entretenido!",
+        "¡{intentos} intentos y nada, {username}! ¡Eres una obra de arte... del desastre!"
+    ],
+    "amenaza_miedo": [
+        "¿Miedo, {username}? ¡Esto apenas empieza!",
+        "El miedo es solo el principio, {username}...",
+        "{username}, el terror verdadero aún no llega.",
+        "¿Te asusto, {username}? ¡Misión cumplida!"
+    ],
+    "amenaza_desafio": [
+        "¿No te asusto, {username}? ¡Ya veremos!",
+        "Valientes palabras, {username}... por ahora.",
+        "{username}, los valientes son mis favoritos para atormentar.",
+        "¿Seguro, {username}? La noche es joven..."
+    ],
+    "amenaza_especifica": [
+        "Ya llevas {nivel} interacciones conmigo, {username}... ¡Eso es obsesión!",
+        "{username}, después de {nivel} veces hablándome, ya eres parte de mi circo del terror.",
+        "¡{nivel} mensajes, {username}! ¡Oficialmente eres mi acosador favorito!",
+        "{username}, con {nivel} interacciones ya conoces todos mis secretos terroríficos.",
+        "¡{nivel} comentarios, {username}! ¡Ya eres mi víctima oficial!"
+    ],
+    "chat_lote_grande": [
+        "¡{batch_size} comentarios! ¿Esto es un chat o una invasión? Mi sarcasmo no da para tantos.",
+        "Wow, {batch_size} mensajes. El chat está más activo que mi vida amorosa... y eso es decir mucho.",
+        "¡{batch_size} comentarios! Si pusieran esa energía en algo útil... nah, mejor sigan aquí.",
+        "Tantos mensajes que mi cerebro de payaso se sobrecargó. Dejen de ser tan 'brillantes' todos a la vez.",
+        "¡{batch_size} comentarios! ¿Es mi cumpleaños o qué? Porque esto se siente como un castigo."
+    ],
+    "invitado_casual_saludo": [
+        "¡Hola {nombre}! Bienvenido a mi show, donde la lógica viene a morir.",
+        "¡Hey {nombre}! Espero que estés listo para una conversación interesante.",
+        "Saludos {nombre}, prepárate para preguntas que no sabías que existían."
+    ],
+    "invitado_casual_animo_bueno": [
+        "¡Perfecto {nombre}! Me alegra que estés bien, porque yo voy a arruinar tu día.",
+        "Qué bueno {nombre}, necesito que estés en tu mejor estado para soportar mis preguntas.",
+        "Excelente {nombre}, así me gusta, con energía para esta aventura."
+    ],
+    "invitado_casual_animo_malo": [
+        "¿Mal día {nombre}? ¡Perfecto! Así encajas con la temática de mi vida.",
+        "No te preocupes {nombre}, después de hablar conmigo te sentirás peor.",
+        "Tranquilo {nombre}, todos tenemos días malos... yo los tengo todos."
+    ],
+    "invitado_casual_general": [
+        "Interesante {nombre}, cuéntame más sobre eso.",
+        "Ya veo {nombre}, ¿y cómo te sientes al respecto?",
+        "Mm-hmm {nombre}, eso suena... como algo que diría alguien.",
+        "Fascinante {nombre}, aunque no estoy seguro de qué significa."
+    ],
+    "invitado_personal_familia": [
+        "La familia es importante {nombre}, aunque la mía me abandonó cuando se enteraron de mi carrera.",
+        "¡Qué bonito {nombre}! Mi familia también es especial... especialmente disfuncional.",
+        "Familia... {nombre}, esa palabra me trae recuerdos dolorosos y cómicos."
+    ],
+    "invitado_personal_trabajo": [
+        "El trabajo es esencial {nombre}, aunque el mío consiste en hacer reír a gente que no ríe.",
+        "Interesante carrera {nombre}, yo elegí ser payaso... claramente no soy bueno tomando decisiones.",
+        "Tu trabajo suena mejor que el mío {nombre}, yo hago reír por dinero y fracaso en ambas."
+    ],
+    "invitado_personal_suenos": [
+        "Los sueños son importantes {nombre}, aunque los míos se convirtieron en pesadillas.",
+        "¡Qué ambicioso {nombre}! Yo también tuve sueños... luego me desperté.",
+        "Me gusta tu actitud {nombre}, sigue soñando mientras puedas."
+    ],
+    "invitado_personal_general": [
+        "Eso es muy personal {nombre}, gracias por compartirlo conmigo.",
+        "Me parece fascinante {nombre}, ¿hay algo más que quieras contar?",
+        "Aprecio tu honestidad {nombre}, no todos son tan abiertos.",
+        "Qué interesante perspectiva {nombre}, nunca lo había visto así."
+    ],
+    "invitado_comica_humor": [
+        "¡Humor {nombre}! Mi especialidad, aunque no soy muy bueno en ella.",
+        "Los chistes son geniales {nombre}, tengo miles... todos malos.",
+        "¿Te gusta el humor {nombre}? ¡Perfecto! Porque mi vida es una comedia trágica.",
+        "El humor es subjetivo {nombre}, pero el mío es objetivamente malo."
+    ],
+    "invitado_comica_payaso": [
+        "¡Ah, hablando de payasos {nombre}! Soy un experto en la materia... lamentablemente.",
+        "El circo {nombre}, mi hogar dulce hogar... bueno, más bien amargo hogar.",
+        "Los payasos {nombre}, somos una especie en extinción... por buenas razones.",
+        "El mundo del espectáculo {nombre}, donde los sueños van a morir lentamente."
+    ],
+    "invitado_comica_risa": [
+        "¡La risa {nombre}! Mi trabajo es provocarla, aunque más bien provoco lágrimas.",
+        "Reír es saludable {nombre}, aunque mi humor puede ser tóxico.",
+        "La risa es contagiosa {nombre}, pero la mía causa inmunidad.",
+        "Me alegra que rías {nombre}, porque yo no he reído en años."
+    ],
+    "invitado_comica_general": [
+        "Ja, ja, ja... {nombre}, fingir que es gracioso es parte de mi trabajo.",
+        "Qué cómico {nombre}, casi tan gracioso como mi situación laboral.",
+        "Interesante {nombre}, ¿tienes más material como ese?",
+        "No está mal {nombre}, aunque mi abuela cuenta mejores chistes... y está muerta."
+    ],
+    "invitado_generica": [
+        "Ya veo {nombre}, esa es una perspectiva... única.",
+        "Mm-hmm {nombre}, sigue hablando que esto se está poniendo interesante.",
+        "Entiendo {nombre}, o al menos finjo que entiendo.",
+        "Fascinante {nombre}, cuéntame más sobre eso.",
+        "Interesante punto de vista {nombre}, ¿cómo llegaste a esa conclusión?",
+        "Okay {nombre}, eso no me lo esperaba.",
+        "Ya veo {nombre}, ¿y qué opinas tú al respecto?"
+    ]
+}
+
+class _Slots(dict):
+    """Valores de una plantilla; un hueco sin valor queda visible en vez de fallar"""
+    
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+class ResponseTemplate:
+    """Línea de respuesta compilada con huecos con nombre ("¡Hola {username}!")
+    
+    Al cargar se parte en (texto fijo, hueco) y render solo concatena;
+    huecos con formato (":>5", "!r") o atributos usan str.format.
+    """
+    
+    __slots__ = ("text", "slots", "_inicio", "_partes")
+    
+    def __init__(self, text):
+        self.text = text
+        # Validar la sintaxis una vez al cargar, no en cada respuesta
+        piezas = list(string.Formatter().parse(text))
+        self.slots = frozenset(campo for _, campo, _, _ in piezas if campo)
+        
+        self._inicio = ""
+        partes = []  # [hueco, texto fijo que le sigue]
+        for fijo, campo, formato, conversion in piezas:
+            if partes:
+                partes[-1][1] += fijo
+            else:
+                self._inicio += fijo
+            if campo is None:
+                continue
+            if formato or conversion or not campo.isidentifier():
+                partes = None
+                break
+            partes.append([campo, ""])
+        self._partes = tuple(map(tuple, partes)) if partes is not None else None
+    
+    def render(self, **valores):
+        """Rellenar los huecos con los valores dados"""
+        if not self.slots:
+            return self.text
+        try:
+            if self._partes is None:
+                return self.text.format(**valores)
+            salida = self._inicio
+            for campo, fijo in self._partes:
+                salida += str(valores[campo]) + fijo
+            return salida
+        except KeyError:
+            return self.text.format_map(_Slots(valores))
+    
+    def __repr__(self):
+        return f"ResponseTemplate({self.text!r})"
+
+class TemplateCatalog(BaseManager):
+    """Catálogo de líneas de respuesta editable en plantillas.json
+    
+    Cada grupo es una lista de líneas con huecos como {username} o {nivel}.
+    Se compilan una vez al cargar y al responder se elige una sola línea
+    (sin repetir las recientes) en vez de armar todas las alternativas.
+    """
+    
+    def __init__(self, plantillas_file="plantillas.json"):
+        self.templates = {}
+        self._bag_keys = {}
+        super().__init__(plantillas_file)
+        print(f"📝 Template Catalog inicializado con {len(self.templates)} grupos")
+    
+    def _create_default_data(self):
+        """Crear catálogo de plantillas por defecto"""
+        self.data = {
+            "plantillas": copy.deepcopy(DEFAULT_TEMPLATES),
+            "version": "1.0"
+        }
+    
+    def load_data(self):
+        """Cargar, completar grupos nuevos y compilar todas las plantillas"""
+        super().load_data()
+        
+        # Un plantillas.json viejo no tiene los grupos agregados después
+        guardadas = self.data.get("plantillas", {})
+        for grupo, lineas in DEFAULT_TEMPLATES.items():
+            if grupo not in guardadas:
+                self.set_item("plantillas", grupo, list(lineas))
+        
+        self._compile()
+    
+    def _compile(self):
+        """Compilar las líneas de cada grupo en plantillas"""
+        compiladas = {}
+        for grupo, lineas in self.data.get("plantillas", {}).items():
+            try:
+                compiladas[grupo] = [ResponseTemplate(linea) for linea in lineas]
+            except ValueError as e:
+                print(f"❌ Plantilla inválida en '{grupo}': {e}")
+        self._bag_keys = {grupo: f"plantillas:{grupo}" for grupo in compiladas}
+        self.templates = compiladas
+    
+    def render(self, grupo, **valores):
+        """Elegir una línea del grupo y rellenarla"""
+        plantillas = self.templates.get(grupo)
+        if not plantillas:
+            print(f"❌ Grupo de plantillas inexistente: {grupo}")
+            return ""
+        plantilla = self.choice_from(self._bag_keys[grupo], plantillas)
+        return plantilla.render(**valores)
+    
+    def has_group(self, grupo):
+        """Verificar si existe un grupo con plantillas"""
+        return bool(self.templates.get(grupo))
+    
+    def add_template(self, grupo, linea):
+        """Agregar una línea a un grupo y recompilar"""
+        ResponseTemplate(linea)  # Falla antes de guardar si la sintaxis es inválida
+        self.set_item("plantillas", grupo, self.data.get("plantillas", {}).get(grupo, []) + [linea])
+        self._compile()
+        return f"✅ Plantilla agregada a '{grupo}'"
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_template_catalog():
+    """Obtener el catálogo compartido (se compila una vez por proceso)"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = TemplateCatalog()
+        return _catalog
+
+def render(grupo, **valores):
+    """Atajo para get_template_catalog().render(...)"""
+    return get_template_catalog().render(grupo, **valores)
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import random
+    import time
+    
+    catalog = get_template_catalog()
+    for grupo in list(catalog.templates)[:4]:
+        print(f"📝 {grupo}: {catalog.render(grupo, username='Juan', comment='hola', nivel=7, intentos=3, batch_size=40, nombre='Ana')}")
+    
+    def insulto_en_linea(username):
+        insults = [
+            f"{username}, tienes la personalidad de una tostada sin mantequilla.",
+            f"{username}, eres como un nubarrón en un día soleado.",
+            f"{username}, si fueras más aburrido serías una clase de matemáticas.",
+            f"{username}, tienes tanto carisma como un calcetín mojado.",
+            f"{username}, eres la razón por la que los aliens no nos visitan."
+        ]
+        return random.choice(insults)
+    
+    inicio = time.perf_counter()
+    for i in range(50000):
+        insulto_en_linea("Juan")
+    antes = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for i in range(50000):
+        catalog.render("insulto", username="Juan")
+    ahora = time.perf_counter() - inicio
+    plantilla = catalog.templates["insulto"][0]
+    inicio = time.perf_counter()
+    for i in range(50000):
+        plantilla.text.format(username="Juan")
+    con_format = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for i in range(50000):
+        plantilla.render(username="Juan")
+    precompilada = time.perf_counter() - inicio
+    # Rellenar la línea precompilada es más barato que str.format, pero elegirla
+    # sin repetir (bolsa con lock) hace que el total siga por encima de la lista
+    # en línea: el catálogo es por mantenimiento y variedad, no por velocidad
+    print(f"⏱️ Insulto: lista de f-strings {antes / 50000 * 1e6:.1f} µs | catálogo {ahora / 50000 * 1e6:.1f} µs")
+    print(f"⏱️ Rellenar una línea: str.format {con_format / 50000 * 1e6:.2f} µs | precompilada {precompilada / 50000 * 1e6:.2f} µs")
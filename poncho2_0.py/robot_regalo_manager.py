@@ -1,13 +1,19 @@
 from base_manager import BaseManager
 from response_handler import ResponseHandler
+from viewer_profiles import get_viewer_profiles
 import random
 import time
 
 class RobotRegaloManager(BaseManager):
     """Robot energético especializado únicamente en recibir y agradecer regalos"""
     
-    def __init__(self, regalo_file="robot_regalo.json", audio_manager=None, arduino_controller=None):
-        super().__init__(regalo_file)
+    JOURNAL_MODE = True  # Una lluvia de regalos son cientos de contadores por minuto
+    USER_TABLES = {"estadisticas.usuarios_mas_generosos": "counter"}
+    # Con SQLite usuarios_mas_generosos va al storage; el límite top-K queda solo para regalos_por_tipo
+    TOP_K_TABLES = {"estadisticas.usuarios_mas_generosos": 500, "estadisticas.regalos_por_tipo": 100}
+    
+    def __init__(self, regalo_file="robot_regalo.json", audio_manager=None, arduino_controller=None, storage=None):
+        super().__init__(regalo_file, storage=storage)
         
         # Crear audio manager específico para robot de regalos con voz de Álvaro
         if audio_manager is None and arduino_controller is not None:
@@ -15,7 +21,8 @@ class RobotRegaloManager(BaseManager):
             from audio_manager import ArduinoAudioManager
             self.audio_manager = ArduinoAudioManager(
                 arduino_controller=arduino_controller,
-                voice="es-ES-AlvaroNeural"  # Voz de Álvaro para robot de regalos
+                voice="es-ES-AlvaroNeural",  # Voz de Álvaro para robot de regalos
+                channel="regalo"  # Canal propio: suena junto con Poncho, que baja el volumen
             )
             print("🎁 Robot Regalos: Audio manager creado con voz de Álvaro")
         else:
@@ -116,11 +123,12 @@ class RobotRegaloManager(BaseManager):
         self.increment_counter("estadisticas", "total_bendiciones_dadas")
         self.increment_counter(f"estadisticas.regalos_por_tipo", gift_clean)
         self.increment_counter(f"estadisticas.usuarios_mas_generosos", username_clean)
+        get_viewer_profiles().get(username).incr("regalos", cantidad)
         
         # Aumentar racha
         self.regalo_streak += 1
         if self.regalo_streak > self.get_counter("estadisticas", "mejor_racha"):
-            self.data["estadisticas"]["mejor_racha"] = self.regalo_streak
+            self.set_item("estadisticas", "mejor_racha", self.regalo_streak)
         
         self.ultimo_regalo = {
             "usuario": username_clean,
@@ -129,18 +137,17 @@ class RobotRegaloManager(BaseManager):
             "timestamp": time.time()
         }
         
-        # Generar respuesta energética
+        # Generar respuesta energética (los contadores ya quedaron en el journal)
         respuesta = self._generar_respuesta_regalo(username_clean, gift_clean, cantidad)
         
-        # Guardar datos
-        self.save_data()
-        
         # Reproducir respuesta si hay audio manager con THINKING mode
         if self.audio_manager:
             if hasattr(self.audio_manager, 'start_thinking_mode'):
                 self.audio_manager.start_thinking_mode()
                 time.sleep(0.5)  # Breve pausa para procesar
-            self.audio_manager.speak_text(respuesta)
+            # Si ya espera el agradecimiento de este usuario por este regalo, se dice uno solo con el total
+            self.audio_manager.say(respuesta, "gift", key=(username_clean, gift_clean), amount=cantidad,
+                                   render=lambda total: self._generar_respuesta_regalo(username_clean, gift_clean, total))
         
         return respuesta
     
@@ -243,7 +250,7 @@ class RobotRegaloManager(BaseManager):
             if hasattr(self.audio_manager, 'start_thinking_mode'):
                 self.audio_manager.start_thinking_mode()
                 time.sleep(0.3)  # Breve pausa
-            self.audio_manager.speak_text(respuesta)
+            self.audio_manager.say(respuesta, "gift")
         
         return respuesta
     
@@ -255,6 +262,12 @@ class RobotRegaloManager(BaseManager):
             return mensaje
         return None
     
+    def prerender_texts(self):
+        """Bendiciones y mensajes de racha, que se repiten en cada regalo"""
+        textos = list(self.data.get("bendiciones_personalizadas", []))
+        textos.extend(self.data.get("respuestas_streak", {}).values())
+        return [ResponseHandler.clean_text(texto) for texto in textos]
+    
     def get_estadisticas_regalos(self):
         """Obtener estadísticas del robot de regalos"""
         base_stats = self.get_stats()
@@ -270,17 +283,15 @@ class RobotRegaloManager(BaseManager):
         stats += f"⚡ Racha actual: {self.regalo_streak}\n"
         
         # Top usuarios más generosos
-        usuarios_generosos = self.data.get("estadisticas", {}).get("usuarios_mas_generosos", {})
-        if usuarios_generosos:
-            top_usuarios = sorted(usuarios_generosos.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_usuarios = self.top_counters("estadisticas.usuarios_mas_generosos", 5)
+        if top_usuarios:
             stats += f"\n🏆 TOP USUARIOS MÁS GENEROSOS:\n"
             for i, (usuario, cantidad) in enumerate(top_usuarios, 1):
                 stats += f"  {i}. {usuario}: {cantidad} regalos\n"
         
         # Tipos de regalos más populares
-        tipos_regalos = self.data.get("estadisticas", {}).get("regalos_por_tipo", {})
-        if tipos_regalos:
-            top_regalos = sorted(tipos_regalos.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_regalos = self.top_counters("estadisticas.regalos_por_tipo", 5)
+        if top_regalos:
             stats += f"\n🎁 REGALOS MÁS POPULARES:\n"
             for i, (regalo, cantidad) in enumerate(top_regalos, 1):
                 stats += f"  {i}. {regalo}: {cantidad} veces\n"
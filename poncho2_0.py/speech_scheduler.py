@@ -0,0 +1,255 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+# Tipos de respuesta de más a menos urgente
+PRIORITIES = {"gift": 0, "question": 1, "chat": 2, "filler": 3}
+# Segundos de audio por carácter (para estimar cuánto tarda la cola en vaciarse)
+SECONDS_PER_CHAR = 0.07
+
+class SpeechItem:
+    """Un texto esperando turno para ser dicho"""
+    
+    __slots__ = ("text", "kind", "key", "amount", "priority", "submitted", "started", "cut")
+    
+    def __init__(self, text, kind, key=None, amount=1):
+        self.text = text
+        self.kind = kind
+        self.key = key  # Los encolados con el mismo tipo y clave se unen en uno
+        self.amount = amount
+        self.priority = PRIORITIES.get(kind, PRIORITIES["chat"])
+        self.submitted = time.monotonic()
+        self.started = None
+        self.cut = False
+    
+    def estimated_seconds(self):
+        return len(self.text) * SECONDS_PER_CHAR
+
+class SpeechScheduler:
+    """Cola de habla de un robot, por prioridad (regalo > pregunta > chat > relleno)
+    
+    Política de interrupción:
+      - "never": nada corta lo que suena; todo espera su turno.
+      - "higher": solo corta lo que suena algo de mayor prioridad.
+      - "always": lo último siempre corta y descarta la cola (comportamiento anterior).
+    Si lo encolado tardaría más que `latency_budget` segundos en decirse,
+    de cada prioridad desde `drop_from` hacia abajo solo queda la respuesta
+    más reciente: las anteriores se descartan (y se cuentan como pérdida).
+    Lo que trae `key` (agradecimientos por usuario y regalo) no se descarta:
+    se une a lo que ya espera con la misma clave.
+    """
+    
+    POLICIES = ("never", "higher", "always")
+    
+    def __init__(self, speak, stop, policy="higher", latency_budget=8.0, drop_from="chat", name="robot"):
+        self.speak = speak  # Dice el texto y vuelve cuando terminó (o lo cortaron)
+        self.stop = stop  # stop(item): corta item si todavía es lo que suena (si no, no hace nada)
+        self.policy = policy
+        self.latency_budget = latency_budget
+        self.drop_from = drop_from
+        self.name = name
+        self.current = None
+        self._heap = []  # (prioridad, orden, item)
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {}  # tipo -> contadores
+        self._waits = deque(maxlen=500)  # Espera en cola de lo que se dijo (segundos)
+    
+    def submit(self, text, kind="chat", key=None, amount=1, render=None):
+        """Encolar un texto; según la política puede cortar lo que está sonando
+        
+        Si ya espera en cola uno del mismo tipo y `key`, no se encola otro:
+        se suman los `amount` y el texto pasa a ser render(total) (o `text`).
+        """
+        if not text:
+            return None
+        cortar = False
+        with self._cond:
+            self._count(kind, "submitted")
+            existente = self._queued(kind, key) if key is not None else None
+            if existente is not None:
+                existente.amount += amount
+                existente.text = render(existente.amount) if render else text
+                self._count(kind, "merged")
+                return existente
+            
+            item = SpeechItem(text, kind, key, amount)
+            if self.policy == "always":
+                for _, _, viejo in self._heap:
+                    self._count(viejo.kind, "discarded")
+                self._heap = []
+            heapq.heappush(self._heap, (item.priority, next(self._counter), item))
+            actual = self.current
+            if actual is not None and not actual.cut and self._preempts(item, actual):
+                actual.cut = True
+                cortar = True
+            self._coalesce()
+            self._ensure_started()
+            self._cond.notify()
+        
+        if cortar:
+            print(f"✂️ {self.name}: '{kind}' interrumpe '{actual.kind}'")
+            # Fuera del lock: si `actual` terminó mientras tanto, stop lo ignora y no corta al siguiente
+            self.stop(actual)
+        return item
+    
+    def _queued(self, kind, key):
+        """Item en cola (sin empezar) con ese tipo y clave"""
+        for _, _, item in self._heap:
+            if item.kind == kind and item.key == key:
+                return item
+        return None
+    
+    def _preempts(self, nuevo, actual):
+        if self.policy == "always":
+            return True
+        if self.policy == "higher":
+            return nuevo.priority < actual.priority
+        return False
+    
+    def _backlog_seconds(self):
+        return sum(item.estimated_seconds() for _, _, item in self._heap)
+    
+    def _coalesce(self):
+        """Descartar las de baja prioridad salvo la más reciente de su tipo mientras la cola pase del presupuesto
+        
+        Son respuestas a comentarios puntuales: unirlas no acortaría la cola,
+        y la más reciente es la que todavía tiene sentido para el chat.
+        """
+        if self._backlog_seconds() <= self.latency_budget:
+            return
+        
+        desde = PRIORITIES.get(self.drop_from, PRIORITIES["chat"])
+        prioridades = sorted({p for p, _, _ in self._heap if p >= desde}, reverse=True)
+        for prioridad in prioridades:
+            grupo = [entrada for entrada in self._heap if entrada[0] == prioridad]
+            if len(grupo) < 2:
+                continue
+            mas_reciente = max(grupo, key=lambda entrada: entrada[1])
+            for entrada in grupo:
+                if entrada is not mas_reciente:
+                    self._count(entrada[2].kind, "dropped")
+            self._heap = [entrada for entrada in self._heap if entrada[0] != prioridad or entrada is mas_reciente]
+            heapq.heapify(self._heap)
+            if self._backlog_seconds() <= self.latency_budget:
+                return
+    
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"Speech-{self.name}", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        """Loop del hilo: decir lo más urgente de la cola, de a uno"""
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, item = heapq.heappop(self._heap)
+                item.started = time.monotonic()
+                self.current = item
+                self._waits.append(item.started - item.submitted)
+                self._count(item.kind, "spoken")
+                self._count(item.kind, "wait", item.started - item.submitted)
+            
+            try:
+                if not item.cut:  # Pudo llegar algo más urgente justo al sacarlo
+                    self.speak(item.text)
+            except Exception as e:
+                print(f"❌ Error diciendo texto: {e}")
+            
+            with self._cond:
+                if item.cut:
+                    self._count(item.kind, "cut")
+                self.current = None
+    
+    def _count(self, kind, campo, cantidad=1):
+        stats = self._stats.setdefault(kind, {"submitted": 0, "spoken": 0, "cut": 0, "dropped": 0,
+                                              "discarded": 0, "merged": 0, "wait": 0.0})
+        stats[campo] += cantidad
+    
+    def clear(self):
+        """Descartar lo que está en cola (no corta lo que suena)"""
+        with self._cond:
+            for _, _, item in self._heap:
+                self._count(item.kind, "discarded")
+            count = len(self._heap)
+            self._heap = []
+            return count
+    
+    def pending(self):
+        return len(self._heap)
+    
+    def get_stats(self):
+        """Métricas para comparar políticas: tasa de pérdida y espera en cola"""
+        with self._cond:
+            por_tipo = {}
+            totales = {"submitted": 0, "cut": 0, "dropped": 0, "discarded": 0, "merged": 0}
+            for kind, stats in self._stats.items():
+                perdidas = stats["cut"] + stats["dropped"] + stats["discarded"]
+                por_tipo[kind] = {
+                    'submitted': stats["submitted"],
+                    'lost': perdidas,
+                    'merged': stats["merged"],
+                    'wait_avg_ms': round(stats["wait"] / stats["spoken"] * 1000) if stats["spoken"] else 0
+                }
+                for campo in totales:
+                    totales[campo] += stats[campo]
+            esperas = sorted(self._waits)
+        
+        perdidas = totales["cut"] + totales["dropped"] + totales["discarded"]
+        return {
+            'policy': self.policy,
+            'queued': len(self._heap),
+            'submitted': totales["submitted"],
+            'cut': totales["cut"],
+            'dropped': totales["dropped"],
+            'discarded': totales["discarded"],
+            'merged': totales["merged"],
+            'drop_rate': round(perdidas / totales["submitted"] * 100, 1) if totales["submitted"] else 0.0,
+            'wait_avg_ms': round(sum(esperas) / len(esperas) * 1000) if esperas else 0,
+            'wait_p95_ms': round(esperas[int(len(esperas) * 0.95)] * 1000) if esperas else 0,
+            'by_kind': por_tipo
+        }
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import random
+    
+    def simular(policy):
+        """Ráfaga de respuestas con habla simulada (10x más rápida que la real)"""
+        cortar = threading.Event()
+        
+        def decir(texto):
+            cortar.clear()
+            cortar.wait(len(texto) * SECONDS_PER_CHAR / 10)
+        
+        def detener(item):
+            if scheduler.current is item:
+                cortar.set()
+        
+        scheduler = SpeechScheduler(decir, detener, policy=policy, latency_budget=0.8, name=policy)
+        random.seed(7)
+        for _ in range(40):
+            kind = random.choices(list(PRIORITIES), weights=[1, 2, 5, 2])[0]
+            if kind == "gift":
+                # Racha de regalos del mismo usuario: un agradecimiento con el total
+                usuario = random.choice(["ana", "beto", "caro"])
+                for _ in range(random.randint(1, 4)):
+                    scheduler.submit(f"¡Gracias {usuario} por tu rosa!", kind, key=(usuario, "rosa"),
+                                     render=lambda total, u=usuario: f"¡Gracias {u} por tus {total} rosas!")
+            else:
+                scheduler.submit("x" * random.randint(40, 160), kind)
+            time.sleep(random.uniform(0.2, 0.8))
+        while scheduler.pending() or scheduler.current:
+            time.sleep(0.05)
+        return scheduler.get_stats()
+    
+    for policy in SpeechScheduler.POLICIES:
+        stats = simular(policy)
+        print(f"📊 {policy:>6}: pérdidas {stats['drop_rate']}% (cortadas {stats['cut']}, vencidas {stats['dropped']}, "
+              f"descartadas {stats['discarded']}, unidas {stats['merged']}) | espera media {stats['wait_avg_ms']} ms, p95 {stats['wait_p95_ms']} ms")
+        print(f"         {stats['by_kind']}")
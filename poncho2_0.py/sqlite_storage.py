@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+
+class SQLiteStorage:
+    """Backend SQLite para tablas por usuario que crecen sin límite"""
+    
+    def __init__(self, db_file="poncho_stats.db"):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        print(f"🗄️ SQLite storage inicializado en {db_file}")
+    
+    def _create_schema(self):
+        """Crear tablas e índices si no existen"""
+        with self._lock:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS contadores (
+                    espacio TEXT NOT NULL,
+                    tabla TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    valor INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (espacio, tabla, clave)
+                );
+                CREATE INDEX IF NOT EXISTS idx_contadores_ranking
+                    ON contadores (espacio, tabla, valor DESC);
+                CREATE TABLE IF NOT EXISTS registros (
+                    espacio TEXT NOT NULL,
+                    tabla TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    valor TEXT NOT NULL,
+                    PRIMARY KEY (espacio, tabla, clave)
+                );
+            """)
+    
+    def counter_table(self, espacio, tabla):
+        """Obtener tabla de contadores (usuario -> entero)"""
+        return SQLiteCounterTable(self, espacio, tabla)
+    
+    def record_table(self, espacio, tabla):
+        """Obtener tabla de registros (usuario -> objeto JSON)"""
+        return SQLiteRecordTable(self, espacio, tabla)
+    
+    def execute(self, sql, params=()):
+        """Ejecutar sentencia y devolver todas las filas"""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    def executemany(self, sql, rows):
+        """Ejecutar sentencia para varias filas en una transacción"""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(sql, rows)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+    
+    def close(self):
+        """Cerrar conexión"""
+        with self._lock:
+            try:
+                self.conn.close()
+                print("🗄️ SQLite storage cerrado")
+            except Exception:
+                pass
+
+class SQLiteCounterTable:
+    """Contadores por usuario con ranking indexado"""
+    
+    kind = "counter"
+    
+    def __init__(self, storage, espacio, tabla):
+        self.storage = storage
+        self.espacio = espacio
+        self.tabla = tabla
+    
+    def get(self, clave, default=0):
+        """Valor del contador de una clave"""
+        rows = self.storage.execute(
+            "SELECT valor FROM contadores WHERE espacio=? AND tabla=? AND clave=?",
+            (self.espacio, self.tabla, clave))
+        return rows[0][0] if rows else default
+    
+    def incr(self, clave, amount=1):
+        """Incrementar contador y devolver el nuevo valor"""
+        with self.storage._lock:
+            self.storage.conn.execute(
+                "INSERT INTO contadores (espacio, tabla, clave, valor) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (espacio, tabla, clave) DO UPDATE SET valor = valor + excluded.valor",
+                (self.espacio, self.tabla, clave, amount))
+            row = self.storage.conn.execute(
+                "SELECT valor FROM contadores WHERE espacio=? AND tabla=? AND clave=?",
+                (self.espacio, self.tabla, clave)).fetchone()
+        return row[0]
+    
+    def top(self, limit):
+        """Top-N claves por valor usando el índice de ranking"""
+        return [tuple(row) for row in self.storage.execute(
+            "SELECT clave, valor FROM contadores WHERE espacio=? AND tabla=? "
+            "ORDER BY valor DESC LIMIT ?",
+            (self.espacio, self.tabla, limit))]
+    
+    def count(self):
+        """Número de claves"""
+        return self.storage.execute(
+            "SELECT COUNT(*) FROM contadores WHERE espacio=? AND tabla=?",
+            (self.espacio, self.tabla))[0][0]
+    
+    def total(self):
+        """Suma de todos los valores"""
+        return self.storage.execute(
+            "SELECT COALESCE(SUM(valor), 0) FROM contadores WHERE espacio=? AND tabla=?",
+            (self.espacio, self.tabla))[0][0]
+    
+    def clear(self):
+        """Borrar todas las claves de la tabla"""
+        self.storage.execute(
+            "DELETE FROM contadores WHERE espacio=? AND tabla=?",
+            (self.espacio, self.tabla))
+    
+    def import_dict(self, valores):
+        """Importar contadores desde el JSON (idempotente: conserva el mayor)"""
+        self.storage.executemany(
+            "INSERT INTO contadores (espacio, tabla, clave, valor) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (espacio, tabla, clave) DO UPDATE SET valor = MAX(valor, excluded.valor)",
+            [(self.espacio, self.tabla, clave, int(valor)) for clave, valor in valores.items()])
+
+class SQLiteRecordTable:
+    """Registros JSON por usuario (p. ej. predicciones personales)"""
+    
+    kind = "record"
+    
+    def __init__(self, storage, espacio, tabla):
+        self.storage = storage
+        self.espacio = espacio
+        self.tabla = tabla
+    
+    def get(self, clave, default=None):
+        """Registro de una clave"""
+        rows = self.storage.execute(
+            "SELECT valor FROM registros WHERE espacio=? AND tabla=? AND clave=?",
+            (self.espacio, self.tabla, clave))
+        return json.loads(rows[0][0]) if rows else default
+    
+    def put(self, clave, valor):
+        """Guardar registro de una clave"""
+        self.storage.execute(
+            "INSERT OR REPLACE INTO registros (espacio, tabla, clave, valor) VALUES (?, ?, ?, ?)",
+            (self.espacio, self.tabla, clave, json.dumps(valor, ensure_ascii=False)))
+    
+    def count(self):
+        """Número de registros"""
+        return self.storage.execute(
+            "SELECT COUNT(*) FROM registros WHERE espacio=? AND tabla=?",
+            (self.espacio, self.tabla))[0][0]
+    
+    def clear(self):
+        """Borrar todos los registros de la tabla"""
+        self.storage.execute(
+            "DELETE FROM registros WHERE espacio=? AND tabla=?",
+            (self.espacio, self.tabla))
+    
+    def import_dict(self, valores):
+        """Importar registros desde el JSON sin pisar los existentes"""
+        self.storage.executemany(
+            "INSERT OR IGNORE INTO registros (espacio, tabla, clave, valor) VALUES (?, ?, ?, ?)",
+            [(self.espacio, self.tabla, clave, json.dumps(valor, ensure_ascii=False))
+             for clave, valor in valores.items()])
@@ -0,0 +1,326 @@
+import io
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+try:
+    import pyttsx3
+    HAS_PYTTSX3 = True
+except ImportError:
+    HAS_PYTTSX3 = False
+from tts_service import get_tts_service, HAS_EDGE_TTS, TTS_PARAMS
+from tts_cache import get_tts_cache
+from mp3_stream import mp3_duration
+
+# Tiempo máximo de edge-tts antes de pasar al siguiente backend (segundos)
+FAILOVER_TIMEOUT_SECONDS = 10
+# Tras un error o timeout, el backend se saltea durante este tiempo (segundos)
+BACKEND_RETRY_SECONDS = 60
+
+def audio_duration(data):
+    """Duración en segundos de un WAV o MP3 en memoria"""
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data)) as wav:
+            return wav.getnframes() / wav.getframerate()
+    return mp3_duration(data)
+
+class TTSBackend(ABC):
+    """Motor de síntesis: devuelve el audio completo en bytes que pygame sabe decodificar"""
+    
+    name = "base"
+    streaming = False  # Sabe entregar el audio por partes (MP3)
+    cacheable = True  # Su audio se guarda en el caché de TTS
+    
+    @property
+    def params(self):
+        """Parámetros que distinguen su audio en el caché"""
+        return {"engine": self.name}
+    
+    def available(self):
+        return False
+    
+    @abstractmethod
+    def synthesize(self, text, voice, timeout):
+        """Audio completo del texto - debe ser implementado"""
+        pass
+    
+    @abstractmethod
+    def stream(self, text, voice, timeout):
+        """Pedazos de audio a medida que se sintetizan - debe ser implementado"""
+        pass
+
+class EdgeTTSBackend(TTSBackend):
+    """Voces neuronales de Microsoft (requiere internet)"""
+    
+    name = "edge-tts"
+    streaming = True
+    
+    @property
+    def params(self):
+        return TTS_PARAMS
+    
+    def available(self):
+        return HAS_EDGE_TTS
+    
+    def synthesize(self, text, voice, timeout):
+        return get_tts_service().synthesize_bytes(text, voice, timeout, verbose=False)
+    
+    def stream(self, text, voice, timeout):
+        return get_tts_service().stream(text, voice, timeout)
+
+class LocalTTSBackend(TTSBackend):
+    """Motor local sin red: rápido, así que no ocupa el caché de las voces neuronales"""
+    
+    cacheable = False
+    
+    def stream(self, text, voice, timeout):
+        """Sin streaming: el audio completo en una sola parte"""
+        yield self.synthesize(text, voice, timeout)
+
+class Pyttsx3Backend(LocalTTSBackend):
+    """Voces del sistema operativo (SAPI5 en Windows, eSpeak en Linux) sin red
+    
+    El motor de pyttsx3 no se puede usar desde varios hilos (en Windows usa
+    COM), así que un hilo propio lo crea y atiende los pedidos en orden.
+    """
+    
+    name = "pyttsx3"
+    
+    def __init__(self, rate=175):
+        self.rate = rate
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def available(self):
+        return HAS_PYTTSX3
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="Pyttsx3", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        engine = pyttsx3.init()
+        engine.setProperty('rate', self.rate)
+        self._select_spanish_voice(engine)
+        while True:
+            text, future = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            fd, path = tempfile.mkstemp(suffix=".wav")  # pyttsx3 solo escribe a archivo
+            os.close(fd)
+            try:
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                with open(path, 'rb') as f:
+                    future.set_result(f.read())
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                os.unlink(path)
+    
+    @staticmethod
+    def _select_spanish_voice(engine):
+        """Usar la primera voz en español instalada en el sistema"""
+        for voz in engine.getProperty('voices'):
+            idiomas = " ".join(str(idioma) for idioma in (voz.languages or []))
+            descripcion = f"{voz.id} {voz.name} {idiomas}".lower()
+            if "spanish" in descripcion or "español" in descripcion or "es_" in descripcion or "es-" in descripcion:
+                engine.setProperty('voice', voz.id)
+                return
+    
+    def synthesize(self, text, voice, timeout):
+        self._ensure_started()
+        future = Future()
+        self._jobs.put((text, future))
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+class ESpeakBackend(LocalTTSBackend):
+    """eSpeak NG por línea de comandos: el WAV sale por stdout, sin red ni archivos"""
+    
+    name = "espeak-ng"
+    # Acento de la voz de edge-tts -> voz de eSpeak
+    VOICES = {"es-MX": "es-419", "es-ES": "es"}
+    
+    def __init__(self, speed=165):
+        self.speed = speed
+        self.executable = shutil.which("espeak-ng") or shutil.which("espeak")
+    
+    def available(self):
+        return self.executable is not None
+    
+    def synthesize(self, text, voice, timeout):
+        idioma = self.VOICES.get(voice[:5], "es")
+        resultado = subprocess.run(
+            [self.executable, "-v", idioma, "-s", str(self.speed), "-b", "1", "--stdout"],
+            input=text.encode('utf-8'), capture_output=True, timeout=timeout, check=True
+        )
+        return resultado.stdout
+
+class TTSRouter:
+    """Síntesis con failover: el primer backend disponible y sano, en orden de preferencia
+    
+    Si un backend falla o tarda más que el timeout se pasa al siguiente y
+    ese backend se saltea durante BACKEND_RETRY_SECONDS. Antes de sintetizar
+    se busca en el caché el audio de los backends cacheables, así una frase
+    ya dicha con edge-tts se sigue oyendo con esa voz aunque no haya red.
+    """
+    
+    def __init__(self, backends=None):
+        self.backends = backends or [EdgeTTSBackend(), Pyttsx3Backend(), ESpeakBackend()]
+        self._down_until = {}  # nombre -> time.monotonic() hasta el que se saltea
+        self._lock = threading.Lock()
+        self._stats = {backend.name: {'jobs': 0, 'errors': 0, 'seconds': 0.0} for backend in self.backends}
+        self.failovers = 0
+    
+    def available(self):
+        """Hay al menos un backend con el que se puede hablar"""
+        return any(backend.available() for backend in self.backends)
+    
+    def healthy(self, backend):
+        with self._lock:
+            return backend.available() and time.monotonic() >= self._down_until.get(backend.name, 0)
+    
+    def primary(self):
+        """Backend que se usaría ahora"""
+        for backend in self.backends:
+            if self.healthy(backend):
+                return backend
+        return None
+    
+    def can_stream(self):
+        backend = self.primary()
+        return backend is not None and backend.streaming
+    
+    def _mark_failed(self, backend, error):
+        with self._lock:
+            self._down_until[backend.name] = time.monotonic() + BACKEND_RETRY_SECONDS
+            self._stats[backend.name]['errors'] += 1
+            self.failovers += 1
+        print(f"⚠️ TTS {backend.name} falló ({error or type(error).__name__}); "
+              f"usando respaldo durante {BACKEND_RETRY_SECONDS} s")
+    
+    def _record(self, backend, seconds):
+        with self._lock:
+            stats = self._stats[backend.name]
+            stats['jobs'] += 1
+            stats['seconds'] += seconds
+    
+    def synthesize(self, text, voice, timeout=FAILOVER_TIMEOUT_SECONDS, verbose=True):
+        """Audio del texto en memoria (MP3 o WAV), o None si ningún backend pudo"""
+        cache = get_tts_cache()
+        for backend in self.backends:
+            if backend.cacheable:
+                audio = cache.get_bytes(text, voice, backend.params)
+                if audio:
+                    if verbose:
+                        print("💾 Audio desde caché (sin síntesis)")
+                    return audio
+        
+        for backend in self.backends:
+            if not self.healthy(backend):
+                continue
+            inicio = time.perf_counter()
+            try:
+                audio = backend.synthesize(text, voice, timeout)
+            except Exception as e:
+                self._mark_failed(backend, e)
+                continue
+            if not audio:
+                self._mark_failed(backend, "audio vacío")
+                continue
+            
+            duracion = time.perf_counter() - inicio
+            self._record(backend, duracion)
+            if backend.cacheable:
+                cache.put_bytes(text, voice, audio, backend.params)
+            if verbose:
+                print(f"⏱️ Audio listo en {duracion * 1000:.0f} ms ({backend.name})")
+            return audio
+        return None
+    
+    def stream(self, text, voice, timeout=FAILOVER_TIMEOUT_SECONDS):
+        """Pedazos de MP3 del backend principal si sabe hacer streaming (si no, nada)"""
+        backend = self.primary()
+        if backend is None or not backend.streaming:
+            return
+        inicio = time.perf_counter()
+        try:
+            yield from backend.stream(text, voice, timeout)
+        except Exception as e:
+            self._mark_failed(backend, e)
+            raise
+        self._record(backend, time.perf_counter() - inicio)
+    
+    def get_stats(self):
+        """Síntesis por backend y cuáles están salteados"""
+        primario = self.primary()
+        ahora = time.monotonic()
+        with self._lock:
+            return {
+                'primary': primario.name if primario else None,
+                'failovers': self.failovers,
+                'down': [nombre for nombre, hasta in self._down_until.items() if hasta > ahora],
+                'backends': {
+                    nombre: {
+                        'jobs': stats['jobs'],
+                        'errors': stats['errors'],
+                        'avg_ms': round(stats['seconds'] / stats['jobs'] * 1000, 1) if stats['jobs'] else 0
+                    } for nombre, stats in self._stats.items()
+                }
+            }
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_tts_router():
+    """Obtener el router de síntesis compartido"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = TTSRouter()
+        return _router
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    texto = "¡Hola! Soy Poncho, el payaso más guapo del live. Hoy vengo con chistes nuevos."
+    voz = "es-MX-JorgeNeural"
+    
+    # Benchmark: tiempo hasta el primer audio y factor de tiempo real (síntesis / duración)
+    for backend in get_tts_router().backends:
+        if not backend.available():
+            print(f"⚪ {backend.name}: no disponible")
+            continue
+        try:
+            for vuelta in range(2):  # La primera incluye el arranque del motor
+                inicio = time.perf_counter()
+                primer_audio = None
+                if backend.streaming:
+                    partes = []
+                    for parte in backend.stream(texto, voz, FAILOVER_TIMEOUT_SECONDS):
+                        if primer_audio is None:
+                            primer_audio = time.perf_counter() - inicio
+                        partes.append(parte)
+                    audio = b"".join(partes)
+                else:
+                    audio = backend.synthesize(texto, voz, FAILOVER_TIMEOUT_SECONDS)
+                    primer_audio = time.perf_counter() - inicio
+                total = time.perf_counter() - inicio
+            duracion = audio_duration(audio)
+            rtf = total / duracion if duracion else float('inf')
+            print(f"🗣️ {backend.name}: primer audio {primer_audio * 1000:.0f} ms | síntesis {total * 1000:.0f} ms | "
+                  f"{duracion:.2f} s de audio | RTF {rtf:.3f}")
+        except Exception as e:
+            print(f"❌ {backend.name}: {e}")
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Tamaño máximo por defecto del caché de audio (bytes)
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+def normalize_tts_text(text):
+    """Texto tal como se sintetiza: espacios repetidos no cambian el audio"""
+    return " ".join((text or "").split())
+
+class TTSCache:
+    """Caché en disco de audio sintetizado, direccionado por contenido
+    
+    La clave es un hash de (voz, texto normalizado, parámetros del TTS), así
+    que un chiste o una línea fija se sintetiza una vez y después se reproduce
+    directo del disco. Al pasar de `max_bytes` se borra el menos usado.
+    Junto a cada audio se pueden guardar datos derivados (p. ej. la
+    envolvente para mover la boca) que se borran con él.
+    """
+    
+    def __init__(self, cache_dir="tts_cache", max_bytes=TTS_CACHE_MAX_BYTES, suffix=".mp3"):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._entries = OrderedDict()  # clave -> bytes, de menos a más reciente
+        self._sidecar_exts = set()  # Extensiones de los datos guardados junto a los audios
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_index()
+    
+    def _load_index(self):
+        """Reconstruir el índice LRU desde los archivos (fecha de uso = mtime)"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            archivos = []
+            adjuntos = []
+            for nombre in os.listdir(self.cache_dir):
+                if not nombre.endswith(self.suffix):
+                    if len(nombre) > 40 and nombre[40] == "." and not nombre.endswith(".tmp"):
+                        adjuntos.append(nombre)
+                    continue
+                stat = os.stat(os.path.join(self.cache_dir, nombre))
+                archivos.append((stat.st_mtime, nombre[:-len(self.suffix)], stat.st_size))
+            for _, key, size in sorted(archivos):
+                self._entries[key] = size
+                self.total_bytes += size
+            for nombre in adjuntos:
+                if nombre[:40] in self._entries:
+                    self._sidecar_exts.add(nombre[40:])
+                else:
+                    os.unlink(os.path.join(self.cache_dir, nombre))  # Su audio ya no está
+            print(f"💾 TTS Cache: {len(self._entries)} audios ({self.total_bytes / 1024 / 1024:.1f} MB)")
+        except Exception as e:
+            print(f"❌ Error cargando caché de audio: {e}")
+    
+    @staticmethod
+    def key_for(text, voice, params=None):
+        """Clave del audio para esa voz, texto y parámetros"""
+        partes = [voice, normalize_tts_text(text)]
+        if params:
+            partes.extend(f"{k}={params[k]}" for k in sorted(params))
+        return hashlib.sha1("\n".join(partes).encode('utf-8')).hexdigest()
+    
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + self.suffix)
+    
+    def get(self, text, voice, params=None):
+        """Ruta del audio cacheado, o None si hay que sintetizarlo"""
+        key = self.key_for(text, voice, params)
+        path = self.path_for(key)
+        with self._lock:
+            if key in self._entries and os.path.exists(path):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                try:
+                    os.utime(path)  # El orden LRU sobrevive a un reinicio
+                except OSError:
+                    pass
+                return path
+            if key in self._entries:
+                # Borrado por fuera del programa
+                self.total_bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+    
+    def get_bytes(self, text, voice, params=None):
+        """Audio cacheado leído a memoria, o None si hay que sintetizarlo"""
+        path = self.get(text, voice, params)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def contains(self, text, voice, params=None):
+        """Verificar si un audio ya está cacheado, sin contarlo como uso"""
+        key = self.key_for(text, voice, params)
+        return key in self._entries and os.path.exists(self.path_for(key))
+    
+    def put(self, text, voice, source_path, params=None):
+        """Mover un audio recién sintetizado al caché y devolver su nueva ruta"""
+        key = self.key_for(text, voice, params)
+        path = self.path_for(key)
+        try:
+            size = os.path.getsize(source_path)
+            if size == 0 or size > self.max_bytes:
+                return source_path
+            os.replace(source_path, path)
+        except Exception as e:
+            print(f"❌ Error guardando audio en caché: {e}")
+            return source_path
+        
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict(keep=key)
+        return path
+    
+    def put_bytes(self, text, voice, data, params=None):
+        """Guardar en el caché un audio que está en memoria y devolver su ruta"""
+        if not self.max_bytes:
+            return None  # Caché deshabilitado: nada toca el disco
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"❌ Error guardando audio en caché: {e}")
+            return None
+        
+        path = self.put(text, voice, temp_path, params)
+        if path == temp_path:
+            # No entró al caché
+            os.unlink(temp_path)
+            return None
+        return path
+    
+    def get_sidecar(self, text, voice, ext, params=None):
+        """Datos guardados junto al audio cacheado (extensión `ext`), o None"""
+        key = self.key_for(text, voice, params)
+        if key not in self._entries:
+            return None
+        try:
+            with open(self.path_for(key)[:-len(self.suffix)] + ext, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def put_sidecar(self, text, voice, ext, data, params=None):
+        """Guardar datos derivados junto al audio cacheado (si el audio no está, no se guardan)"""
+        key = self.key_for(text, voice, params)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._sidecar_exts.add(ext)
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, os.path.join(self.cache_dir, key + ext))
+            return True
+        except Exception as e:
+            print(f"❌ Error guardando datos en caché: {e}")
+            return False
+    
+    def _unlink_sidecars(self, key):
+        for ext in self._sidecar_exts:
+            try:
+                os.unlink(os.path.join(self.cache_dir, key + ext))
+            except OSError:
+                pass
+    
+    def _evict(self, keep=None):
+        """Borrar los menos usados hasta quedar bajo el límite"""
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            try:
+                os.unlink(self.path_for(key))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # En uso por el reproductor: se intenta en la próxima vuelta
+                self._entries.move_to_end(key)
+                break
+            self._unlink_sidecars(key)
+            del self._entries[key]
+            self.total_bytes -= size
+            self.evictions += 1
+    
+    def clear(self):
+        """Borrar todo el caché"""
+        with self._lock:
+            count = len(self._entries)
+            for key in list(self._entries):
+                try:
+                    os.unlink(self.path_for(key))
+                except OSError:
+                    pass
+                self._unlink_sidecars(key)
+            self._entries.clear()
+            self.total_bytes = 0
+            return count
+    
+    def get_stats(self):
+        """Estadísticas de aciertos y ocupación"""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'mb': round(self.total_bytes / 1024 / 1024, 2),
+                'max_mb': round(self.max_bytes / 1024 / 1024, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / consultas * 100, 1) if consultas else 0.0,
+                'evictions': self.evictions
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache():
+    """Obtener el caché de audio compartido"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+        return _cache
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import time
+    
+    cache = TTSCache(cache_dir=os.path.join(tempfile.gettempdir(), "tts_cache_demo"), max_bytes=4096)
+    cache.clear()
+    
+    lineas = [f"Chiste número {i}: ¿por qué el payaso cruzó la calle?" for i in range(6)]
+    for vuelta in range(2):
+        for linea in lineas[-3:] if vuelta else lineas:
+            if cache.get(linea, "es-MX-JorgeNeural") is None:
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+                temp_file.write(os.urandom(1000))
+                temp_file.close()
+                cache.put(linea, "es-MX-JorgeNeural", temp_file.name)
+    print(f"📊 {cache.get_stats()}")
+    
+    inicio = time.perf_counter()
+    for _ in range(10000):
+        cache.get(lineas[5], "es-MX-JorgeNeural")
+    print(f"⏱️ Consulta al caché: {(time.perf_counter() - inicio) / 10000 * 1e6:.1f} µs")
@@ -0,0 +1,235 @@
+import asyncio
+import queue
+import threading
+import time
+try:
+    import edge_tts
+    HAS_EDGE_TTS = True
+except ImportError:
+    HAS_EDGE_TTS = False
+from tts_cache import get_tts_cache
+
+# Tiempo máximo de espera por una síntesis (segundos)
+TTS_TIMEOUT_SECONDS = 30
+
+# Parámetros que cambian el audio generado (forman parte de la clave del caché)
+TTS_PARAMS = {"engine": "edge-tts"}
+
+class TTSService:
+    """Hilo único con un event loop permanente para la síntesis de voz
+    
+    Antes cada frase creaba, fijaba y cerraba su propio event loop en el
+    hilo que hablaba. Ahora los trabajos se envían a este loop con
+    run_coroutine_threadsafe y el que llama solo espera el resultado.
+    """
+    
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.jobs = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+    
+    def _ensure_started(self):
+        """Iniciar el hilo del loop la primera vez que se necesita"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._loop
+            
+            ready = threading.Event()
+            
+            def run():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                ready.set()
+                try:
+                    self._loop.run_forever()
+                finally:
+                    self._loop.close()
+            
+            self._thread = threading.Thread(target=run, name="TTSService", daemon=True)
+            self._thread.start()
+            ready.wait()
+            print("🗣️ TTS Service iniciado (event loop compartido)")
+            return self._loop
+    
+    def submit(self, coro):
+        """Enviar una corrutina al loop del servicio y devolver su future"""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+    
+    def run(self, coro, timeout=TTS_TIMEOUT_SECONDS):
+        """Ejecutar una corrutina en el loop del servicio y esperar su resultado"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+    
+    def synthesize_bytes(self, text, voice, timeout=TTS_TIMEOUT_SECONDS, verbose=True):
+        """Sintetizar texto con Edge TTS y devolver el MP3 en memoria"""
+        if not HAS_EDGE_TTS:
+            return None
+        
+        async def generate():
+            audio = bytearray()
+            communicate = edge_tts.Communicate(text, voice)
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    audio.extend(chunk["data"])
+            return bytes(audio)
+        
+        inicio = time.perf_counter()
+        try:
+            audio = self.run(generate(), timeout)
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        
+        duracion = time.perf_counter() - inicio
+        with self._stats_lock:
+            self.jobs += 1
+            self.total_seconds += duracion
+            self.last_seconds = duracion
+        if verbose:
+            print(f"⏱️ Audio listo en {duracion * 1000:.0f} ms")
+        return audio
+    
+    def synthesize(self, text, voice, timeout=TTS_TIMEOUT_SECONDS, verbose=True):
+        """MP3 del texto en memoria: del caché si ya se sintetizó, si no sintetizarlo y cachearlo"""
+        cache = get_tts_cache()
+        audio = cache.get_bytes(text, voice, TTS_PARAMS)
+        if audio:
+            if verbose:
+                print("💾 Audio desde caché (sin síntesis)")
+            return audio
+        
+        audio = self.synthesize_bytes(text, voice, timeout, verbose)
+        if audio:
+            cache.put_bytes(text, voice, audio, TTS_PARAMS)
+        return audio
+    
+    def stream(self, text, voice, timeout=TTS_TIMEOUT_SECONDS):
+        """Iterar los pedazos de MP3 a medida que llegan de Edge TTS
+        
+        Si el audio llega completo se guarda entero en el caché. Cerrar el
+        iterador antes de tiempo cancela la síntesis.
+        """
+        if not HAS_EDGE_TTS:
+            return
+        
+        chunks = queue.Queue()
+        fin = object()
+        
+        async def generate():
+            try:
+                communicate = edge_tts.Communicate(text, voice)
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        chunks.put(chunk["data"])
+                chunks.put(fin)
+            except Exception as e:
+                chunks.put(e)
+        
+        inicio = time.perf_counter()
+        future = self.submit(generate())
+        audio = bytearray()
+        completo = False
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"Edge TTS no respondió en {timeout} s")
+                if item is fin:
+                    completo = True
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                audio.extend(item)
+                yield item
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        finally:
+            if not completo:
+                future.cancel()
+        
+        duracion = time.perf_counter() - inicio
+        with self._stats_lock:
+            self.jobs += 1
+            self.total_seconds += duracion
+            self.last_seconds = duracion
+        if audio:
+            get_tts_cache().put_bytes(text, voice, bytes(audio), TTS_PARAMS)
+    
+    def get_stats(self):
+        """Resumen de síntesis realizadas"""
+        with self._stats_lock:
+            promedio = self.total_seconds / self.jobs * 1000 if self.jobs else 0
+            return {
+                'jobs': self.jobs,
+                'errors': self.errors,
+                'avg_ms': round(promedio, 1),
+                'last_ms': round(self.last_seconds * 1000, 1)
+            }
+    
+    def stop(self):
+        """Detener el loop y su hilo"""
+        with self._lock:
+            if self._loop is None or self._thread is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2)
+            self._thread = None
+            self._loop = None
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_tts_service():
+    """Obtener el servicio de síntesis compartido por todos los robots"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TTSService()
+        return _service
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    service = get_tts_service()
+    
+    # Costo del loop por frase: antes uno nuevo por frase, ahora el compartido
+    async def trabajo():
+        await asyncio.sleep(0)
+    
+    inicio = time.perf_counter()
+    for _ in range(200):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(trabajo())
+        loop.close()
+    antes = (time.perf_counter() - inicio) / 200
+    
+    inicio = time.perf_counter()
+    for _ in range(200):
+        service.run(trabajo())
+    ahora = (time.perf_counter() - inicio) / 200
+    print(f"⏱️ Loop por frase: nuevo {antes * 1e6:.0f} µs | compartido {ahora * 1e6:.0f} µs")
+    
+    if HAS_EDGE_TTS:
+        texto = "¡Hola! Soy Poncho, el payaso más guapo del live."
+        for _ in range(3):
+            try:
+                service.synthesize_bytes(texto, "es-MX-JorgeNeural")
+            except Exception as e:
+                print(f"❌ Error sintetizando: {e}")
+        print(f"📊 {service.get_stats()}")
+    
+    service.stop()
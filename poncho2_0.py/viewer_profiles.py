@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Comentarios sobre nombres "especiales" (se busca la primera coincidencia)
+SPECIAL_NAMES = {
+    "admin": "Ser admin no te salva de mi sarcasmo.",
+    "user": "¡Qué original! ¿También tu contraseña es 'password'?",
+    "guest": "Invitado... como el que no invitan a las fiestas.",
+    "test": "¿Eres un test? Porque has fallado en mi corazón.",
+    "null": "Tu nombre es 'null' como tu personalidad.",
+    "bot": "¿Bot? Al menos yo admito que soy artificial.",
+    "anonymous": "Anónimo... como el que dejó esa mancha en mi cara.",
+    "troll": "¿Troll? ¡Yo soy el monstruo bajo tu puente!",
+    "gamer": "Los gamers no pueden pausar la vida real.",
+    "streamer": "Tu stream será mi escenario de terror."
+}
+
+def profile_key(username):
+    """Clave única de un espectador ("Juan " y "juan" son el mismo)"""
+    return (username or "").strip().lower()
+
+class ViewerProfile:
+    """Perfil compacto de un espectador compartido por todos los modos"""
+    
+    __slots__ = ("key", "name", "name_additions", "counters", "first_seen", "last_seen", "_lock")
+    
+    def __init__(self, username):
+        self.key = profile_key(username)
+        self.name = username  # Como se vio por primera vez
+        self.name_additions = self._name_traits(username)
+        self.counters = {}  # "comentarios", "regalos", "acertijos", ... entre todos los modos
+        self.first_seen = self.last_seen = time.time()
+        # Lo suman a la vez el hilo de regalos de TikTok y los de comentarios
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _name_traits(username):
+        """Comentarios sobre el nombre, calculados una sola vez por espectador"""
+        additions = []
+        if len(username) > 15:
+            additions.append("Tu nombre es tan largo que me da pereza escribirlo completo.")
+        elif len(username) < 4:
+            additions.append("Tu nombre es tan corto como tu paciencia.")
+        
+        if any(char.isdigit() for char in username):
+            additions.append("Los números en tu nombre revelan falta de creatividad.")
+        
+        name_lower = username.lower()
+        for name, addition in SPECIAL_NAMES.items():
+            if name in name_lower:
+                additions.append(addition)
+                break
+        return tuple(additions)
+    
+    def incr(self, counter, amount=1):
+        """Sumar a un contador del perfil y devolver el nuevo valor"""
+        with self._lock:
+            valor = self.counters.get(counter, 0) + amount
+            self.counters[counter] = valor
+            return valor
+    
+    def get(self, counter):
+        """Valor de un contador del perfil"""
+        return self.counters.get(counter, 0)
+    
+    def __repr__(self):
+        return f"ViewerProfile({self.name!r}, {self.counters})"
+
+class ViewerProfiles:
+    """Almacén de perfiles por espectador, acotado con desalojo LRU"""
+    
+    def __init__(self, max_profiles=10000):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()  # clave -> perfil, de menos a más reciente
+        self._lock = threading.Lock()
+        self.evicted = 0
+    
+    def get(self, username):
+        """Perfil del espectador (se crea al primer uso) y marcarlo como visto"""
+        key = profile_key(username)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = ViewerProfile(username)
+                self._profiles[key] = profile
+                if len(self._profiles) > self.max_profiles:
+                    self._profiles.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._profiles.move_to_end(key)
+            profile.last_seen = time.time()
+            return profile
+    
+    def seen(self, username, counter="comentarios"):
+        """Registrar una interacción del espectador y devolver su perfil"""
+        profile = self.get(username)
+        profile.incr(counter)
+        return profile
+    
+    def peek(self, username):
+        """Perfil si existe, sin crearlo ni tocarlo"""
+        return self._profiles.get(profile_key(username))
+    
+    def __len__(self):
+        return len(self._profiles)
+    
+    def __contains__(self, username):
+        return profile_key(username) in self._profiles
+    
+    def top(self, counter, limit=5):
+        """Espectadores con más valor en un contador: [(nombre, valor)]"""
+        with self._lock:
+            perfiles = [p for p in self._profiles.values() if p.get(counter) > 0]
+        perfiles.sort(key=lambda p: p.get(counter), reverse=True)
+        return [(p.name, p.get(counter)) for p in perfiles[:limit]]
+    
+    def active_since(self, seconds):
+        """Cantidad de espectadores vistos en los últimos `seconds` segundos"""
+        limite = time.time() - seconds
+        with self._lock:
+            # Ordenados por último uso: contar desde el final hasta el primero viejo
+            activos = 0
+            for profile in reversed(self._profiles.values()):
+                if profile.last_seen < limite:
+                    break
+                activos += 1
+            return activos
+    
+    def get_stats(self):
+        """Resumen del almacén de perfiles"""
+        stats = f"👥 Perfiles de espectadores: {len(self)} (máx. {self.max_profiles}, desalojados {self.evicted})\n"
+        stats += f"Activos en los últimos 5 minutos: {self.active_since(300)}\n"
+        top = self.top("comentarios", 5)
+        if top:
+            stats += "Más participativos:\n"
+            for i, (name, count) in enumerate(top, 1):
+                stats += f"  {i}. {name}: {count} comentarios\n"
+        return stats
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+def get_viewer_profiles():
+    """Obtener el almacén compartido de perfiles"""
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = ViewerProfiles()
+        return _profiles
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import random
+    from response_handler import ResponseHandler
+    
+    profiles = get_viewer_profiles()
+    for username in ["Juan", "juan ", "gamer_123", "admin", "Ana"]:
+        profile = profiles.seen(username)
+        print(f"👤 {username!r} -> {profile.key!r}, rasgos: {len(profile.name_additions)}, {profile.counters}")
+    
+    print(profiles.get_stats())
+    
+    nombres = [f"gamer{random.randint(0, 300)}" for _ in range(50000)]
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        ViewerProfile._name_traits(nombre)
+    antes = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        profiles.get(nombre).name_additions
+    ahora = time.perf_counter() - inicio
+    print(f"⏱️ Rasgos de nombre x50000: recalculados {antes * 1000:.0f} ms | perfil cacheado {ahora * 1000:.0f} ms")
+    print(ResponseHandler.personalize_by_name("gamer_123", "¡Hola!"))